@@ -1,5 +1,9 @@
 """Helpers para autenticação das rotas da API do painel."""
+import hashlib
+import hmac
+import time
 from functools import wraps
+from urllib.parse import urlencode
 from flask import request, jsonify
 from config import PANEL_API_TOKEN
 
@@ -35,3 +39,42 @@ def _extract_token():
         return custom_header.strip()
 
     return request.args.get('api_token', '').strip()
+
+
+def _signature(path: str, expires: int) -> str:
+    message = f"{path}:{expires}".encode('utf-8')
+    return hmac.new(PANEL_API_TOKEN.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+def sign_path(path: str, ttl_seconds: int) -> str:
+    """Caminho com assinatura e validade (links enviados ao Discord, abertos sem o token da API)."""
+    if not PANEL_API_TOKEN:
+        return path
+    expires = int(time.time()) + int(ttl_seconds)
+    return f"{path}?{urlencode({'expires': expires, 'sig': _signature(path, expires)})}"
+
+
+def _valid_signature() -> bool:
+    try:
+        expires = int(request.args.get('expires', ''))
+    except ValueError:
+        return False
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(request.args.get('sig', ''), _signature(request.path, expires))
+
+
+def require_signed_url_or_api_token(func):
+    """Como require_api_token, mas também aceita um link assinado por sign_path e ainda válido."""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not PANEL_API_TOKEN:
+            return MISSING_TOKEN_RESPONSE
+
+        if _extract_token() != PANEL_API_TOKEN and not _valid_signature():
+            return UNAUTHORIZED_RESPONSE
+
+        return func(*args, **kwargs)
+
+    return wrapper
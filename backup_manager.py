@@ -1,11 +1,18 @@
 import json
 import os
-from datetime import datetime
+import re
+import time
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
 import discord
 import logging
 
 logger = logging.getLogger(__name__)
 
+AUTO_BACKUP_PREFIX = "backup_auto_"
+BACKUP_TIMESTAMP_REGEX = re.compile(r'(\d{8}_\d{6})\.json$')
+
 class BackupManager:
     """Gerenciador de backups do servidor Discord"""
     
@@ -13,32 +20,43 @@ class BackupManager:
         self.backup_folder = backup_folder
         if not os.path.exists(backup_folder):
             os.makedirs(backup_folder)
+        
+        # Estado do backup automático
+        self.auto_backup_task = None
+        self.last_structure_hash = None
+        self.auto_backup_stats = {
+            "enabled": False,
+            "interval_minutes": 0,
+            "retention": {"hourly": 0, "daily": 0, "weekly": 0},
+            "runs": 0,
+            "written": 0,
+            "skipped_unchanged": 0,
+            "pruned": 0,
+            "errors": 0,
+            "last_run_at": None,
+            "next_run_at": None,
+            "last_filename": None,
+            "last_snapshot_ms": 0.0,
+            "last_write_ms": 0.0,
+            "last_prune_ms": 0.0,
+            "last_size_bytes": 0,
+            "total_size_bytes": 0,
+            "file_count": 0,
+            "last_error": None
+        }
     
     async def create_backup(self, guild: discord.Guild):
         """Cria um backup completo do servidor"""
         try:
-            backup_data = {
-                "backup_info": {
-                    "guild_name": guild.name,
-                    "guild_id": guild.id,
-                    "created_at": datetime.now().isoformat(),
-                    "member_count": guild.member_count,
-                    "owner_id": guild.owner_id
-                },
-                "roles": await self._backup_roles(guild),
-                "categories": await self._backup_categories(guild),
-                "channels": await self._backup_channels(guild),
-                "emojis": await self._backup_emojis(guild),
-                "guild_settings": await self._backup_guild_settings(guild)
-            }
+            backup_data = await self._collect_backup_data(guild)
             
-            # Salva o backup em arquivo JSON
+            # Salva o backup em arquivo JSON (fora do event loop)
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"backup_{guild.name}_{timestamp}.json"
             filepath = os.path.join(self.backup_folder, filename)
             
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(backup_data, f, ensure_ascii=False, indent=2)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write_backup_file, filepath, backup_data)
             
             logger.info(f"Backup criado: {filename}")
             return True, filename, backup_data
@@ -47,6 +65,213 @@ class BackupManager:
             logger.error(f"Erro ao criar backup: {e}")
             return False, None, str(e)
     
+    async def _collect_backup_data(self, guild: discord.Guild):
+        """Monta o snapshot do servidor a partir do cache (sem chamadas REST)"""
+        backup_data = {
+            "backup_info": {
+                "guild_name": guild.name,
+                "guild_id": guild.id,
+                "created_at": datetime.now().isoformat(),
+                "member_count": guild.member_count,
+                "owner_id": guild.owner_id
+            },
+            "roles": await self._backup_roles(guild),
+            "categories": await self._backup_categories(guild),
+            "channels": await self._backup_channels(guild),
+            "emojis": await self._backup_emojis(guild),
+            "guild_settings": await self._backup_guild_settings(guild)
+        }
+        backup_data["backup_info"]["structure_hash"] = self.compute_structure_hash(backup_data)
+        return backup_data
+    
+    @staticmethod
+    def compute_structure_hash(backup_data: dict) -> str:
+        """Hash estrutural do snapshot (ignora data de criação e contagem de membros)"""
+        structure = {
+            key: backup_data.get(key)
+            for key in ("roles", "categories", "channels", "emojis", "guild_settings")
+        }
+        serialized = json.dumps(structure, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha1(serialized.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def _write_backup_file(filepath: str, backup_data: dict):
+        """Grava o backup em disco e retorna o tamanho em bytes"""
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(backup_data, f, ensure_ascii=False, indent=2)
+        return os.path.getsize(filepath)
+    
+    # ==================== BACKUP AUTOMÁTICO ====================
+    
+    def start_auto_backup(self, bot, guild_id: int, interval_minutes: int,
+                          keep_hourly: int = 24, keep_daily: int = 7, keep_weekly: int = 4):
+        """Inicia a tarefa de backup automático no loop do bot (idempotente)"""
+        if interval_minutes <= 0:
+            logger.info("💾 Backup automático desativado (AUTO_BACKUP_INTERVAL_MINUTES=0)")
+            return False
+        
+        if self.auto_backup_task and not self.auto_backup_task.done():
+            return False
+        
+        self.auto_backup_stats.update({
+            "enabled": True,
+            "interval_minutes": interval_minutes,
+            "retention": {"hourly": keep_hourly, "daily": keep_daily, "weekly": keep_weekly}
+        })
+        self.auto_backup_task = bot.loop.create_task(
+            self._auto_backup_loop(bot, guild_id, interval_minutes)
+        )
+        logger.info(f"💾 Backup automático agendado a cada {interval_minutes} minuto(s)")
+        return True
+    
+    def stop_auto_backup(self):
+        """Cancela a tarefa de backup automático"""
+        if self.auto_backup_task and not self.auto_backup_task.done():
+            self.auto_backup_task.cancel()
+        self.auto_backup_task = None
+        self.auto_backup_stats["enabled"] = False
+    
+    async def _auto_backup_loop(self, bot, guild_id: int, interval_minutes: int):
+        """Executa snapshots periódicos enquanto o bot estiver ativo"""
+        await bot.wait_until_ready()
+        interval_seconds = interval_minutes * 60
+        
+        while not bot.is_closed():
+            guild = bot.get_guild(guild_id)
+            if guild:
+                try:
+                    await self.create_scheduled_backup(guild)
+                except Exception as e:
+                    self.auto_backup_stats["errors"] += 1
+                    self.auto_backup_stats["last_error"] = str(e)
+                    logger.error(f"❌ Erro no backup automático: {e}")
+            else:
+                logger.warning("⚠️ Servidor não encontrado para backup automático")
+            
+            self.auto_backup_stats["next_run_at"] = (datetime.now() + timedelta(seconds=interval_seconds)).isoformat()
+            await asyncio.sleep(interval_seconds)
+    
+    async def create_scheduled_backup(self, guild: discord.Guild):
+        """Cria um backup automático apenas se a estrutura mudou desde o último"""
+        stats = self.auto_backup_stats
+        loop = asyncio.get_running_loop()
+        stats["runs"] += 1
+        stats["last_run_at"] = datetime.now().isoformat()
+        
+        started = time.perf_counter()
+        backup_data = await self._collect_backup_data(guild)
+        stats["last_snapshot_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        
+        if self.last_structure_hash is None:
+            self.last_structure_hash = await loop.run_in_executor(None, self._read_latest_auto_hash)
+        
+        structure_hash = backup_data["backup_info"]["structure_hash"]
+        if structure_hash == self.last_structure_hash:
+            stats["skipped_unchanged"] += 1
+            logger.info("💾 Backup automático ignorado: estrutura sem alterações")
+            return False, None
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"{AUTO_BACKUP_PREFIX}{guild.id}_{timestamp}.json"
+        filepath = os.path.join(self.backup_folder, filename)
+        
+        started = time.perf_counter()
+        size = await loop.run_in_executor(None, self._write_backup_file, filepath, backup_data)
+        stats["last_write_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        stats["last_size_bytes"] = size
+        stats["last_filename"] = filename
+        stats["written"] += 1
+        self.last_structure_hash = structure_hash
+        
+        retention = stats["retention"]
+        started = time.perf_counter()
+        removed, total_size, file_count = await loop.run_in_executor(
+            None, self.prune_auto_backups,
+            retention["hourly"], retention["daily"], retention["weekly"]
+        )
+        stats["last_prune_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        stats["pruned"] += removed
+        stats["total_size_bytes"] = total_size
+        stats["file_count"] = file_count
+        
+        logger.info(f"💾 Backup automático criado: {filename} ({size} bytes, {removed} antigo(s) removido(s))")
+        return True, filename
+    
+    def _list_auto_backups(self):
+        """Lista backups automáticos como (datetime, caminho), do mais novo ao mais antigo"""
+        entries = []
+        for filename in os.listdir(self.backup_folder):
+            if not filename.startswith(AUTO_BACKUP_PREFIX):
+                continue
+            match = BACKUP_TIMESTAMP_REGEX.search(filename)
+            if not match:
+                continue
+            try:
+                created = datetime.strptime(match.group(1), "%Y%m%d_%H%M%S")
+            except ValueError:
+                continue
+            entries.append((created, os.path.join(self.backup_folder, filename)))
+        entries.sort(reverse=True)
+        return entries
+    
+    def _read_latest_auto_hash(self):
+        """Lê o hash estrutural do backup automático mais recente (após reinícios)"""
+        for _, filepath in self._list_auto_backups():
+            try:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    return json.load(f)["backup_info"].get("structure_hash")
+            except Exception:
+                continue
+        return None
+    
+    def prune_auto_backups(self, keep_hourly: int, keep_daily: int, keep_weekly: int):
+        """
+        Aplica a política de retenção nos backups automáticos.
+        Mantém o mais recente de cada uma das últimas N horas, M dias e K semanas.
+        Retorna (removidos, tamanho_total_bytes, quantidade_restante).
+        """
+        entries = self._list_auto_backups()
+        keep = set()
+        
+        buckets = (
+            (keep_hourly, lambda d: d.strftime("%Y%m%d%H")),
+            (keep_daily, lambda d: d.strftime("%Y%m%d")),
+            (keep_weekly, lambda d: d.isocalendar()[:2]),
+        )
+        for limit, bucket_key in buckets:
+            seen = set()
+            for created, filepath in entries:
+                if len(seen) >= limit:
+                    break
+                key = bucket_key(created)
+                if key not in seen:
+                    seen.add(key)
+                    keep.add(filepath)
+        
+        removed = 0
+        total_size = 0
+        for _, filepath in entries:
+            if filepath in keep:
+                try:
+                    total_size += os.path.getsize(filepath)
+                except OSError:
+                    pass
+                continue
+            try:
+                os.remove(filepath)
+                removed += 1
+            except OSError as e:
+                logger.warning(f"⚠️ Não foi possível remover backup antigo {filepath}: {e}")
+        
+        return removed, total_size, len(keep)
+    
+    def get_auto_backup_status(self):
+        """Retorna métricas do backup automático para o painel"""
+        status = dict(self.auto_backup_stats)
+        status["running"] = bool(self.auto_backup_task and not self.auto_backup_task.done())
+        status["last_structure_hash"] = self.last_structure_hash
+        return status
+    
     async def _backup_roles(self, guild: discord.Guild):
         """Faz backup dos cargos"""
         roles_data = []
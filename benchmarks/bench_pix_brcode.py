@@ -0,0 +1,49 @@
+"""
+Benchmark do BR Code PIX
+Mede a montagem do copia e cola (com CRC16) e a renderização do QR Code, fria e em cache.
+
+Uso: python benchmarks/bench_pix_brcode.py
+"""
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pix_brcode import build_payload, crc16, qr_available, render_qr_png  # noqa: E402
+
+KEY = "loja@example.com"
+NAME = "Loja de Contas"
+CITY = "São Paulo"
+NUMBER = 20_000
+
+
+def per_call_us(func, number=NUMBER) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1_000_000
+
+
+def main():
+    payload = build_payload(KEY, NAME, CITY, 49.9, "a1b2c3d4", "Compra: Conta Level 150")
+    print(f"payload: {payload}")
+    print(f"crc16 do payload:       {per_call_us(lambda: crc16(payload.encode('utf-8'))):8.2f} µs")
+    print(f"build_payload completo: {per_call_us(lambda: build_payload(KEY, NAME, CITY, 49.9, 'a1b2c3d4', 'Compra: Conta')):8.2f} µs")
+
+    if not qr_available():
+        print("qrcode não instalado: renderização do QR ignorada")
+        return
+
+    render_qr_png.cache_clear()
+    samples = []
+    for index in range(20):
+        txid = f"bench{index}"
+        start = time.perf_counter()
+        render_qr_png(KEY, 49.9, txid, build_payload(KEY, NAME, CITY, 49.9, txid))
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    print(f"QR PNG (sem cache):     {samples[len(samples) // 2]:8.2f} ms (mediana)")
+    print(f"QR PNG (em cache):      {per_call_us(lambda: render_qr_png(KEY, 49.9, 'bench0', build_payload(KEY, NAME, CITY, 49.9, 'bench0'))):8.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark dos índices do PixManager
+Mede get_pending_payments/get_user_payments com histórico crescente de pagamentos
+(o número de pendentes fica fixo) e compara com a varredura completa antiga.
+
+Uso: python benchmarks/bench_pix_indexes.py
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pix_manager import PixManager  # noqa: E402
+
+HISTORY_SIZES = (1_000, 10_000, 100_000)
+PENDING = 50
+USERS = 2_000
+REPEAT = 200
+
+
+def build_manager(history: int) -> PixManager:
+    # Pasta nova a cada tamanho: o PixManager lê payments.json do diretório atual
+    os.chdir(tempfile.mkdtemp(prefix="bench_pix_"))
+    manager = PixManager()
+    manager.warm_up()
+    manager.update_config("bench@example.com", "BENCH", "SAO PAULO")
+    for index in range(history):
+        payment_id = f"{index:08x}"
+        manager.payments[payment_id] = {
+            "payment_id": payment_id,
+            "user_id": str(index % USERS),
+            "account_id": str(index),
+            "account_title": "Conta",
+            "amount": 10.0,
+            "pix_key": "bench@example.com",
+            "status": "confirmed",
+            "created_at": "2025-01-01T00:00:00",
+            "confirmed_at": None,
+            "confirmed_by": None
+        }
+    manager._rebuild_indexes()
+    for index in range(PENDING):
+        manager.create_payment(str(index % USERS), "acc", 10.0, "Conta")
+    return manager
+
+
+def per_call_us(func) -> float:
+    return min(timeit.repeat(func, number=REPEAT, repeat=5)) / REPEAT * 1_000_000
+
+
+def main():
+    print(f"{'histórico':>10} | {'pendentes (índice)':>18} | {'pendentes (varredura)':>21} | {'por usuário (índice)':>20}")
+    for history in HISTORY_SIZES:
+        manager = build_manager(history)
+        assert len(manager.get_pending_payments()) == PENDING
+
+        indexed = per_call_us(manager.get_pending_payments)
+        scan = per_call_us(lambda: [p for p in manager.payments.values() if p["status"] == "pending"])
+        by_user = per_call_us(lambda: manager.get_user_payments("7"))
+        print(f"{history:>10} | {indexed:>15.1f} µs | {scan:>18.1f} µs | {by_user:>17.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,53 @@
+# Cronometra as importações desde a primeira linha (relatório em /api/startup)
+from startup_profile import startup_profile
+startup_profile.install_import_timer()
+
 import discord
 from discord.ext import commands
 from discord.ui import Button, View, Modal, TextInput
 from config import (
     BOT_TOKEN, TICKET_CHANNEL_ID, TICKET_CATEGORY_ID, LOG_CHANNEL_ID, 
-    STAFF_ROLE_IDS, GUILD_ID, BOT_PREFIX, COLORS
+    STAFF_ROLE_IDS, GUILD_ID, BOT_PREFIX, COLORS,
+    AUTO_BACKUP_INTERVAL_MINUTES, AUTO_BACKUP_KEEP_HOURLY, AUTO_BACKUP_KEEP_DAILY, AUTO_BACKUP_KEEP_WEEKLY,
+    PANEL_LOG_SPILL_SEGMENTS, PANEL_LOG_SPILL_SEGMENT_KB, LOG_LEVEL, LOG_SAMPLING,
+    WATCHDOG_LAG_THRESHOLD_MS, TICKET_POOL_MIN_SIZE, TICKET_POOL_MAX_SIZE,
+    TRANSCRIPTS_FOLDER, PANEL_PUBLIC_URL, TRANSCRIPT_LINK_TTL_HOURS,
+    PIX_PAYMENT_TTL_MINUTES, PIX_ARCHIVE_AFTER_DAYS, PIX_SCHEDULER_INTERVAL_MINUTES,
+    STARTUP_TARGET_SECONDS, COMMAND_SYNC_GUILD_ONLY,
+    channel_config, CONFIG_WATCH_INTERVAL_SECONDS
 )
 from ticket_manager import TicketManager
 from backup_manager import BackupManager
-from loja_builder import LojaBuilder
+from loja_builder import LojaBuilder, DEFAULT_TEMPLATE, list_shop_templates
 from pix_manager import PixManager
-from api_auth import require_api_token
+from log_dispatcher import LogDispatcher
+from log_store import LogStore
+from logging_setup import setup_logging
+from metrics import (
+    registry as metrics_registry, observe_handler, instrument_discord_http,
+    HANDLER_LATENCY, HANDLER_ERRORS, HTTP_REQUEST_SECONDS
+)
+from loop_watchdog import LoopWatchdog
+from tracing import tracer
+from job_tracker import job_tracker
+from ticket_pool import TicketChannelPool
+from transcript_exporter import TranscriptExporter
+from payment_scheduler import PaymentScheduler
+from pix_brcode import render_qr_png
+from command_sync import CommandSyncManager
+from channel_resolver import channel_resolver
+from api_auth import require_api_token, require_signed_url_or_api_token, sign_path
 import logging
 import asyncio
+import io
 import json
+import hashlib
 from datetime import datetime, timedelta
 from collections import deque, defaultdict
 import sys
 import time
 import re
+import math
 
 # Keep-alive e painel web integrado
 from flask import Flask, jsonify, request, send_from_directory
@@ -28,12 +58,41 @@ import os
 app = Flask(__name__)
 bot_instance = None
 
+
+@app.before_request
+def _start_request_timer():
+    request.environ['ibot.started_at'] = time.perf_counter()
+
+
+@app.after_request
+def _observe_request(response):
+    started_at = request.environ.get('ibot.started_at')
+    if started_at is not None:
+        # Usa o padrão da rota (ex.: /api/tickets/<ticket_id>) para não criar uma série por ID
+        route = request.url_rule.rule if request.url_rule else 'nao_encontrada'
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started_at,
+            method=request.method, route=route, status=response.status_code
+        )
+    return response
+
 # Importar e registrar rotas de moderação
 from moderation_api import register_moderation_routes
 
 ACCOUNTS_FILE = 'accounts.json'
 
 
+def _apply_channel_config(snapshot, version):
+    """Mantém as constantes de canais do módulo alinhadas ao channel_config (auto-detecção ou edição do arquivo)"""
+    global TICKET_CHANNEL_ID, TICKET_CATEGORY_ID, LOG_CHANNEL_ID
+    TICKET_CHANNEL_ID = snapshot.get('ticket_channel_id', 0)
+    TICKET_CATEGORY_ID = snapshot.get('ticket_category_id', 0)
+    LOG_CHANNEL_ID = snapshot.get('log_channel_id', 0)
+    logger.info(f"🔄 Configuração de canais atualizada (versão {version})")
+
+channel_config.subscribe(_apply_channel_config)
+
+
 def _read_accounts_file():
     if not os.path.exists(ACCOUNTS_FILE):
         return []
@@ -107,6 +166,131 @@ def _find_account(accounts, target_id):
     return None
 
 
+# Pagamentos nesses estados não seguram mais a conta (confirmados continuam segurando, mesmo arquivados)
+_RELEASED_PAYMENT_STATUSES = ('expired', 'cancelled')
+
+# Reserva anterior de cada pagamento criado na compra (payment_id -> (reserved_payment_id, reserved_at)),
+# restaurada se o ticket não for criado
+_previous_reservations = {}
+
+
+def _reservation_status(account):
+    """Status do pagamento que reserva a conta, procurando também no arquivo (None se desconhecido)"""
+    payment_id = str(account.get('reserved_payment_id'))
+    payment = pix_manager.get_payment(payment_id)
+    if payment:
+        return payment['status']
+    return pix_manager.get_archived_status(payment_id)
+
+
+def _reservation_is_released(account):
+    status = _reservation_status(account)
+    return status is None or status in _RELEASED_PAYMENT_STATUSES
+
+
+def _find_open_ticket(user_id):
+    """ID do ticket aberto do usuário (None se não tiver)"""
+    for ticket_id, ticket_info in ticket_manager.tickets.items():
+        if ticket_info["user_id"] == str(user_id) and ticket_info["status"] == "open":
+            return ticket_id
+    return None
+
+
+def _parse_price(price_str):
+    """Converte o preço exibido (ex.: "R$ 49,90") em float"""
+    price_clean = re.sub(r'[^\d,.]', '', str(price_str or '0'))
+    return float(price_clean.replace(',', '.'))
+
+
+def _reservation_error(account, user_id):
+    """Mensagem de erro se a conta está presa a um pagamento ativo ou confirmado (None se livre)"""
+    if not account or not account.get('reserved_payment_id') or _reservation_is_released(account):
+        return None
+    payment = pix_manager.get_payment(str(account['reserved_payment_id']))
+    if payment is None or payment['status'] == 'confirmed':
+        return "Esta conta já foi vendida."
+    if payment['user_id'] != str(user_id):
+        return "Esta conta está reservada para outro comprador. Tente novamente mais tarde."
+    # Mesmo comprador: o pagamento pendente continua valendo, não cria outro
+    return (f"Você já tem um pagamento pendente para esta conta (`{payment['payment_id']}`). "
+            "Conclua o pagamento ou aguarde ele expirar.")
+
+
+def _reserve_account_for_purchase(account_id, account_data, user_id):
+    """
+    Verifica e reserva a conta em um único passo síncrono (sem await entre a verificação e a
+    gravação, então dois cliques simultâneos não passam os dois). Com o PIX configurado, cria o
+    pagamento e grava a reserva. Retorna (pagamento ou None, mensagem de erro ou None).
+    """
+    # Ticket aberto: create_ticket_channel recusaria depois, então nem cria o pagamento
+    if _find_open_ticket(user_id):
+        return None, "Você já possui um ticket aberto! Finalize-o antes de iniciar outra compra."
+    accounts = _read_accounts_file()
+    account = _find_account(accounts, account_id)
+    error = _reservation_error(account, user_id)
+    if error:
+        return None, error
+    if not account_data or not pix_manager.is_configured():
+        return None, None
+    
+    try:
+        amount = _parse_price(account_data.get('price'))
+    except ValueError:
+        logger.error(f"Preço inválido na conta {account_id}: {account_data.get('price')!r}")
+        return None, None
+    payment_data, message = pix_manager.create_payment(
+        str(user_id), str(account_data.get('id')), amount, account_data.get('title', 'Conta')
+    )
+    if not payment_data:
+        logger.error(f"Erro ao criar pagamento para a conta {account_id}: {message}")
+        return None, None
+    
+    # Segura a conta até o pagamento ser confirmado, cancelado ou expirar
+    if account:
+        _previous_reservations[payment_data['payment_id']] = (
+            account.get('reserved_payment_id'), account.get('reserved_at')
+        )
+        account['reserved_payment_id'] = payment_data['payment_id']
+        account['reserved_at'] = datetime.now().isoformat()
+        _write_accounts_file(accounts)
+    return payment_data, None
+
+
+def _rollback_purchase_reservation(payment_data):
+    """Desfaz a reserva quando o ticket ou o envio do pagamento falha (restaura a reserva anterior da conta)"""
+    if not payment_data:
+        return
+    payment_id = payment_data['payment_id']
+    pix_manager.cancel_payment(payment_id)
+    previous_id, previous_at = _previous_reservations.pop(payment_id, (None, None))
+    
+    accounts = _read_accounts_file()
+    account = _find_account(accounts, payment_data.get('account_id'))
+    if account and account.get('reserved_payment_id') == payment_id:
+        if previous_id:
+            account['reserved_payment_id'] = previous_id
+            account['reserved_at'] = previous_at
+        else:
+            account.pop('reserved_payment_id', None)
+            account.pop('reserved_at', None)
+        _write_accounts_file(accounts)
+    logger.info(f"↩️ Reserva desfeita: pagamento {payment_id} cancelado")
+
+
+def _release_account_reservations():
+    """Libera as contas cujos pagamentos expiraram ou foram cancelados; retorna quantas liberou"""
+    accounts = _read_accounts_file()
+    released = 0
+    for account in accounts:
+        if account.get('reserved_payment_id') and _reservation_is_released(account):
+            account.pop('reserved_payment_id', None)
+            account.pop('reserved_at', None)
+            released += 1
+    if released:
+        _write_accounts_file(accounts)
+    return released
+
+
 def _generate_account_id(accounts):
     numeric_values = []
     for account in accounts:
@@ -209,9 +393,7 @@ def _announce_account(account_data):
 
     async def _post():
         try:
-            from config import load_channel_ids
-            config = load_channel_ids()
-            accounts_channel_id = config.get('accounts_channel_id', 0)
+            accounts_channel_id = channel_resolver.get('accounts_channel_id')
 
             if accounts_channel_id == 0:
                 return False, "Canal de contas não configurado", None
@@ -386,6 +568,46 @@ def get_pending_payments():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/pix/scheduler', methods=['GET'])
+@require_api_token
+def get_payment_scheduler_status():
+    """Retorna o estado da expiração/arquivamento de pagamentos"""
+    return jsonify({'success': True, 'scheduler': payment_scheduler.get_status()})
+
+@app.route('/api/startup', methods=['GET'])
+@require_api_token
+def get_startup_profile():
+    """Tempo até o on_ready, etapas da inicialização e importações mais lentas"""
+    top = request.args.get('top', 15, type=int)
+    return jsonify({'success': True, 'startup': startup_profile.get_report(STARTUP_TARGET_SECONDS, top=top)})
+
+@app.route('/api/channels/resolver', methods=['GET'])
+@require_api_token
+def get_channel_resolver_status():
+    """IDs de canais em memória e índice de detecção por nome"""
+    return jsonify({'success': True, 'channels': channel_resolver.get_status()})
+
+@app.route('/api/commands/sync', methods=['GET'])
+@require_api_token
+def get_command_sync_status():
+    """Resultado da última verificação de sincronização dos comandos slash"""
+    return jsonify({'success': True, 'sync': command_sync.get_status()})
+
+@app.route('/api/commands/sync', methods=['POST'])
+@require_api_token
+def force_command_sync():
+    """Força a sincronização dos comandos slash"""
+    if not bot_instance or not bot_instance.is_ready():
+        return jsonify({'success': False, 'error': 'Bot não está conectado'}), 503
+    try:
+        future = asyncio.run_coroutine_threadsafe(
+            command_sync.sync(bot.application_id, GUILD_ID if COMMAND_SYNC_GUILD_ONLY else 0, force=True),
+            bot.loop
+        )
+        return jsonify({'success': True, 'sync': future.result(timeout=30)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/pix/payment/<payment_id>/confirm', methods=['POST'])
 @require_api_token
 def confirm_payment(payment_id):
@@ -446,24 +668,12 @@ def send_announcement():
         
         async def post_announcement():
             try:
-                # Recarregar configuração em tempo real
-                import json
-                channel_id = 0
-                
-                if os.path.exists('channel_config.json'):
-                    with open('channel_config.json', 'r', encoding='utf-8') as f:
-                        config = json.load(f)
-                        channel_id = config.get('announcements_channel_id', 0)
-                
-                # Se não encontrou no JSON, buscar por nome
-                if channel_id == 0:
-                    for guild in bot_instance.guilds:
-                        for ch in guild.text_channels:
-                            if 'anúncio' in ch.name.lower() or 'anuncio' in ch.name.lower():
-                                channel_id = ch.id
-                                break
-                        if channel_id != 0:
-                            break
+                # Configuração em memória; sem ela, o índice de nomes (em cache) de cada servidor
+                channel_id = channel_resolver.get('announcements_channel_id')
+                for guild in bot_instance.guilds:
+                    if channel_id != 0:
+                        break
+                    channel_id = channel_resolver.get('announcements_channel_id', guild)
                 
                 if channel_id == 0:
                     return False, "Canal de anúncios não encontrado. Use !nova_loja para criar estrutura automaticamente."
@@ -500,31 +710,32 @@ def send_announcement():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-# Configuração de logging
-logging.basicConfig(level=logging.INFO)
+# Configuração de logging (feita mais abaixo, junto com o handler do painel)
 logger = logging.getLogger(__name__)
+# Loggers de caminhos quentes: podem ser amostrados via LOG_SAMPLING
+stats_logger = logging.getLogger("ibot.stats")
+member_logger = logging.getLogger("ibot.members")
 
 LOG_BUFFER_LIMIT = 500
-log_buffer = deque(maxlen=LOG_BUFFER_LIMIT)
+log_store = LogStore(
+    capacity=LOG_BUFFER_LIMIT,
+    spill_folder="logs",
+    spill_segments=PANEL_LOG_SPILL_SEGMENTS,
+    spill_segment_kb=PANEL_LOG_SPILL_SEGMENT_KB
+)
 
 class PanelLogHandler(logging.Handler):
-    """Armazena logs em memória para o painel"""
-
-    def __init__(self):
-        super().__init__()
-        self.setFormatter(logging.Formatter('%(asctime)s %(levelname)s - %(message)s', '%Y-%m-%d %H:%M:%S'))
+    """Armazena logs estruturados em memória para o painel"""
 
     def emit(self, record: logging.LogRecord):
         try:
-            log_buffer.append({
-                "level": record.levelname,
-                "message": self.format(record)
-            })
+            log_store.append(record)
         except Exception:
             pass
 
 panel_log_handler = PanelLogHandler()
-logging.getLogger().addHandler(panel_log_handler)
+# Quem loga só enfileira; stdout e painel rodam na thread do QueueListener
+setup_logging(extra_handlers=[panel_log_handler], level=LOG_LEVEL, sampling=LOG_SAMPLING)
 
 # Intents necessários
 intents = discord.Intents.default()
@@ -537,6 +748,27 @@ ticket_manager = TicketManager(bot)
 backup_manager = BackupManager()
 loja_builder = LojaBuilder(bot)
 pix_manager = PixManager()
+# Logs do canal de logs são enfileirados e enviados em lote (o canal pode mudar na auto-detecção)
+log_dispatcher = LogDispatcher(bot, lambda: channel_config.get("log_channel_id"))
+# Conta chamadas REST e 429 por rota
+instrument_discord_http(bot)
+# Canais de ticket pré-criados (a categoria pode mudar na auto-detecção)
+ticket_pool = TicketChannelPool(
+    bot, GUILD_ID, lambda: channel_config.get("ticket_category_id"),
+    min_size=TICKET_POOL_MIN_SIZE, max_size=TICKET_POOL_MAX_SIZE
+)
+# Comandos slash só são sincronizados quando a árvore muda
+command_sync = CommandSyncManager(bot.tree)
+# Histórico dos tickets salvo em disco antes da exclusão do canal
+transcript_exporter = TranscriptExporter(TRANSCRIPTS_FOLDER)
+# Expira pagamentos PIX sem pagamento, libera as contas e arquiva os encerrados
+payment_scheduler = PaymentScheduler(
+    pix_manager, PIX_PAYMENT_TTL_MINUTES, PIX_ARCHIVE_AFTER_DAYS, PIX_SCHEDULER_INTERVAL_MINUTES,
+    release_reservations=_release_account_reservations,
+    report=lambda summary: report_payment_maintenance(summary)
+)
+# Mede o atraso do event loop e captura a pilha de quem o bloqueia
+loop_watchdog = LoopWatchdog(threshold_seconds=WATCHDOG_LAG_THRESHOLD_MS / 1000)
 
 # ==================== SATORU SECURITY ====================
 
@@ -838,7 +1070,7 @@ class SatoruSecurity:
         if not guild:
             return
 
-        log_channel = guild.get_channel(LOG_CHANNEL_ID)
+        log_channel = guild.get_channel(channel_config.get("log_channel_id"))
         if not log_channel:
             return
 
@@ -848,10 +1080,7 @@ class SatoruSecurity:
             color=color,
             timestamp=discord.utils.utcnow()
         )
-        try:
-            await log_channel.send(embed=embed)
-        except Exception:
-            pass
+        log_dispatcher.submit(embed, log_channel.id)
 
     def _build_status_embed(self, guild: discord.Guild, message: str) -> discord.Embed:
         embed = discord.Embed(
@@ -889,11 +1118,26 @@ class SatoruSecurity:
 
 satoru_security = SatoruSecurity(bot)
 
+metrics_registry.gauge(
+    "ibot_gateway_latency_seconds", "Latência do gateway do Discord (heartbeat)",
+    function=lambda: bot.latency if math.isfinite(bot.latency) else None
+)
+metrics_registry.gauge(
+    "ibot_satoru_tracked_items", "Itens mantidos em memória pelo Satoru", ("tracker",),
+    function=lambda: {
+        ("join_events",): len(satoru_security.join_events),
+        ("message_users",): len(satoru_security.message_events),
+        ("message_events",): sum(len(events) for events in list(satoru_security.message_events.values())),
+        ("link_users",): len(satoru_security.link_events),
+        ("suspect_scores",): len(satoru_security.suspect_scores),
+        ("cooldown_channels",): len(satoru_security.cooldown_channels)
+    }
+)
+
 # ==================== AUTO-DETECÇÃO DE CANAIS ====================
 
 async def auto_detect_channels():
     """Auto-detecta canais importantes se não estiverem configurados"""
-    import json
     from config import GUILD_ID
     
     guild = bot.get_guild(GUILD_ID)
@@ -901,73 +1145,25 @@ async def auto_detect_channels():
         logger.warning("⚠️ Servidor não encontrado para auto-detecção")
         return
     
-    # Verificar se já existe configuração válida
-    try:
-        if os.path.exists('channel_config.json'):
-            with open('channel_config.json', 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                if config.get('ticket_channel_id', 0) > 0:
-                    logger.info("✅ Canais já configurados via channel_config.json")
-                    return
-    except Exception as e:
-        logger.warning(f"⚠️ Erro ao verificar channel_config.json: {e}")
+    # Verificar se já existe configuração válida (em memória, carregada do channel_config.json)
+    if channel_resolver.ids['ticket_channel_id'] > 0:
+        logger.info("✅ Canais já configurados via channel_config.json")
+        return
     
-    # Auto-detectar por nome
+    # Auto-detectar por nome (uma passada pelos canais, resultado em cache)
     logger.info("🔍 Auto-detectando canais por nome...")
-    
-    config = {
-        "ticket_channel_id": 0,
-        "ticket_category_id": 0,
-        "log_channel_id": 0,
-        "announcements_channel_id": 0,
-        "accounts_channel_id": 0,
-        "welcome_channel_id": 0
-    }
-    
-    # Buscar canais
-    for channel in guild.text_channels:
-        name = channel.name.lower()
-        if 'ticket' in name and config['ticket_channel_id'] == 0:
-            config['ticket_channel_id'] = channel.id
-            logger.info(f"✅ Canal de tickets detectado: #{channel.name} ({channel.id})")
-        elif 'anúncio' in name or 'anuncio' in name and config['announcements_channel_id'] == 0:
-            config['announcements_channel_id'] = channel.id
-            logger.info(f"✅ Canal de anúncios detectado: #{channel.name} ({channel.id})")
-        elif 'conta' in name and config['accounts_channel_id'] == 0:
-            config['accounts_channel_id'] = channel.id
-            logger.info(f"✅ Canal de contas detectado: #{channel.name} ({channel.id})")
-        elif 'log' in name and config['log_channel_id'] == 0:
-            config['log_channel_id'] = channel.id
-            logger.info(f"✅ Canal de logs detectado: #{channel.name} ({channel.id})")
-        elif ('boas-vinda' in name or 'bem-vindo' in name or 'welcome' in name) and config['welcome_channel_id'] == 0:
-            config['welcome_channel_id'] = channel.id
-            logger.info(f"✅ Canal de boas-vindas detectado: #{channel.name} ({channel.id})")
-    
-    # Buscar categoria de atendimento
-    for category in guild.categories:
-        if 'atendimento' in category.name.lower() and config['ticket_category_id'] == 0:
-            config['ticket_category_id'] = category.id
-            logger.info(f"✅ Categoria de tickets detectada: {category.name} ({category.id})")
-            break
+    config = channel_resolver.detect(guild)
+    for role, channel_id in config.items():
+        if channel_id:
+            logger.info(f"✅ {role} detectado: #{guild.get_channel(channel_id)} ({channel_id})")
     
     # Salvar configuração detectada
     if any(v > 0 for v in config.values()):
         try:
-            with open('channel_config.json', 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+            # Os assinantes do channel_config atualizam os IDs em memória
+            channel_resolver.update(config)
             logger.info("✅ Configuração de canais salva automaticamente")
             
-            # Recarregar config
-            from config import load_channel_ids
-            global TICKET_CHANNEL_ID, TICKET_CATEGORY_ID, LOG_CHANNEL_ID, ANNOUNCEMENTS_CHANNEL_ID, ACCOUNTS_CHANNEL_ID, WELCOME_CHANNEL_ID
-            _config = load_channel_ids()
-            TICKET_CHANNEL_ID = _config.get('ticket_channel_id', 0)
-            TICKET_CATEGORY_ID = _config.get('ticket_category_id', 0)
-            LOG_CHANNEL_ID = _config.get('log_channel_id', 0)
-            ANNOUNCEMENTS_CHANNEL_ID = _config.get('announcements_channel_id', 0)
-            ACCOUNTS_CHANNEL_ID = _config.get('accounts_channel_id', 0)
-            WELCOME_CHANNEL_ID = _config.get('welcome_channel_id', 0)
-            
         except Exception as e:
             logger.error(f"❌ Erro ao salvar configuração detectada: {e}")
     else:
@@ -1008,6 +1204,72 @@ class CloseTicketModal(discord.ui.Modal, title="Fechar Ticket"):
 
 # ==================== VIEWS (Botões) ====================
 
+# Views com estado que continuam funcionando após reinícios: chave -> classe com from_state()
+PERSISTENT_VIEWS = {}
+
+
+class StatefulButton(discord.ui.DynamicItem[discord.ui.Button],
+                     template=r'ibot:(?P<view>[a-z]+):(?P<action>[a-z_]+):(?P<state>.+)'):
+    """
+    Botão persistente: o custom_id carrega a view, a ação e o estado (IDs de ticket, conta ou
+    pagamento). A cada clique a view é reconstruída pelo estado e o método da ação é chamado.
+    """
+    
+    def __init__(self, view_key: str, action: str, state: str, **button_kwargs):
+        super().__init__(discord.ui.Button(custom_id=f"ibot:{view_key}:{action}:{state}", **button_kwargs))
+        self.view_key = view_key
+        self.action = action
+        self.state = state
+    
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match['view'], match['action'], match['state'])
+    
+    async def callback(self, interaction: discord.Interaction):
+        view_class = PERSISTENT_VIEWS.get(self.view_key)
+        if view_class is None or self.action not in view_class.ACTIONS:
+            return
+        view = view_class.from_state(self.state)
+        if view is None:
+            # Estado que não existe mais (ex.: pagamento arquivado)
+            await interaction.response.send_message(
+                embed=discord.Embed(
+                    title="❌ Não encontrado",
+                    description=view_class.NOT_FOUND_MESSAGE,
+                    color=COLORS["error"]
+                ),
+                ephemeral=True
+            )
+            return
+        await getattr(view, self.action)(interaction, self.item)
+
+
+class StatefulView(discord.ui.View):
+    """Base das views persistentes com estado (botões declarados em BUTTONS)"""
+    
+    VIEW_KEY = None
+    # (ação, argumentos do botão); a ação é o nome do método chamado no clique
+    BUTTONS = ()
+    # Resposta quando from_state retorna None
+    NOT_FOUND_MESSAGE = "Este painel não está mais disponível."
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.ACTIONS = frozenset(action for action, _ in cls.BUTTONS)
+        if cls.VIEW_KEY:
+            PERSISTENT_VIEWS[cls.VIEW_KEY] = cls
+    
+    def __init__(self, state: str):
+        super().__init__(timeout=None)
+        for action, button_kwargs in self.BUTTONS:
+            self.add_item(StatefulButton(self.VIEW_KEY, action, state, **button_kwargs))
+    
+    @classmethod
+    def from_state(cls, state: str):
+        """Reconstrói a view pelo estado do custom_id (None se o estado não existe mais)"""
+        raise NotImplementedError
+
+
 class ConfirmPaymentModal(discord.ui.Modal, title="Confirmar Pagamento"):
     """Modal para confirmar pagamento PIX"""
     
@@ -1071,16 +1333,30 @@ class ConfirmPaymentModal(discord.ui.Modal, title="Confirmar Pagamento"):
                 ephemeral=True
             )
 
-class PixPaymentView(discord.ui.View):
+class PixPaymentView(StatefulView):
     """View para pagamento PIX com botões para cliente e staff"""
     
+    VIEW_KEY = "pix"
+    NOT_FOUND_MESSAGE = "Pagamento não encontrado."
+    BUTTONS = (
+        ("payment_done", dict(label="✅ Já Paguei", style=discord.ButtonStyle.green, emoji="💳", row=0)),
+        ("confirm_payment_staff", dict(label="✅ Confirmar Pagamento", style=discord.ButtonStyle.blurple, emoji="🔐", row=0)),
+        ("cancel_payment", dict(label="❌ Cancelar", style=discord.ButtonStyle.red, row=1)),
+    )
+    
     def __init__(self, payment_id: str, pix_key: str, amount: float):
-        super().__init__(timeout=None)
+        super().__init__(payment_id)
         self.payment_id = payment_id
         self.pix_key = pix_key
         self.amount = amount
     
-    @discord.ui.button(label="✅ Já Paguei", style=discord.ButtonStyle.green, emoji="💳", row=0)
+    @classmethod
+    def from_state(cls, state: str):
+        payment = pix_manager.get_payment(state)
+        if payment is None:
+            return None
+        return cls(state, payment['pix_key'], payment['amount'])
+    
     async def payment_done(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Botão para cliente notificar staff que pagou"""
         guild = bot.get_guild(GUILD_ID)
@@ -1111,7 +1387,6 @@ class PixPaymentView(discord.ui.View):
             ephemeral=True
         )
     
-    @discord.ui.button(label="✅ Confirmar Pagamento", style=discord.ButtonStyle.blurple, emoji="🔐", row=0)
     async def confirm_payment_staff(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Botão para STAFF confirmar pagamento - Abre modal"""
         guild = bot.get_guild(GUILD_ID)
@@ -1148,7 +1423,6 @@ class PixPaymentView(discord.ui.View):
         modal.payment_id_input.default = self.payment_id
         await interaction.response.send_modal(modal)
     
-    @discord.ui.button(label="❌ Cancelar", style=discord.ButtonStyle.red, row=1)
     async def cancel_payment(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Botão para cancelar pagamento"""
         success, message = pix_manager.cancel_payment(self.payment_id)
@@ -1327,9 +1601,7 @@ class AddAccountModal(Modal):
                 json.dump(accounts, f, ensure_ascii=False, indent=2)
             
             # Postar no canal de contas
-            from config import load_channel_ids
-            config = load_channel_ids()
-            accounts_channel_id = config.get('accounts_channel_id', 0)
+            accounts_channel_id = channel_resolver.get('accounts_channel_id')
             
             if accounts_channel_id == 0:
                 await interaction.response.send_message(
@@ -1383,15 +1655,25 @@ class AddAccountModal(Modal):
                 ephemeral=True
             )
 
-class BuyAccountView(discord.ui.View):
+class BuyAccountView(StatefulView):
     """View com botão de compra de conta"""
     
+    VIEW_KEY = "buy"
+    BUTTONS = (
+        ("buy_account", dict(label="Comprar Conta", style=discord.ButtonStyle.green, emoji="🛒")),
+    )
+    
     def __init__(self, account_id: str, account_data: dict = None):
-        super().__init__(timeout=None)
+        super().__init__(str(account_id))
         self.account_id = account_id
         self.account_data = account_data
     
-    @discord.ui.button(label="Comprar Conta", style=discord.ButtonStyle.green, emoji="🛒")
+    @classmethod
+    def from_state(cls, state: str):
+        # Dados atuais da conta (título e preço podem ter mudado desde o anúncio)
+        return cls(state, _find_account(_read_accounts_file(), state))
+    
+    @observe_handler("buy_account")
     async def buy_account(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Botão para comprar conta - abre ticket com pagamento PIX"""
         
@@ -1407,39 +1689,96 @@ class BuyAccountView(discord.ui.View):
             )
             return
         
-        try:
-            # Cria ticket automaticamente para compra com tipo 'purchase'
-            channel, result_msg = await create_ticket_channel(
-                guild, 
-                interaction.user, 
-                f"Compra de conta: {self.account_data.get('title', self.account_id) if self.account_data else self.account_id}",
-                ticket_type="purchase",
-                account_data=self.account_data
+        if not self.account_data:
+            await interaction.response.send_message(
+                embed=discord.Embed(
+                    title="❌ Conta indisponível",
+                    description="Esta conta não está mais à venda.",
+                    color=COLORS["error"]
+                ),
+                ephemeral=True
             )
-            
-            if channel:
-                # Envia mensagem efêmera para o usuário
-                await interaction.response.send_message(
-                    embed=discord.Embed(
-                        title="✅ Ticket de Compra Criado",
-                        description=f"Seu ticket para compra da conta foi criado com sucesso!\n\nAcesse: {channel.mention}\n\nO pagamento via PIX foi gerado automaticamente no ticket.",
-                        color=COLORS["success"]
-                    ),
-                    ephemeral=True
-                )
-            else:
-                await interaction.response.send_message(
-                    embed=discord.Embed(
-                        title="❌ Erro",
-                        description=result_msg,
-                        color=COLORS["error"]
-                    ),
-                    ephemeral=True
+            return
+        
+        # Criação roda em segundo plano; o clique só é confirmado (evita estourar os 3s da interação)
+        job = job_tracker.spawn(
+            "buy_account",
+            lambda job: self._purchase_job(interaction, guild),
+            key=("ticket", interaction.user.id)
+        )
+        if job is None:
+            await interaction.response.send_message(
+                embed=discord.Embed(
+                    title="⏳ Aguarde",
+                    description="Seu ticket já está sendo criado!",
+                    color=COLORS["warning"]
+                ),
+                ephemeral=True
+            )
+    
+    async def _purchase_job(self, interaction: discord.Interaction, guild: discord.Guild):
+        """Cria o ticket de compra e responde via follow-up"""
+        # Verificação e reserva antes de qualquer await
+        payment_data, reserved_error = _reserve_account_for_purchase(
+            self.account_id, self.account_data, interaction.user.id
+        )
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        
+        if reserved_error:
+            await interaction.followup.send(
+                embed=discord.Embed(
+                    title="⏳ Compra não iniciada",
+                    description=reserved_error,
+                    color=COLORS["warning"]
+                ),
+                ephemeral=True
+            )
+            return
+        
+        channel = None
+        try:
+            with tracer.trace("purchase", user_id=str(interaction.user.id), account_id=str(self.account_id)):
+                # Cria ticket automaticamente para compra com tipo 'purchase'
+                channel, result_msg = await create_ticket_channel(
+                    guild, 
+                    interaction.user, 
+                    f"Compra de conta: {self.account_data.get('title', self.account_id) if self.account_data else self.account_id}",
+                    ticket_type="purchase",
+                    account_data=self.account_data,
+                    payment_data=payment_data
                 )
+                
+                if not channel:
+                    _rollback_purchase_reservation(payment_data)
+                elif payment_data:
+                    _previous_reservations.pop(payment_data['payment_id'], None)
+                
+                with tracer.span("responder_interacao", "discord"):
+                    if channel:
+                        # Envia mensagem efêmera para o usuário
+                        await interaction.followup.send(
+                            embed=discord.Embed(
+                                title="✅ Ticket de Compra Criado",
+                                description=f"Seu ticket para compra da conta foi criado com sucesso!\n\nAcesse: {channel.mention}\n\nO pagamento via PIX foi gerado automaticamente no ticket.",
+                                color=COLORS["success"]
+                            ),
+                            ephemeral=True
+                        )
+                    else:
+                        await interaction.followup.send(
+                            embed=discord.Embed(
+                                title="❌ Erro",
+                                description=result_msg,
+                                color=COLORS["error"]
+                            ),
+                            ephemeral=True
+                        )
         
         except Exception as e:
             logger.error(f"Erro ao criar ticket de compra: {e}")
-            await interaction.response.send_message(
+            if not channel:
+                _rollback_purchase_reservation(payment_data)
+            await interaction.followup.send(
                 embed=discord.Embed(
                     title="❌ Erro",
                     description=f"Erro ao criar ticket: {str(e)}",
@@ -1456,7 +1795,8 @@ class TicketCreateView(discord.ui.View):
         super().__init__(timeout=None)
         self.bot = bot
     
-    @discord.ui.button(label="Abrir Ticket", style=discord.ButtonStyle.green, emoji="🎫")
+    @discord.ui.button(label="Abrir Ticket", style=discord.ButtonStyle.green, emoji="🎫", custom_id="ibot:ticket:create")
+    @observe_handler("create_ticket")
     async def create_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Botão para criar um novo ticket"""
         
@@ -1473,13 +1813,34 @@ class TicketCreateView(discord.ui.View):
             )
             return
         
+        # Criação roda em segundo plano; cliques repetidos do mesmo usuário são recusados
+        job = job_tracker.spawn(
+            "create_ticket",
+            lambda job: self._create_ticket_job(interaction, guild),
+            key=("ticket", interaction.user.id)
+        )
+        if job is None:
+            await interaction.response.send_message(
+                embed=discord.Embed(
+                    title="⏳ Aguarde",
+                    description="Seu ticket já está sendo criado!",
+                    color=COLORS["warning"]
+                ),
+                ephemeral=True
+            )
+    
+    async def _create_ticket_job(self, interaction: discord.Interaction, guild: discord.Guild):
+        """Cria o ticket de suporte e responde via follow-up"""
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        
         try:
             # Usa a função unificada para criar o ticket
-            channel, result_msg = await create_ticket_channel(guild, interaction.user, "Criado via botão Discord")
+            with tracer.trace("ticket", user_id=str(interaction.user.id)):
+                channel, result_msg = await create_ticket_channel(guild, interaction.user, "Criado via botão Discord")
             
             if channel:
                 # Envia mensagem efêmera para o usuário
-                await interaction.response.send_message(
+                await interaction.followup.send(
                     embed=discord.Embed(
                         title="✅ Ticket Criado",
                         description=f"Seu ticket foi criado com sucesso!\n\nAcesse: {channel.mention}",
@@ -1488,7 +1849,7 @@ class TicketCreateView(discord.ui.View):
                     ephemeral=True
                 )
             else:
-                await interaction.response.send_message(
+                await interaction.followup.send(
                     embed=discord.Embed(
                         title="❌ Erro",
                         description=result_msg,
@@ -1499,7 +1860,7 @@ class TicketCreateView(discord.ui.View):
         
         except Exception as e:
             logger.error(f"Erro ao criar ticket: {e}")
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 embed=discord.Embed(
                     title="❌ Erro",
                     description=f"Erro ao criar ticket: {str(e)}",
@@ -1509,17 +1870,35 @@ class TicketCreateView(discord.ui.View):
             )
 
 
-class TicketPanelView(discord.ui.View):
+class TicketPanelView(StatefulView):
     """View com painel completo de controle do ticket"""
     
+    VIEW_KEY = "tp"
+    BUTTONS = (
+        ("notify_staff", dict(label="Notificar Equipe", style=discord.ButtonStyle.primary, emoji="🔔", row=0)),
+        ("add_member", dict(label="Adicionar Membro", style=discord.ButtonStyle.secondary, emoji="➕", row=0)),
+        ("create_voice", dict(label="Criar Call", style=discord.ButtonStyle.secondary, emoji="🎤", row=0)),
+        ("close_ticket", dict(label="Fechar Ticket", style=discord.ButtonStyle.red, emoji="🔒", row=1)),
+    )
+    
     def __init__(self, bot, ticket_id: str, user_id: int):
-        super().__init__(timeout=None)
+        super().__init__(f"{ticket_id}:{user_id}")
         self.bot = bot
         self.ticket_id = ticket_id
         self.user_id = user_id
-        self.voice_channel = None
     
-    @discord.ui.button(label="Notificar Equipe", style=discord.ButtonStyle.primary, emoji="🔔", row=0)
+    @classmethod
+    def from_state(cls, state: str):
+        ticket_id, user_id = state.rsplit(":", 1)
+        return cls(bot, ticket_id, int(user_id))
+    
+    @property
+    def voice_channel(self):
+        """Canal de voz do ticket (ID salvo no ticket, vale entre cliques e reinícios)"""
+        ticket_info = ticket_manager.get_ticket(self.ticket_id) or {}
+        voice_channel_id = ticket_info.get("voice_channel_id")
+        return self.bot.get_channel(voice_channel_id) if voice_channel_id else None
+    
     async def notify_staff(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Botão para notificar a equipe - qualquer pessoa no ticket pode usar"""
         
@@ -1570,7 +1949,6 @@ class TicketPanelView(discord.ui.View):
             embed=embed
         )
     
-    @discord.ui.button(label="Adicionar Membro", style=discord.ButtonStyle.secondary, emoji="➕", row=0)
     async def add_member(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Botão para adicionar membro - apenas staff"""
         
@@ -1671,7 +2049,6 @@ class TicketPanelView(discord.ui.View):
                 ephemeral=True
             )
     
-    @discord.ui.button(label="Criar Call", style=discord.ButtonStyle.secondary, emoji="🎤", row=0)
     async def create_voice(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Botão para criar canal de voz - apenas staff"""
         
@@ -1720,7 +2097,7 @@ class TicketPanelView(discord.ui.View):
         
         try:
             # Obtém a categoria
-            category = guild.get_channel(TICKET_CATEGORY_ID)
+            category = guild.get_channel(channel_config.get("ticket_category_id"))
             
             # Obtém todos os membros que têm acesso ao canal de texto
             overwrites = interaction.channel.overwrites
@@ -1735,7 +2112,7 @@ class TicketPanelView(discord.ui.View):
                 overwrites=overwrites
             )
             
-            self.voice_channel = voice_channel
+            ticket_manager.set_ticket_voice_channel(self.ticket_id, voice_channel.id)
             
             embed = discord.Embed(
                 title="✅ Canal de Voz Criado",
@@ -1756,7 +2133,6 @@ class TicketPanelView(discord.ui.View):
                 ephemeral=True
             )
     
-    @discord.ui.button(label="Fechar Ticket", style=discord.ButtonStyle.red, emoji="🔒", row=1)
     async def close_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Botão para fechar um ticket - abre modal para solicitar motivo"""
         
@@ -1795,6 +2171,7 @@ class TicketPanelView(discord.ui.View):
         modal = CloseTicketModal(self)
         await interaction.response.send_modal(modal)
     
+    @observe_handler("process_close")
     async def process_close(self, interaction: discord.Interaction, reason: str):
         """Processa o fechamento do ticket após receber o motivo"""
         guild = self.bot.get_guild(GUILD_ID)
@@ -1836,28 +2213,45 @@ class TicketPanelView(discord.ui.View):
         
         await interaction.response.send_message(embed=embed_closed)
         
-        # Envia log detalhado para o canal de logs
-        await send_detailed_log(
-            ticket_number=ticket_number,
-            ticket_creator=ticket_creator,
-            closed_by=interaction.user,
-            created_at=created_at,
-            channel=interaction.channel,
-            reason=reason
-        )
+        # Salva o histórico do canal antes de apagá-lo
+        transcript_job = start_transcript_export(interaction.channel, self.ticket_id)
+        if transcript_job is None:
+            logger.warning(f"⚠️ Ticket {self.ticket_id} já está sendo encerrado")
+            return
         
         logger.info(f"Ticket {self.ticket_id} fechado por {interaction.user} ({interaction.user.id}) - Motivo: {reason}")
         
         # Aviso de exclusão do canal
         delete_embed = discord.Embed(
             title="⚠️ Canais serão excluídos",
-            description="Os canais deste ticket serão excluídos em **10 segundos**.",
+            description="Os canais deste ticket serão excluídos em **10 segundos** (após salvar a transcrição).",
             color=COLORS["warning"]
         )
         await interaction.channel.send(embed=delete_embed)
         
-        # Aguarda 10 segundos e deleta os canais
-        await asyncio.sleep(10)
+        # Aguarda os 10 segundos e a transcrição
+        transcript = await wait_transcript(transcript_job, min_wait=10)
+        
+        # Envia log detalhado para o canal de logs
+        await send_detailed_log(
+            ticket_number=ticket_number,
+            ticket_creator=ticket_creator,
+            closed_by=interaction.user,
+            created_at=created_at,
+            channel=interaction.channel,
+            reason=reason,
+            transcript=transcript
+        )
+        
+        if transcript is None:
+            # Sem transcrição o canal é o único registro da conversa
+            await interaction.channel.send(embed=discord.Embed(
+                title="❌ Transcrição não salva",
+                description="Não foi possível salvar a transcrição, por isso o canal foi mantido. Apague-o manualmente.",
+                color=COLORS["error"]
+            ))
+            return
+        
         try:
             # Deleta o canal de voz se existir
             if self.voice_channel:
@@ -1873,7 +2267,8 @@ class TicketPanelView(discord.ui.View):
 
 # ==================== FUNÇÕES AUXILIARES ====================
 
-async def create_ticket_channel(guild, user, reason="Ticket criado via painel", ticket_type="support", account_data=None):
+async def create_ticket_channel(guild, user, reason="Ticket criado via painel", ticket_type="support", account_data=None,
+                                payment_data=None):
     """Função independente para criar um canal de ticket
     
     Args:
@@ -1882,27 +2277,32 @@ async def create_ticket_channel(guild, user, reason="Ticket criado via painel",
         reason: Motivo do ticket
         ticket_type: Tipo do ticket ('support' ou 'purchase')
         account_data: Dados da conta (para tickets de compra)
+        payment_data: Pagamento já criado com a conta reservada (_reserve_account_for_purchase);
+            se o ticket não for criado, o pagamento é cancelado e a reserva desfeita
     """
     try:
         # Verifica se o usuário já tem um ticket aberto
         user_id = user.id
-        for ticket_id, ticket_info in ticket_manager.tickets.items():
-            if ticket_info["user_id"] == str(user_id) and ticket_info["status"] == "open":
+        with tracer.span("verificar_ticket_aberto", "code"):
+            if _find_open_ticket(user_id):
                 return None, f"Usuário {user.display_name} já possui um ticket aberto!"
         
         # Cria o ticket no manager com tipo
-        ticket_data = ticket_manager.create_ticket(str(user_id), reason)
+        with tracer.span("create_ticket", "disk"):
+            ticket_data = ticket_manager.create_ticket(str(user_id), reason)
         if not ticket_data:
             return None, "Erro ao criar ticket no sistema"
         
         # Adiciona tipo do ticket
         ticket_number = ticket_data.get('number')
+        tracer.annotate(ticket_number=ticket_number)
         ticket_id = f"ticket_{ticket_number}"
         ticket_manager.tickets[ticket_id]["ticket_type"] = ticket_type
         if account_data:
             ticket_manager.tickets[ticket_id]["account_id"] = account_data.get('id')
             ticket_manager.tickets[ticket_id]["account_title"] = account_data.get('title')
-        ticket_manager.save_tickets()
+        with tracer.span("save_tickets", "disk"):
+            ticket_manager.save_tickets()
             
         ticket_number = ticket_data.get('number')
         
@@ -1911,7 +2311,7 @@ async def create_ticket_channel(guild, user, reason="Ticket criado via painel",
         staff_roles = [role for role in staff_roles if role is not None]
         
         # Obtém a categoria onde os tickets devem ser criados
-        category = guild.get_channel(TICKET_CATEGORY_ID)
+        category = guild.get_channel(channel_config.get("ticket_category_id"))
         if not category:
             return None, "Categoria de tickets não encontrada!"
         
@@ -1949,17 +2349,28 @@ async def create_ticket_channel(guild, user, reason="Ticket criado via painel",
                 embed_links=True
             )
         
-        # Cria o canal
-        channel = await guild.create_text_channel(
-            name=f"ticket-{ticket_number}",
-            overwrites=overwrites,
-            category=category,
-            topic=f"Ticket #{ticket_number} - Aberto por {user.mention}"
-        )
+        # Usa um canal pré-criado do pool (uma edição) ou cria o canal
+        channel_name = f"ticket-{ticket_number}"
+        channel_topic = f"Ticket #{ticket_number} - Aberto por {user.mention}"
+        # Mede só o caminho até o canal existir (edição do pool ou criação), sem as gravações em disco
+        started_at = time.perf_counter()
+        with tracer.span("claim_pool", "discord"):
+            channel = await ticket_pool.claim(channel_name, channel_topic, overwrites)
+        pooled = channel is not None
+        if not pooled:
+            with tracer.span("create_text_channel", "discord"):
+                channel = await guild.create_text_channel(
+                    name=channel_name,
+                    overwrites=overwrites,
+                    category=category,
+                    topic=channel_topic
+                )
+        ticket_pool.record_time_to_channel(time.perf_counter() - started_at, pooled)
         
         # Atualiza o ticket com o channel ID
         ticket_id = f"ticket_{ticket_number}"
-        ticket_manager.set_ticket_channel(ticket_id, channel.id)
+        with tracer.span("set_ticket_channel", "disk"):
+            ticket_manager.set_ticket_channel(ticket_id, channel.id)
         
         # Envia mensagem no canal do ticket
         if ticket_type == "purchase":
@@ -1980,51 +2391,49 @@ async def create_ticket_channel(guild, user, reason="Ticket criado via painel",
         embed_ticket.add_field(name="Motivo", value=reason, inline=False)
         embed_ticket.set_footer(text=f"Ticket ID: {ticket_id}")
         
-        await channel.send(embed=embed_ticket, view=TicketPanelView(bot, ticket_id, user.id))
+        with tracer.span("enviar_embed_ticket", "discord"):
+            await channel.send(embed=embed_ticket, view=TicketPanelView(bot, ticket_id, user.id))
         
-        # Se for ticket de compra, adiciona PIX automaticamente
-        if ticket_type == "purchase" and account_data and pix_manager.is_configured():
+        # Se for ticket de compra, envia o PIX do pagamento criado junto com a reserva da conta
+        if ticket_type == "purchase" and payment_data:
             try:
-                # Extrai preço da conta
-                price_str = account_data.get('price', '0')
-                import re
-                price_clean = re.sub(r'[^\d,.]', '', price_str)
-                price_clean = price_clean.replace(',', '.')
-                amount = float(price_clean)
-                
-                # Cria pagamento
-                payment_data, message = pix_manager.create_payment(
-                    str(user.id),
-                    str(account_data.get('id')),
-                    amount,
-                    account_data.get('title', 'Conta')
+                amount = payment_data['amount']
+                # Envia instruções de pagamento PIX
+                pix_embed = discord.Embed(
+                    title="💳 Pagamento via PIX",
+                    description="Siga as instruções abaixo para realizar o pagamento:",
+                    color=0x00ff00,
+                    timestamp=discord.utils.utcnow()
                 )
+                pix_embed.add_field(name="💰 Valor", value=f"**R$ {amount:.2f}**", inline=True)
+                pix_embed.add_field(name="🆔 ID do Pagamento", value=f"`{payment_data['payment_id']}`", inline=True)
+                pix_embed.add_field(name="📱 PIX Copia e Cola", value=f"```{payment_data['brcode']}```", inline=False)
+                pix_embed.add_field(
+                    name="📋 Como pagar",
+                    value="1️⃣ Escaneie o QR Code ou copie o código acima\n2️⃣ Abra seu app bancário\n3️⃣ Vá em PIX → Pagar → Copia e Cola\n4️⃣ Confira o valor (já preenchido) e pague\n5️⃣ Clique em **'✅ Já Paguei'** abaixo",
+                    inline=False
+                )
+                pix_embed.set_footer(text="⚠️ Após o pagamento, a equipe verificará e liberará sua conta")
                 
-                if payment_data:
-                    # Envia instruções de pagamento PIX
-                    pix_embed = discord.Embed(
-                        title="💳 Pagamento via PIX",
-                        description="Siga as instruções abaixo para realizar o pagamento:",
-                        color=0x00ff00,
-                        timestamp=discord.utils.utcnow()
-                    )
-                    pix_embed.add_field(name="💰 Valor", value=f"**R$ {amount:.2f}**", inline=True)
-                    pix_embed.add_field(name="🆔 ID do Pagamento", value=f"`{payment_data['payment_id']}`", inline=True)
-                    pix_embed.add_field(name="📱 Chave PIX (Copia e Cola)", value=f"```{payment_data['pix_key']}```", inline=False)
-                    pix_embed.add_field(
-                        name="📋 Como pagar",
-                        value="1️⃣ Copie a chave PIX acima\n2️⃣ Abra seu app bancário\n3️⃣ Vá em PIX → Pagar\n4️⃣ Cole a chave\n5️⃣ Confira o valor e pague\n6️⃣ Clique em **'✅ Já Paguei'** abaixo",
-                        inline=False
+                # QR Code renderizado fora do event loop (em cache por chave/valor/txid)
+                with tracer.span("render_qr", "code"):
+                    qr_png = await asyncio.to_thread(
+                        render_qr_png, payment_data['pix_key'], amount, payment_data['payment_id'], payment_data['brcode']
                     )
-                    pix_embed.set_footer(text="⚠️ Após o pagamento, a equipe verificará e liberará sua conta")
-                    
-                    # View com botões de pagamento
-                    pix_view = PixPaymentView(payment_data['payment_id'], payment_data['pix_key'], amount)
-                    await channel.send(embed=pix_embed, view=pix_view)
-                    
-                    logger.info(f"💳 Pagamento PIX criado automaticamente no ticket #{ticket_number}: {payment_data['payment_id']} - R$ {amount:.2f}")
+                send_kwargs = {}
+                if qr_png:
+                    send_kwargs['file'] = discord.File(io.BytesIO(qr_png), filename="pix_qrcode.png")
+                    pix_embed.set_image(url="attachment://pix_qrcode.png")
+                
+                # View com botões de pagamento
+                pix_view = PixPaymentView(payment_data['payment_id'], payment_data['pix_key'], amount)
+                with tracer.span("enviar_embed_pix", "discord"):
+                    await channel.send(embed=pix_embed, view=pix_view, **send_kwargs)
+                
+                logger.info(f"💳 Pagamento PIX criado automaticamente no ticket #{ticket_number}: {payment_data['payment_id']} - R$ {amount:.2f}")
             except Exception as e:
                 logger.error(f"Erro ao criar PIX no ticket: {e}")
+                _rollback_purchase_reservation(payment_data)
                 await channel.send(
                     embed=discord.Embed(
                         title="⚠️ Aviso",
@@ -2035,13 +2444,15 @@ async def create_ticket_channel(guild, user, reason="Ticket criado via painel",
         
         # Envia log
         ticket_type_label = "🛒 Compra" if ticket_type == "purchase" else "🎫 Suporte"
-        await send_log(
-            f"✅ Novo ticket criado ({ticket_type_label})",
-            f"**Ticket:** #{ticket_number}\n**Tipo:** {ticket_type_label}\n**Usuário:** {user.mention}\n**Canal:** {channel.mention}\n**Motivo:** {reason}",
-            COLORS["success"]
-        )
+        with tracer.span("send_log", "code"):
+            await send_log(
+                f"✅ Novo ticket criado ({ticket_type_label})",
+                f"**Ticket:** #{ticket_number}\n**Tipo:** {ticket_type_label}\n**Usuário:** {user.mention}\n**Canal:** {channel.mention}\n**Motivo:** {reason}",
+                COLORS["success"]
+            )
         
-        logger.info(f"{ticket_type_label} Ticket #{ticket_number} criado para {user.display_name} - Canal: {channel.name}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"{ticket_type_label} Ticket #{ticket_number} criado para {user.display_name} - Canal: {channel.name}")
         
         return channel, f"Ticket #{ticket_number} criado com sucesso!"
         
@@ -2052,7 +2463,7 @@ async def create_ticket_channel(guild, user, reason="Ticket criado via painel",
 async def send_log(title: str, description: str, color: int):
     """Envia um log para o canal de logs"""
     try:
-        log_channel = bot.get_channel(LOG_CHANNEL_ID)
+        log_channel = bot.get_channel(channel_config.get("log_channel_id"))
         if log_channel:
             embed = discord.Embed(
                 title=title,
@@ -2060,15 +2471,56 @@ async def send_log(title: str, description: str, color: int):
                 color=color
             )
             embed.set_footer(text=f"Data/Hora: {discord.utils.utcnow().strftime('%d/%m/%Y %H:%M:%S')}")
-            await log_channel.send(embed=embed)
+            log_dispatcher.submit(embed, log_channel.id)
     except Exception as e:
         logger.error(f"Erro ao enviar log: {e}")
 
 
-async def send_detailed_log(ticket_number: int, ticket_creator, closed_by, created_at: str, channel, reason: str):
+async def report_payment_maintenance(summary: dict):
+    """Envia um único log com o resultado da manutenção de pagamentos"""
+    expired = summary["expired"]
+    lines = [
+        f"**Expirados:** {len(expired)}",
+        f"**Contas liberadas:** {summary['released']}",
+        f"**Arquivados:** {summary['archived']}"
+    ]
+    if expired:
+        listed = [f"`{p['payment_id']}` - {p['account_title']} (R$ {p['amount']:.2f})" for p in expired[:10]]
+        if len(expired) > 10:
+            listed.append(f"... e mais {len(expired) - 10}")
+        lines.append("\n" + "\n".join(listed))
+    await send_log("💳 Manutenção de pagamentos", "\n".join(lines), COLORS["info"])
+
+
+def start_transcript_export(channel, ticket_id: str):
+    """Agenda a exportação da transcrição do canal (None se já houver uma em andamento)"""
+    return job_tracker.spawn(
+        "transcript",
+        lambda job: transcript_exporter.export(channel, ticket_id, job),
+        key=("transcript", channel.id)
+    )
+
+
+async def wait_transcript(job, min_wait: float = 10):
+    """Aguarda o prazo mínimo e o fim da exportação; retorna o resumo ou None se ela falhou"""
+    # shield: se quem espera for cancelado, a exportação continua
+    await asyncio.gather(asyncio.sleep(min_wait), asyncio.shield(job.task), return_exceptions=True)
+    return job.result if job.status == "done" else None
+
+
+def transcript_url(filename: str) -> str:
+    """
+    Link assinado de download da transcrição: abre no navegador sem o token da API e expira em
+    TRANSCRIPT_LINK_TTL_HOURS (relativo se PANEL_PUBLIC_URL não estiver configurado)
+    """
+    return PANEL_PUBLIC_URL + sign_path(f"/api/transcripts/{filename}", TRANSCRIPT_LINK_TTL_HOURS * 3600)
+
+
+async def send_detailed_log(ticket_number: int, ticket_creator, closed_by, created_at: str, channel, reason: str,
+                            transcript: dict = None):
     """Envia um log detalhado do ticket fechado para o canal de logs"""
     try:
-        log_channel = bot.get_channel(LOG_CHANNEL_ID)
+        log_channel = bot.get_channel(channel_config.get("log_channel_id"))
         if log_channel:
             embed = discord.Embed(
                 title=f"🔒 Ticket #{ticket_number} Fechado",
@@ -2117,65 +2569,213 @@ async def send_detailed_log(ticket_number: int, ticket_creator, closed_by, creat
                 inline=False
             )
             
+            # Transcrição salva antes da exclusão
+            if transcript:
+                url = transcript_url(transcript['filename'])
+                # Link clicável só com endereço absoluto
+                link = f"[{transcript['filename']}]({url})" if PANEL_PUBLIC_URL else f"`{url}`"
+                transcript_value = f"{link}\n**Mensagens:** {transcript['messages']}"
+            else:
+                transcript_value = "❌ Não foi salva"
+            embed.add_field(name="📜 Transcrição", value=transcript_value, inline=False)
+            
             embed.set_footer(text=f"Ticket ID: ticket_{ticket_number}")
             embed.timestamp = discord.utils.utcnow()
             
-            await log_channel.send(embed=embed)
+            log_dispatcher.submit(embed, log_channel.id)
     except Exception as e:
         logger.error(f"Erro ao enviar log detalhado: {e}")
 
 
 # ==================== EVENTOS ====================
 
+# Referências das tarefas em segundo plano (o event loop guarda só referências fracas)
+_background_tasks = set()
+
+
+async def _warm_up(name, manager):
+    """Carrega os dados de um gerenciador fora do event loop"""
+    try:
+        with startup_profile.phase(f"warm_up:{name}"):
+            await asyncio.to_thread(manager.warm_up)
+    except Exception as e:
+        logger.error(f"❌ Erro ao carregar {name}: {e}")
+
+
+async def setup_hook():
+    """Roda uma vez por login (antes da conexão ao gateway): tudo que não depende do cache do servidor"""
+    startup_profile.mark("login")
+    from mod_panel import punishment_manager, ModPanelView
+    # Históricos grandes carregam em paralelo com a conexão; o primeiro acesso espera se ainda não terminou
+    for name, manager in (("punicoes", punishment_manager), ("pagamentos", pix_manager)):
+        task = asyncio.create_task(_warm_up(name, manager))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    
+    # Views persistentes: os botões dos painéis já enviados continuam funcionando após reinícios
+    bot.add_view(TicketCreateView(bot))
+    bot.add_view(ModPanelView())
+    # Painéis de ticket, anúncios de contas e pagamentos: o estado vem no custom_id
+    bot.add_dynamic_items(StatefulButton)
+    
+    try:
+        # Sincroniza comandos slash só se a árvore mudou (uma vez por login, não a cada reconexão)
+        with startup_profile.phase("tree_sync"):
+            await command_sync.sync(bot.application_id, GUILD_ID if COMMAND_SYNC_GUILD_ONLY else 0)
+    except Exception as e:
+        logger.error(f"Erro ao sincronizar comandos: {e}")
+
+bot.setup_hook = setup_hook
+
+
+TICKET_PANEL_STATE_FILE = 'ticket_panel.json'
+
+
+def build_ticket_panel():
+    """Embed e view do painel de abertura de tickets"""
+    embed = discord.Embed(
+        title="🎫 Sistema de Tickets",
+        description="Clique no botão abaixo para criar um novo ticket e abrir uma conversa com nossa equipe de suporte.",
+        color=COLORS["info"]
+    )
+    embed.add_field(
+        name="📋 Como funciona?",
+        value="1. Clique em 'Abrir Ticket'\n2. Um canal privado será criado\n3. Nossa equipe responderá em breve\n4. Quando resolvido, o ticket pode ser fechado",
+        inline=False
+    )
+    return embed, TicketCreateView(bot)
+
+
+def _panel_hash(embed: discord.Embed, view: discord.ui.View) -> str:
+    content = json.dumps({'embed': embed.to_dict(), 'components': view.to_components()}, sort_keys=True)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def _load_panel_state() -> dict:
+    try:
+        with open(TICKET_PANEL_STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_panel_state(state: dict):
+    tmp_file = TICKET_PANEL_STATE_FILE + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_file, TICKET_PANEL_STATE_FILE)
+
+
+async def ensure_ticket_panel(ticket_channel: discord.TextChannel):
+    """
+    Garante um único painel de tickets no canal.
+    Com o mesmo conteúdo (hash) a mensagem existente é mantida; se o conteúdo mudou ela é editada
+    no lugar. Só sem registro anterior (ou se a mensagem sumiu) as mensagens antigas do bot são
+    apagadas e um painel novo é enviado.
+    """
+    embed, view = build_ticket_panel()
+    content_hash = _panel_hash(embed, view)
+    state = _load_panel_state()
+    
+    if state.get('channel_id') == ticket_channel.id and state.get('message_id'):
+        message = ticket_channel.get_partial_message(state['message_id'])
+        try:
+            if state.get('hash') == content_hash:
+                # Uma leitura confirma que o painel ainda existe
+                await ticket_channel.fetch_message(state['message_id'])
+                logger.info("🎫 Painel de tickets inalterado, mensagem mantida")
+                return
+            await message.edit(embed=embed, view=view)
+            _save_panel_state({**state, 'hash': content_hash})
+            logger.info("🎫 Painel de tickets atualizado no lugar")
+            return
+        except discord.NotFound:
+            logger.info("🎫 Painel de tickets anterior não existe mais, enviando um novo")
+        except discord.HTTPException as e:
+            logger.error(f"Erro ao verificar painel de tickets: {e}")
+            return
+    
+    # Sem registro: remove painéis antigos do bot (comportamento anterior, agora só nesse caso)
+    try:
+        async for message in ticket_channel.history(limit=50):
+            if message.author == bot.user:
+                await message.delete()
+                logger.info(f"Mensagem antiga do bot deletada no canal de tickets")
+    except Exception as e:
+        logger.error(f"Erro ao deletar mensagens antigas: {e}")
+    
+    try:
+        message = await ticket_channel.send(embed=embed, view=view)
+        _save_panel_state({'channel_id': ticket_channel.id, 'message_id': message.id, 'hash': content_hash})
+        logger.info("Mensagem de ticket enviada com sucesso")
+    except Exception as e:
+        logger.error(f"Erro ao enviar mensagem de ticket: {e}")
+
+
+# Loop em que a inicialização completa já rodou (bot.run cria um loop novo a cada reinício)
+_initialized_loop = None
+
+
 @bot.event
 async def on_ready():
-    """Evento disparado quando o bot está pronto"""
-    global bot_instance
+    """Evento disparado quando o bot está pronto (também após cada reconexão ao gateway)"""
+    global bot_instance, _initialized_loop
     bot_instance = bot  # Define bot_instance para uso na API
+    
+    loop = asyncio.get_running_loop()
+    if _initialized_loop is loop:
+        # Reconexão: tarefas, views e painel continuam valendo, nenhuma chamada REST necessária
+        logger.info(f"🔄 Reconectado ao gateway como {bot.user}")
+        return
+    _initialized_loop = loop
     logger.info(f"Bot conectado como {bot.user}")
     
-    # Auto-detectar canais ao iniciar
+    # Watchdog do event loop (idempotente em reconexões)
+    loop_watchdog.start()
+    startup_profile.mark("gateway")
+    
+    # Auto-detectar canais ao iniciar (depende do cache do servidor, por isso fica fora do setup_hook)
     await auto_detect_channels()
     
-    try:
-        # Sincroniza comandos slash
-        await bot.tree.sync()
-        logger.info("Comandos sincronizados!")
-    except Exception as e:
-        logger.error(f"Erro ao sincronizar comandos: {e}")
+    # Backup automático em segundo plano (não duplica a tarefa em reconexões)
+    backup_manager.start_auto_backup(
+        bot,
+        GUILD_ID,
+        AUTO_BACKUP_INTERVAL_MINUTES,
+        keep_hourly=AUTO_BACKUP_KEEP_HOURLY,
+        keep_daily=AUTO_BACKUP_KEEP_DAILY,
+        keep_weekly=AUTO_BACKUP_KEEP_WEEKLY
+    )
     
-    # Tenta enviar a mensagem inicial no canal de tickets
+    # Pool de canais de ticket (só se TICKET_POOL_MAX_SIZE > 0)
+    ticket_pool.start()
+    
+    # Expiração e arquivamento de pagamentos PIX
+    payment_scheduler.start()
+    
+    # Painel de tickets (mantido se já estiver publicado e igual)
     guild = bot.get_guild(GUILD_ID)
     if guild:
-        ticket_channel = guild.get_channel(TICKET_CHANNEL_ID)
+        ticket_channel = guild.get_channel(channel_config.get("ticket_channel_id"))
         if ticket_channel:
-            # Deleta todas as mensagens antigas do bot no canal de tickets
-            try:
-                async for message in ticket_channel.history(limit=50):
-                    if message.author == bot.user:
-                        await message.delete()
-                        logger.info(f"Mensagem antiga do bot deletada no canal de tickets")
-            except Exception as e:
-                logger.error(f"Erro ao deletar mensagens antigas: {e}")
-            
-            # Cria a mensagem de boas-vindas
-            embed = discord.Embed(
-                title="🎫 Sistema de Tickets",
-                description="Clique no botão abaixo para criar um novo ticket e abrir uma conversa com nossa equipe de suporte.",
-                color=COLORS["info"]
-            )
-            embed.add_field(
-                name="📋 Como funciona?",
-                value="1. Clique em 'Abrir Ticket'\n2. Um canal privado será criado\n3. Nossa equipe responderá em breve\n4. Quando resolvido, o ticket pode ser fechado",
-                inline=False
-            )
-            
-            view = TicketCreateView(bot)
-            try:
-                await ticket_channel.send(embed=embed, view=view)
-                logger.info("Mensagem de ticket enviada com sucesso")
-            except Exception as e:
-                logger.error(f"Erro ao enviar mensagem de ticket: {e}")
+            await ensure_ticket_panel(ticket_channel)
+    
+    # Relatório de inicialização (só no primeiro on_ready do processo)
+    startup_profile.ready(STARTUP_TARGET_SECONDS)
+
+@bot.event
+async def on_guild_channel_create(channel):
+    channel_resolver.invalidate(channel)
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    # Só o nome (ou o tipo) muda o resultado da detecção
+    if before.name != after.name or type(before) is not type(after):
+        channel_resolver.invalidate(after)
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    channel_resolver.invalidate(channel, deleted=True)
 
 @bot.event
 async def on_member_join(member: discord.Member):
@@ -2185,16 +2785,16 @@ async def on_member_join(member: discord.Member):
             return
         
         # Buscar canal de boas-vindas
-        from config import WELCOME_CHANNEL_ID
+        welcome_channel_id = channel_config.get("welcome_channel_id")
         
-        if WELCOME_CHANNEL_ID == 0:
+        if welcome_channel_id == 0:
             logger.warning("Canal de boas-vindas não configurado")
             return
         
-        welcome_channel = member.guild.get_channel(WELCOME_CHANNEL_ID)
+        welcome_channel = member.guild.get_channel(welcome_channel_id)
         
         if not welcome_channel:
-            logger.warning(f"Canal de boas-vindas {WELCOME_CHANNEL_ID} não encontrado")
+            logger.warning(f"Canal de boas-vindas {welcome_channel_id} não encontrado")
             return
         
         # Criar embed de boas-vindas
@@ -2228,7 +2828,8 @@ async def on_member_join(member: discord.Member):
         embed.set_footer(text=f"Agora somos {member.guild.member_count} membros!")
         
         await welcome_channel.send(embed=embed)
-        logger.info(f"Boas-vindas enviadas para {member.name}")
+        if member_logger.isEnabledFor(logging.INFO):
+            member_logger.info(f"Boas-vindas enviadas para {member.name}")
         
     except Exception as e:
         logger.error(f"Erro ao enviar boas-vindas: {e}")
@@ -2255,6 +2856,21 @@ async def on_message(message: discord.Message):
     await bot.process_commands(message)
 
 
+@bot.before_invoke
+async def _start_command_timer(ctx):
+    ctx.metrics_started_at = time.perf_counter()
+
+
+@bot.after_invoke
+async def _observe_command(ctx):
+    started_at = getattr(ctx, 'metrics_started_at', None)
+    if started_at is None or ctx.command is None:
+        return
+    HANDLER_LATENCY.observe(time.perf_counter() - started_at, kind="command", handler=ctx.command.name)
+    if ctx.command_failed:
+        HANDLER_ERRORS.inc(kind="command", handler=ctx.command.name)
+
+
 # ==================== COMANDOS ====================
 
 @bot.command(name="satoru_ativar")
@@ -3339,9 +3955,32 @@ async def criar_nova_loja(ctx, confirmar: str = None):
     )
     progress_msg = await ctx.send(embed=progress_embed)
     
+    # Atualiza o progresso no máximo a cada 3 segundos para não gastar chamadas REST
+    last_progress_edit = {"at": 0.0, "disabled": False}
+    
+    async def report_progress(completed, total, label):
+        now = time.monotonic()
+        if last_progress_edit["disabled"]:
+            return
+        if completed < total and now - last_progress_edit["at"] < 3:
+            return
+        last_progress_edit["at"] = now
+        percent = int(completed / total * 100) if total else 100
+        try:
+            await progress_msg.edit(
+                embed=discord.Embed(
+                    title="🏗️ Criando Nova Loja Profissional...",
+                    description=f"**Progresso:** {completed}/{total} operações ({percent}%)\n**Última etapa:** {label}\n\n**⚠️ NÃO INTERROMPA O PROCESSO!**",
+                    color=0xffa500
+                )
+            )
+        except discord.NotFound:
+            # O canal do comando pode ter sido removido na limpeza
+            last_progress_edit["disabled"] = True
+    
     try:
         # Criar a loja
-        results = await loja_builder.create_professional_shop(ctx.guild)
+        results = await loja_builder.create_professional_shop(ctx.guild, progress_callback=report_progress)
         
         # Atualizar com sucesso
         if results['success']:
@@ -3354,6 +3993,7 @@ async def criar_nova_loja(ctx, confirmar: str = None):
                 📂 Categorias criadas: {results['created']['categories']}
                 📝 Canais criados: {results['created']['channels']}
                 📧 Mensagens/painéis: {results['created']['messages']}
+                ⏱️ Tempo total: {results['elapsed_seconds']}s
                 
                 **📋 Estrutura criada:**
                 
@@ -3454,6 +4094,67 @@ async def criar_nova_loja(ctx, confirmar: str = None):
         logger.error(f"Erro fatal ao criar loja: {e}")
 
 
+@bot.command(name="sincronizar_loja")
+@commands.has_permissions(administrator=True)
+async def sincronizar_loja(ctx, opcao: str = None, template: str = DEFAULT_TEMPLATE):
+    """Sincroniza a estrutura do servidor com o template da loja sem apagar tudo"""
+    
+    if template not in list_shop_templates():
+        await ctx.send(f"❌ Template `{template}` não encontrado. Disponíveis: {', '.join(list_shop_templates()) or 'nenhum'}")
+        return
+    
+    delete_extras = opcao == "remover_extras"
+    
+    progress_msg = await ctx.send(embed=discord.Embed(
+        title="🔁 Sincronizando Loja...",
+        description=f"Comparando o servidor com o template `{template}`...",
+        color=0xffa500
+    ))
+    
+    async def show(embed):
+        # A mensagem de progresso pode ter sumido (apagada por alguém durante a sincronização)
+        try:
+            await progress_msg.edit(embed=embed)
+        except discord.HTTPException as e:
+            logger.warning(f"⚠️ Não foi possível atualizar o progresso da sincronização: {e}")
+    
+    try:
+        results = await loja_builder.reconcile_shop(
+            ctx.guild, template_name=template, delete_extras=delete_extras, protected_ids={ctx.channel.id}
+        )
+        
+        embed = discord.Embed(
+            title="✅ Loja Sincronizada" if results['success'] else "❌ Erro ao Sincronizar Loja",
+            description=f"""
+            📂 Categorias: {results['created']['categories']} criada(s), {results['updated']['categories']} atualizada(s), {results['deleted']['categories']} removida(s)
+            📝 Canais: {results['created']['channels']} criado(s), {results['updated']['channels']} atualizado(s), {results['deleted']['channels']} removido(s)
+            ✔️ Sem alteração: {results['unchanged']}
+            📧 Painéis enviados: {results['created']['messages']}
+            ⏱️ Tempo total: {results['elapsed_seconds']}s ({results['rest_calls']} chamadas à API)
+            """,
+            color=0x00ff00 if results['success'] else 0xff0000,
+            timestamp=discord.utils.utcnow()
+        )
+        
+        if results['errors']:
+            error_list = "\n".join([f"• {err}" for err in results['errors'][:5]])
+            embed.add_field(name="⚠️ Avisos", value=error_list, inline=False)
+        
+        if not delete_extras:
+            embed.set_footer(text=f"Canais fora do template foram mantidos. Use {BOT_PREFIX}sincronizar_loja remover_extras para removê-los.")
+        
+        await show(embed)
+        logger.info(f"🔁 Loja sincronizada por {ctx.author} ({ctx.author.id}) com template {template}")
+        
+    except Exception as e:
+        await show(discord.Embed(
+            title="❌ Erro Fatal",
+            description=f"```{str(e)}```",
+            color=0xff0000
+        ))
+        logger.error(f"Erro fatal ao sincronizar loja: {e}")
+
+
 # ==================== SERVIR PAINEL WEB ====================
 
 @app.route('/painel')
@@ -3605,12 +4306,20 @@ def api_close_ticket(ticket_id):
             ticket_manager.close_ticket(ticket_id, reason, staff_id)
             logger.info(f"✅ Ticket #{ticket_id} fechado no gerenciador")
             
-            # Deleta após 10 segundos
-            await asyncio.sleep(10)
+            # Salva a transcrição e deleta após no mínimo 10 segundos
+            transcript_job = start_transcript_export(ticket_channel, ticket_id)
+            if transcript_job is None:
+                logger.warning(f"⚠️ Ticket #{ticket_id} já está sendo encerrado")
+                return
+            transcript = await wait_transcript(transcript_job, min_wait=10)
+            if transcript is None:
+                logger.error(f"❌ Transcrição do ticket #{ticket_id} falhou; canal mantido")
+                return
             await ticket_channel.delete(reason=f"Ticket fechado via painel: {reason}")
             logger.info(f"🗑️ Canal do ticket #{ticket_id} deletado")
         
-        asyncio.create_task(close_ticket())
+        # A rota roda na thread do Flask: agenda no loop do bot
+        asyncio.run_coroutine_threadsafe(close_ticket(), bot_instance.loop)
         
         return jsonify({'success': True, 'message': f'Ticket #{ticket_id} será fechado e deletado'}), 200
     except Exception as e:
@@ -3639,8 +4348,9 @@ def get_stats():
         # Força recarga dos tickets
         tickets = ticket_manager.get_all_tickets()
         
-        # Debug: log dos tickets encontrados
-        logger.info(f"📊 Estatísticas: {len(tickets)} tickets encontrados")
+        # Chamado a cada poll do painel: logger amostrado e sem montar a string se estiver desativado
+        if stats_logger.isEnabledFor(logging.INFO):
+            stats_logger.info(f"📊 Estatísticas: {len(tickets)} tickets encontrados")
         
         total = len(tickets)
         open_tickets = len([t for t in tickets if t.get('status') == 'open'])
@@ -3660,27 +4370,124 @@ def get_stats():
         logger.error(f"❌ Erro ao buscar estatísticas: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+@require_api_token
+def metrics_endpoint():
+    """Exporta métricas no formato de texto do Prometheus"""
+    return app.response_class(
+        metrics_registry.render(),
+        mimetype='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+@app.route('/api/traces/slowest', methods=['GET'])
+@require_api_token
+def get_slowest_traces():
+    """Retorna os traces mais lentos (waterfall das fases) entre os recentes"""
+    try:
+        limit = max(1, min(int(request.args.get('limit', '10')), 50))
+    except ValueError:
+        limit = 10
+    name = request.args.get('name') or None
+    return jsonify({'success': True, 'traces': tracer.slowest(name, limit)}), 200
+
+@app.route('/api/tickets/pool', methods=['GET'])
+@require_api_token
+def get_ticket_pool_status():
+    """Retorna o estado do pool de canais de ticket e a mediana do tempo até o canal"""
+    return jsonify({'success': True, 'pool': ticket_pool.get_status()}), 200
+
+@app.route('/api/jobs', methods=['GET'])
+@require_api_token
+def get_jobs():
+    """Retorna as tarefas em segundo plano em andamento e as recentes"""
+    return jsonify({'success': True, 'jobs': job_tracker.get_status()}), 200
+
+@app.route('/api/jobs/<int:job_id>', methods=['GET'])
+@require_api_token
+def get_job(job_id):
+    """Retorna o estado de uma tarefa e, se concluída, o resultado (ex.: contagem da limpeza)"""
+    job = job_tracker.get_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Tarefa não encontrada'}), 404
+    result = job.result if isinstance(job.result, dict) else None
+    return jsonify({'success': True, 'job': job.to_dict(), 'result': result}), 200
+
+@app.route('/api/transcripts', methods=['GET'])
+@require_api_token
+def get_transcripts_status():
+    """Retorna as últimas transcrições exportadas e a vazão (mensagens/s)"""
+    return jsonify({'success': True, 'transcripts': transcript_exporter.get_status()}), 200
+
+@app.route('/api/transcripts/<filename>', methods=['GET'])
+@require_signed_url_or_api_token
+def download_transcript(filename):
+    """Baixa a transcrição de um ticket (.jsonl.gz) com o token da API ou pelo link assinado do Discord"""
+    path = transcript_exporter.get_path(filename)
+    if not path:
+        return jsonify({'success': False, 'error': 'Transcrição não encontrada'}), 404
+    return send_from_directory(os.path.abspath(transcript_exporter.folder), filename, as_attachment=True)
+
+@app.route('/api/watchdog', methods=['GET'])
+@require_api_token
+def get_watchdog_report():
+    """Retorna os principais responsáveis por travamentos do event loop"""
+    try:
+        top = max(1, min(int(request.args.get('top', '10')), 50))
+    except ValueError:
+        top = 10
+    return jsonify({'success': True, 'watchdog': loop_watchdog.get_report(top)}), 200
+
+@app.route('/api/logs/dispatcher', methods=['GET'])
+@require_api_token
+def get_log_dispatcher_status():
+    """Retorna os contadores do envio em lote para o canal de logs"""
+    return jsonify({'success': True, 'dispatcher': log_dispatcher.get_status()}), 200
+
 @app.route('/api/logs', methods=['GET'])
 @require_api_token
 def get_logs_api():
-    """Retorna logs recentes para o painel"""
+    """Retorna logs recentes para o painel
+    
+    Parâmetros: limit, level, logger, q (texto), since_seq (novos desde o cursor),
+    before_seq (mais antigos, inclusive os gravados em disco)
+    """
     try:
-        limit_param = request.args.get('limit', '200')
-        level_filter = request.args.get('level')
         try:
-            limit = max(1, min(int(limit_param), LOG_BUFFER_LIMIT))
+            limit = max(1, min(int(request.args.get('limit', '200')), LOG_BUFFER_LIMIT))
         except ValueError:
             limit = 200
-        logs_snapshot = list(log_buffer)
-        if level_filter:
-            level_filter = level_filter.upper()
-            logs_snapshot = [log for log in logs_snapshot if log['level'] == level_filter]
-        logs_payload = logs_snapshot[-limit:]
-        return jsonify({'success': True, 'logs': logs_payload}), 200
+        try:
+            since_seq = int(request.args['since_seq']) if request.args.get('since_seq') else None
+            before_seq = int(request.args['before_seq']) if request.args.get('before_seq') else None
+        except ValueError:
+            return jsonify({'success': False, 'error': 'since_seq/before_seq devem ser números'}), 400
+        
+        entries, next_seq = log_store.query(
+            limit=limit,
+            since_seq=since_seq,
+            before_seq=before_seq,
+            level=request.args.get('level'),
+            logger_name=request.args.get('logger'),
+            contains=request.args.get('q')
+        )
+        return jsonify({
+            'success': True,
+            'logs': [LogStore.to_dict(entry) for entry in entries],
+            'next_seq': next_seq
+        }), 200
     except Exception as e:
         logger.error(f"❌ Erro ao carregar logs para painel: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/backups/status', methods=['GET'])
+@require_api_token
+def get_backup_status():
+    """Retorna métricas do backup automático (tempo, tamanho, retenção)"""
+    try:
+        return jsonify({'success': True, 'backup': backup_manager.get_auto_backup_status()}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/tickets', methods=['GET'])
 @require_api_token
 def get_tickets():
@@ -3935,6 +4742,12 @@ def schedule_bot_restart(delay_seconds: int = 4):
         try:
             logger.info(f"🔄 Reiniciando bot em {delay_seconds} segundos...")
             time.sleep(max(delay_seconds, 1))
+            if bot_instance and bot_instance.loop and bot_instance.loop.is_running():
+                # Envia os logs ainda na fila antes de substituir o processo
+                try:
+                    asyncio.run_coroutine_threadsafe(log_dispatcher.flush(5), bot_instance.loop).result(timeout=6)
+                except Exception:
+                    pass
             logger.info("🚀 Reiniciando processo do bot agora")
             os.execl(sys.executable, sys.executable, *sys.argv)
         except Exception as exc:
@@ -3966,6 +4779,8 @@ async def on_command_error(ctx, error):
     except:
         pass  # Se não conseguir enviar mensagem, ignora
 
+startup_profile.finish_imports()
+
 # ==================== MAIN ====================
 
 def main():
@@ -3994,6 +4809,9 @@ def main():
     print("🚀 Iniciando bot iBot...")
     print("🌐 Iniciando servidor web com painel integrado na porta 8080...")
     
+    # Recarrega o channel_config.json quando ele for editado por fora
+    channel_config.watch(CONFIG_WATCH_INTERVAL_SECONDS)
+    
     # Inicia servidor web em thread separada
     web_thread = threading.Thread(target=run_web_server, daemon=True)
     web_thread.start()
@@ -4002,7 +4820,8 @@ def main():
     while True:
         try:
             bot_instance = bot  # Disponibiliza bot para API
-            bot.run(BOT_TOKEN)
+            # log_handler=None: o discord.py usa o pipeline de logging já configurado
+            bot.run(BOT_TOKEN, log_handler=None)
         except KeyboardInterrupt:
             print("\n⚠️ Bot encerrado pelo usuário")
             break
@@ -0,0 +1,197 @@
+"""
+Executor de construção da loja
+Aplica uma especificação declarativa (categorias e canais) em paralelo,
+agrupando chamadas por bucket de rate limit e recuando apenas quando o Discord pede
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+def build_overwrites(guild: discord.Guild, read_only: bool = False, private: bool = False):
+    """Monta o mapa de permissões que é enviado junto com a criação do canal"""
+    if not read_only and not private:
+        return {}
+
+    overwrite = discord.PermissionOverwrite()
+    if read_only:
+        overwrite.send_messages = False
+    if private:
+        overwrite.read_messages = False
+    return {guild.default_role: overwrite}
+
+
+class BuildExecutor:
+    """Executa operações REST da loja com concorrência limitada por bucket"""
+
+    MAX_CONCURRENCY = 8
+    BUCKET_CONCURRENCY = 2
+    MAX_RETRIES = 5
+
+    def __init__(self, progress_callback=None, concurrency: int = None, bucket_concurrency: int = None):
+        self.progress_callback = progress_callback
+        self._global_semaphore = asyncio.Semaphore(concurrency or self.MAX_CONCURRENCY)
+        bucket_limit = bucket_concurrency or self.BUCKET_CONCURRENCY
+        self._bucket_semaphores = defaultdict(lambda: asyncio.Semaphore(bucket_limit))
+        self.total_steps = 0
+        self.completed_steps = 0
+        self.rate_limited = 0
+        self.rest_calls = 0
+        self.started_at = time.perf_counter()
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return round(time.perf_counter() - self.started_at, 2)
+
+    def add_steps(self, amount: int):
+        """Informa quantas operações ainda serão executadas (para o progresso)"""
+        self.total_steps += amount
+
+    async def _report(self, label: str):
+        self.completed_steps += 1
+        if not self.progress_callback:
+            return
+        try:
+            await self.progress_callback(self.completed_steps, self.total_steps, label)
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao reportar progresso da construção: {e}")
+
+    @staticmethod
+    def _retry_after(error: Exception) -> float:
+        """Extrai o tempo de espera informado pelo Discord em um 429"""
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            return float(retry_after)
+
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None) or {}
+        for header in ('Retry-After', 'X-RateLimit-Reset-After'):
+            if header in headers:
+                try:
+                    return float(headers[header])
+                except (TypeError, ValueError):
+                    continue
+        return 1.0
+
+    async def call(self, bucket, label: str, factory):
+        """
+        Executa uma chamada REST dentro do bucket informado.
+        Não há esperas fixas: só recua quando o Discord responde 429.
+        """
+        async with self._bucket_semaphores[bucket], self._global_semaphore:
+            attempt = 0
+            while True:
+                try:
+                    self.rest_calls += 1
+                    result = await factory()
+                    break
+                except discord.RateLimited as e:
+                    error = e
+                except discord.HTTPException as e:
+                    if e.status != 429:
+                        raise
+                    error = e
+
+                attempt += 1
+                self.rate_limited += 1
+                if attempt > self.MAX_RETRIES:
+                    raise error
+                wait = self._retry_after(error)
+                logger.warning(f"⏳ Rate limit em '{label}', aguardando {wait:.2f}s (tentativa {attempt})")
+                await asyncio.sleep(wait)
+
+        await self._report(label)
+        return result
+
+    async def run_all(self, operations):
+        """
+        Executa operações independentes em paralelo.
+        operations: lista de (bucket, label, factory). Retorna resultados ou exceções na mesma ordem.
+        """
+        return await asyncio.gather(
+            *(self.call(bucket, label, factory) for bucket, label, factory in operations),
+            return_exceptions=True
+        )
+
+    async def delete_channels(self, channels, reason: str, results: dict):
+        """Remove canais em paralelo (cada canal tem seu próprio bucket)"""
+        channels = list(channels)
+        self.add_steps(len(channels))
+        operations = [
+            (("channel", channel.id), f"deletar {channel.name}",
+             lambda channel=channel: channel.delete(reason=reason))
+            for channel in channels
+        ]
+        outcomes = await self.run_all(operations)
+        for channel, outcome in zip(channels, outcomes):
+            if isinstance(outcome, Exception):
+                results['errors'].append(f"Erro ao deletar {channel.name}: {str(outcome)}")
+
+    async def build(self, guild: discord.Guild, spec: list, results: dict):
+        """
+        Cria categorias e canais descritos na especificação.
+        As permissões vão junto na criação (sem chamadas extras de set_permissions).
+        Retorna {chave: canal} para todas as categorias e canais criados.
+        """
+        created = {}
+        guild_bucket = ("guild_channels", guild.id)
+
+        self.add_steps(len(spec) + sum(len(category.get('channels', [])) for category in spec))
+
+        # Categorias são independentes entre si
+        category_ops = []
+        for position, category_spec in enumerate(spec):
+            overwrites = build_overwrites(guild, private=category_spec.get('private', False))
+            category_ops.append((
+                guild_bucket,
+                f"categoria {category_spec['name']}",
+                lambda c=category_spec, o=overwrites, p=position: guild.create_category(
+                    c['name'], overwrites=o, position=p
+                )
+            ))
+
+        category_outcomes = await self.run_all(category_ops)
+
+        channel_ops = []
+        channel_specs = []
+        for category_spec, category in zip(spec, category_outcomes):
+            if isinstance(category, Exception):
+                results['errors'].append(f"Erro ao criar categoria {category_spec['name']}: {str(category)}")
+                continue
+
+            created[category_spec['key']] = category
+            results['created']['categories'] += 1
+            private = category_spec.get('private', False)
+
+            # Canais da categoria também são independentes; a posição preserva a ordem
+            for position, channel_spec in enumerate(category_spec.get('channels', [])):
+                overwrites = build_overwrites(
+                    guild,
+                    read_only=channel_spec.get('read_only', False),
+                    private=private
+                )
+                if channel_spec.get('type', 'text') == 'voice':
+                    factory = lambda c=channel_spec, cat=category, o=overwrites, p=position: guild.create_voice_channel(
+                        c['name'], category=cat, overwrites=o, position=p
+                    )
+                else:
+                    factory = lambda c=channel_spec, cat=category, o=overwrites, p=position: guild.create_text_channel(
+                        c['name'], category=cat, overwrites=o, position=p, topic=c.get('topic')
+                    )
+                channel_ops.append((guild_bucket, f"canal {channel_spec['name']}", factory))
+                channel_specs.append(channel_spec)
+
+        channel_outcomes = await self.run_all(channel_ops)
+        for channel_spec, channel in zip(channel_specs, channel_outcomes):
+            if isinstance(channel, Exception):
+                results['errors'].append(f"Erro ao criar canal {channel_spec['name']}: {str(channel)}")
+                continue
+            created[channel_spec['key']] = channel
+            results['created']['channels'] += 1
+
+        return created
@@ -0,0 +1,100 @@
+"""
+Resolução dos canais do bot (tickets, logs, anúncios, contas, boas-vindas)
+Os IDs configurados vêm do snapshot em memória do config.channel_config. A detecção
+por nome percorre os canais do servidor uma única vez, montando um índice palavra-chave -> canal,
+que fica em cache até um evento de criação/alteração/remoção de canal
+"""
+import logging
+
+from config import channel_config
+
+logger = logging.getLogger(__name__)
+
+# Papel -> (tipo, palavras-chave). A ordem define a prioridade: um canal fica com o primeiro
+# papel ainda vazio cujo nome combina (o mesmo critério da detecção antiga)
+CHANNEL_ROLES = {
+    "ticket_channel_id": ("text", ("ticket",)),
+    "announcements_channel_id": ("text", ("anúncio", "anuncio")),
+    "accounts_channel_id": ("text", ("conta",)),
+    "log_channel_id": ("text", ("log",)),
+    "welcome_channel_id": ("text", ("boas-vinda", "bem-vindo", "welcome")),
+    "ticket_category_id": ("category", ("atendimento",)),
+}
+
+
+def build_index(guild) -> dict:
+    """Uma passada pelos canais de texto e categorias, na ordem de posição; retorna papel -> ID"""
+    found = dict.fromkeys(CHANNEL_ROLES, 0)
+    pending = {"text": [], "category": []}
+    for role, (kind, keywords) in CHANNEL_ROLES.items():
+        pending[kind].append((role, keywords))
+
+    for kind, channels in (("text", guild.text_channels), ("category", guild.categories)):
+        roles = pending[kind]
+        for channel in channels:
+            if not roles:
+                break
+            name = channel.name.lower()
+            for index, (role, keywords) in enumerate(roles):
+                if any(keyword in name for keyword in keywords):
+                    found[role] = channel.id
+                    del roles[index]
+                    break
+    return found
+
+
+class ChannelResolver:
+    """IDs dos canais em memória, com detecção por nome em cache"""
+
+    def __init__(self, config=channel_config):
+        self.config = config
+        self._index = {}        # guild_id -> papel -> ID detectado
+        self.index_builds = 0
+
+    @property
+    def ids(self) -> dict:
+        snapshot = self.config.snapshot
+        return {role: snapshot.get(role, 0) for role in CHANNEL_ROLES}
+
+    def get(self, role: str, guild=None) -> int:
+        """ID configurado; sem configuração (e com guild), usa o índice por nome"""
+        channel_id = self.config.get(role, 0)
+        if not channel_id and guild is not None:
+            channel_id = self.detect(guild).get(role, 0)
+        return channel_id
+
+    def detect(self, guild) -> dict:
+        """Índice por nome do servidor (reconstruído só depois de uma invalidação)"""
+        index = self._index.get(guild.id)
+        if index is None:
+            index = build_index(guild)
+            self._index[guild.id] = index
+            self.index_builds += 1
+        return index
+
+    def update(self, ids: dict):
+        """Atualiza os IDs (snapshot em memória e channel_config.json, via serviço de configuração)"""
+        self.config.update({role: value for role, value in ids.items() if role in CHANNEL_ROLES})
+
+    def invalidate_guild(self, guild_id: int):
+        self._index.pop(guild_id, None)
+
+    def invalidate(self, channel, deleted: bool = False):
+        """Chamado nos eventos de canal: descarta o índice do servidor e IDs de canais removidos"""
+        self.invalidate_guild(channel.guild.id)
+        if deleted:
+            roles = [role for role, channel_id in self.ids.items() if channel_id == channel.id]
+            if roles:
+                logger.warning(f"⚠️ Canal configurado removido: #{channel.name} ({', '.join(roles)})")
+                self.update(dict.fromkeys(roles, 0))
+
+    def get_status(self):
+        return {
+            "configured": self.ids,
+            "config_version": self.config.version,
+            "detected": {str(guild_id): index for guild_id, index in self._index.items()},
+            "index_builds": self.index_builds
+        }
+
+
+channel_resolver = ChannelResolver()
@@ -0,0 +1,84 @@
+"""
+Sincronização dos comandos slash só quando a árvore muda
+O hash da árvore serializada fica em disco por escopo (global ou servidor); se for igual ao da
+última sincronização bem-sucedida, o tree.sync() (lento e com limite de taxa) é pulado
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+def tree_hash(tree, guild=None) -> str:
+    """Hash estável dos comandos que seriam enviados para o escopo (ordem e chaves normalizadas)"""
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+        key=lambda command: (command.get("type", 1), command["name"])
+    )
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class CommandSyncManager:
+    """Guarda o último hash sincronizado por escopo e decide se precisa sincronizar"""
+
+    def __init__(self, tree, state_file: str = "command_sync.json"):
+        self.tree = tree
+        self.state_file = state_file
+        self.last_result = None
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_state(self, state: dict):
+        tmp_file = self.state_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_file, self.state_file)
+
+    async def sync(self, application_id: int, guild_id: int = 0, force: bool = False) -> dict:
+        """
+        Sincroniza se a árvore mudou desde a última vez.
+
+        Args:
+            application_id: ID da aplicação (um bot diferente invalida o hash salvo)
+            guild_id: com valor, sincroniza só nesse servidor (propaga na hora, ideal em desenvolvimento)
+            force: sincroniza mesmo com o hash igual
+        """
+        guild = discord.Object(id=guild_id) if guild_id else None
+        if guild is not None:
+            # Comandos globais são copiados para o servidor antes do hash
+            self.tree.copy_global_to(guild=guild)
+
+        scope = f"{application_id}:guild:{guild_id}" if guild_id else f"{application_id}:global"
+        current_hash = tree_hash(self.tree, guild)
+        state = self._load_state()
+        start = time.perf_counter()
+
+        if not force and state.get(scope) == current_hash:
+            result = {"scope": scope, "synced": False, "hash": current_hash, "seconds": 0.0}
+            logger.info(f"⏭️ Comandos slash inalterados ({scope}), sincronização pulada")
+        else:
+            synced = await self.tree.sync(guild=guild)
+            state[scope] = current_hash
+            self._save_state(state)
+            result = {
+                "scope": scope, "synced": True, "hash": current_hash,
+                "commands": len(synced), "seconds": round(time.perf_counter() - start, 3)
+            }
+            logger.info(f"✅ {len(synced)} comando(s) slash sincronizado(s) ({scope}) em {result['seconds']}s")
+
+        result["checked_at"] = time.time()
+        self.last_result = result
+        return result
+
+    def get_status(self):
+        return {"last_result": self.last_result, "stored_scopes": sorted(self._load_state())}
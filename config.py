@@ -1,20 +1,17 @@
 # Configurações do Bot iBot
 import os
 import json
+import threading
+import time
+from types import MappingProxyType
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def load_channel_ids():
-    """Carrega IDs dos canais do arquivo JSON ou retorna valores padrão"""
-    try:
-        if os.path.exists('channel_config.json'):
-            with open('channel_config.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
-    except Exception as e:
-        print(f"⚠️ Erro ao carregar channel_config.json: {e}")
-    
-    # Retorna valores das variáveis de ambiente como fallback
+CHANNEL_CONFIG_FILE = 'channel_config.json'
+
+def _env_channel_ids():
+    """IDs dos canais definidos nas variáveis de ambiente"""
     return {
         "ticket_channel_id": int(os.getenv("TICKET_CHANNEL_ID", "0")),
         "ticket_category_id": int(os.getenv("TICKET_CATEGORY_ID", "0")),
@@ -24,13 +21,124 @@ def load_channel_ids():
         "welcome_channel_id": int(os.getenv("WELCOME_CHANNEL_ID", "0"))
     }
 
-# Carregar IDs dinamicamente
-_channel_config = load_channel_ids()
+
+class ConfigService:
+    """
+    Configuração em memória respaldada por um arquivo JSON.
+    Leituras usam o snapshot atual (sem I/O); cada mudança gera um snapshot novo com versão
+    incrementada e avisa os assinantes. Gravações são atômicas (arquivo temporário + os.replace)
+    e edições externas do arquivo são recarregadas pelo watch().
+    """
+    
+    def __init__(self, path: str, defaults=dict, normalize=None):
+        self.path = path
+        self.defaults = defaults
+        # Aplicado a todo snapshot publicado (arquivo editado à mão ou update)
+        self.normalize = normalize
+        self.version = 0
+        self.snapshot = MappingProxyType({})
+        self._subscribers = []
+        self._lock = threading.RLock()
+        self._file_state = None
+        self._watch_thread = None
+        self.reload(force=True)
+    
+    def get(self, key, default=0):
+        return self.snapshot.get(key, default)
+    
+    def subscribe(self, callback):
+        """callback(snapshot, version) é chamado a cada mudança (na thread que a causou)"""
+        self._subscribers.append(callback)
+    
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+    
+    def _publish(self, data: dict):
+        if self.normalize is not None:
+            data = self.normalize(data)
+        if data == dict(self.snapshot):
+            return False
+        self.snapshot = MappingProxyType(data)
+        self.version += 1
+        for callback in list(self._subscribers):
+            try:
+                callback(self.snapshot, self.version)
+            except Exception as e:
+                print(f"⚠️ Erro em assinante de {self.path}: {e}")
+        return True
+    
+    def reload(self, force: bool = False) -> bool:
+        """Relê o arquivo se ele mudou desde a última leitura/gravação; retorna se o snapshot mudou"""
+        with self._lock:
+            file_state = self._stat()
+            if not force and file_state == self._file_state:
+                return False
+            data = dict(self.defaults())
+            if file_state is not None:
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    if not isinstance(data, dict):
+                        raise ValueError(f"esperado um objeto JSON, recebido {type(data).__name__}")
+                except (OSError, ValueError) as e:
+                    # Arquivo em edição ou inválido: mantém o snapshot atual e tenta de novo depois
+                    print(f"⚠️ Erro ao carregar {self.path}: {e}")
+                    return False
+            self._file_state = file_state
+            return self._publish(data)
+    
+    def update(self, changes: dict) -> int:
+        """Aplica as mudanças, grava o arquivo de forma atômica e retorna a nova versão"""
+        with self._lock:
+            data = {**self.snapshot, **changes}
+            if self.normalize is not None:
+                data = self.normalize(data)
+            tmp_file = self.path + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_file, self.path)
+            self._file_state = self._stat()
+            self._publish(data)
+            return self.version
+    
+    def watch(self, interval_seconds: float = 2.0):
+        """Verifica periodicamente (em thread daemon) se o arquivo foi alterado por fora"""
+        if self._watch_thread is not None or interval_seconds <= 0:
+            return
+        
+        def _loop():
+            while True:
+                time.sleep(interval_seconds)
+                self.reload()
+        
+        self._watch_thread = threading.Thread(target=_loop, name=f"config-watch:{self.path}", daemon=True)
+        self._watch_thread.start()
+
+
+def _normalize_channel_ids(data: dict) -> dict:
+    """IDs sempre inteiros (strings numéricas viram int; null ou valor inválido vira 0)"""
+    normalized = {}
+    for key, value in data.items():
+        try:
+            normalized[key] = int(value or 0)
+        except (TypeError, ValueError):
+            print(f"⚠️ Valor inválido para {key} em {CHANNEL_CONFIG_FILE}: {value!r}")
+            normalized[key] = 0
+    return normalized
+
+
+# IDs dos canais (channel_config.json ou, sem ele, variáveis de ambiente); recarregados em tempo real
+channel_config = ConfigService(CHANNEL_CONFIG_FILE, defaults=_env_channel_ids, normalize=_normalize_channel_ids)
+_channel_config = channel_config.snapshot
 
 # Token do bot
 BOT_TOKEN = os.getenv("BOT_TOKEN", "seu_token_aqui")
 
-# IDs de configuração (carregados dinamicamente de channel_config.json)
+# IDs de configuração na importação (valores atuais: channel_config.get(...))
 TICKET_CHANNEL_ID = _channel_config.get("ticket_channel_id", 0)
 TICKET_CATEGORY_ID = _channel_config.get("ticket_category_id", 0)
 LOG_CHANNEL_ID = _channel_config.get("log_channel_id", 0)
@@ -43,6 +151,48 @@ GUILD_ID = int(os.getenv("GUILD_ID", "0"))  # ID do servidor
 # Token para autenticar o painel web
 PANEL_API_TOKEN = os.getenv("PANEL_API_TOKEN", "")
 
+# Backup automático (intervalo em minutos, 0 desativa) e política de retenção
+AUTO_BACKUP_INTERVAL_MINUTES = int(os.getenv("AUTO_BACKUP_INTERVAL_MINUTES", "60"))
+AUTO_BACKUP_KEEP_HOURLY = int(os.getenv("AUTO_BACKUP_KEEP_HOURLY", "24"))
+AUTO_BACKUP_KEEP_DAILY = int(os.getenv("AUTO_BACKUP_KEEP_DAILY", "7"))
+AUTO_BACKUP_KEEP_WEEKLY = int(os.getenv("AUTO_BACKUP_KEEP_WEEKLY", "4"))
+
+# Logs do painel: segmentos em disco para rolar além da memória (0 desativa)
+PANEL_LOG_SPILL_SEGMENTS = int(os.getenv("PANEL_LOG_SPILL_SEGMENTS", "4"))
+PANEL_LOG_SPILL_SEGMENT_KB = int(os.getenv("PANEL_LOG_SPILL_SEGMENT_KB", "512"))
+
+# Nível de log e amostragem de loggers verbosos ("logger=N" mantém 1 a cada N linhas INFO)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "ibot.stats=20,werkzeug=10")
+
+# Watchdog do event loop: travamentos acima do limite têm a pilha capturada
+WATCHDOG_LAG_THRESHOLD_MS = int(os.getenv("WATCHDOG_LAG_THRESHOLD_MS", "250"))
+
+# Pool de canais de ticket pré-criados (máximo 0 desativa); o tamanho se adapta à taxa de abertura
+TICKET_POOL_MIN_SIZE = int(os.getenv("TICKET_POOL_MIN_SIZE", "1"))
+TICKET_POOL_MAX_SIZE = int(os.getenv("TICKET_POOL_MAX_SIZE", "0"))
+
+# Pagamentos PIX pendentes expiram após o prazo (0 desativa) e os encerrados vão para o arquivo
+PIX_PAYMENT_TTL_MINUTES = int(os.getenv("PIX_PAYMENT_TTL_MINUTES", "60"))
+PIX_ARCHIVE_AFTER_DAYS = int(os.getenv("PIX_ARCHIVE_AFTER_DAYS", "30"))
+PIX_SCHEDULER_INTERVAL_MINUTES = int(os.getenv("PIX_SCHEDULER_INTERVAL_MINUTES", "5"))
+
+# Transcrições dos tickets (gravadas antes de o canal ser apagado)
+TRANSCRIPTS_FOLDER = os.getenv("TRANSCRIPTS_FOLDER", "transcripts")
+# Endereço público do painel, usado nos links enviados ao Discord (ex.: https://meubot.onrender.com)
+PANEL_PUBLIC_URL = os.getenv("PANEL_PUBLIC_URL", "").rstrip("/")
+# Validade (horas) dos links assinados de download das transcrições enviados ao Discord
+TRANSCRIPT_LINK_TTL_HOURS = int(os.getenv("TRANSCRIPT_LINK_TTL_HOURS", "72"))
+
+# Meta de tempo (segundos) entre o início do processo e o on_ready; acima dela o perfil sai como aviso
+STARTUP_TARGET_SECONDS = float(os.getenv("STARTUP_TARGET_SECONDS", "10"))
+
+# Sincroniza os comandos slash só no servidor GUILD_ID (aparecem na hora; útil em desenvolvimento)
+COMMAND_SYNC_GUILD_ONLY = os.getenv("COMMAND_SYNC_GUILD_ONLY", "false").lower() in ("1", "true", "yes")
+
+# Intervalo (segundos) da verificação de alterações externas no channel_config.json (0 desativa)
+CONFIG_WATCH_INTERVAL_SECONDS = float(os.getenv("CONFIG_WATCH_INTERVAL_SECONDS", "2"))
+
 # Prefixo do bot
 BOT_PREFIX = "!"
 
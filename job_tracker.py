@@ -0,0 +1,118 @@
+"""
+Tarefas em segundo plano rastreadas
+Mantém referência das tasks, impede execuções duplicadas por chave e guarda o histórico recente
+"""
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+JOB_DURATION = registry.histogram(
+    "ibot_job_duration_seconds", "Duração das tarefas em segundo plano", ("job", "status")
+)
+
+
+class Job:
+    """Estado de uma tarefa em segundo plano"""
+
+    def __init__(self, job_id: int, name: str, key=None):
+        self.job_id = job_id
+        self.name = name
+        self.key = key
+        self.status = "running"
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration = None
+        self.error = None
+        self.progress = {}
+        self.result = None
+        self.task = None
+
+    def update_progress(self, **progress):
+        """Atualiza o progresso exibido no painel (ex.: processed=10, total=50)"""
+        self.progress.update(progress)
+
+    def to_dict(self) -> dict:
+        elapsed = self.duration if self.duration is not None else time.perf_counter() - self._start
+        return {
+            "job_id": self.job_id,
+            "name": self.name,
+            "key": str(self.key) if self.key is not None else None,
+            "status": self.status,
+            "started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started_at)),
+            "elapsed_seconds": round(elapsed, 3),
+            "progress": self.progress,
+            "error": self.error
+        }
+
+
+class JobTracker:
+    """Dispara e acompanha tarefas em segundo plano"""
+
+    def __init__(self, history_size: int = 100):
+        self.running = {}
+        self.keys = {}
+        self.history = deque(maxlen=history_size)
+        self._ids = itertools.count(1)
+
+    def is_running(self, key) -> bool:
+        return key in self.keys
+
+    def spawn(self, name: str, coro_factory, key=None):
+        """
+        Agenda a tarefa no loop atual.
+        coro_factory recebe o Job (para reportar progresso) e retorna a corrotina;
+        o valor retornado por ela fica em job.result.
+        Se já houver uma tarefa em andamento com a mesma chave, retorna None sem agendar.
+        """
+        if key is not None and key in self.keys:
+            return None
+
+        job = Job(next(self._ids), name, key)
+        self.running[job.job_id] = job
+        if key is not None:
+            self.keys[key] = job.job_id
+
+        job.task = asyncio.get_running_loop().create_task(self._run(job, coro_factory))
+        return job
+
+    async def _run(self, job: Job, coro_factory):
+        try:
+            job.result = await coro_factory(job)
+            job.status = "done"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = f"{type(e).__name__}: {e}"
+            logger.error(f"❌ Tarefa '{job.name}' #{job.job_id} falhou: {e}", exc_info=True)
+        finally:
+            job.duration = time.perf_counter() - job._start
+            JOB_DURATION.observe(job.duration, job=job.name, status=job.status)
+            self.running.pop(job.job_id, None)
+            if job.key is not None and self.keys.get(job.key) == job.job_id:
+                del self.keys[job.key]
+            self.history.append(job)
+
+    def get_job(self, job_id: int):
+        job = self.running.get(job_id)
+        if job is not None:
+            return job
+        return next((j for j in self.history if j.job_id == job_id), None)
+
+    def get_status(self, limit: int = 20):
+        """Tarefas em andamento e as últimas concluídas"""
+        running = [job.to_dict() for job in list(self.running.values())]
+        recent = [job.to_dict() for job in list(self.history)[-limit:]]
+        recent.reverse()
+        return {"running": running, "recent": recent}
+
+
+# Compartilhado entre o bot e os módulos de moderação
+job_tracker = JobTracker()
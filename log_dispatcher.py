@@ -0,0 +1,184 @@
+"""
+Despachante de logs do canal de logs
+Recebe embeds sem bloquear quem chama e envia em lote (até 10 embeds por mensagem)
+"""
+import asyncio
+import logging
+import time
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class LogDispatcher:
+    """Fila limitada de embeds com envio agrupado por canal"""
+
+    MAX_EMBEDS_PER_MESSAGE = 10      # limite do Discord
+    MAX_CHARS_PER_MESSAGE = 6000     # soma de caracteres das embeds de uma mensagem
+    SATURATION_REPORT_INTERVAL = 30  # segundos entre avisos de fila cheia
+
+    def __init__(self, bot, channel_id_getter, max_queue: int = 500, flush_window: float = 1.0):
+        """
+        Args:
+            bot: instância do bot
+            channel_id_getter: função que retorna o ID atual do canal de logs
+            max_queue: tamanho máximo da fila (excedente é descartado)
+            flush_window: tempo (s) para juntar embeds antes de enviar
+        """
+        self.bot = bot
+        self.channel_id_getter = channel_id_getter
+        self.flush_window = flush_window
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.worker_task = None
+        self._loop = None
+        self.stats = {
+            "queued": 0,
+            "dropped": 0,
+            "sent_messages": 0,
+            "sent_embeds": 0,
+            "failed_embeds": 0
+        }
+        self._dropped_since_report = 0
+        self._last_saturation_report = 0.0
+
+    def submit(self, embed: discord.Embed, channel_id: int = None) -> bool:
+        """
+        Enfileira uma embed para o canal de logs. Nunca bloqueia.
+        Retorna False se a embed foi descartada (fila cheia ou canal não configurado).
+        """
+        channel_id = channel_id or self.channel_id_getter()
+        if not channel_id:
+            return False
+
+        self._ensure_worker()
+
+        try:
+            self.queue.put_nowait((channel_id, embed))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            self._dropped_since_report += 1
+            self._report_saturation()
+            return False
+
+        self.stats["queued"] += 1
+        return True
+
+    def _ensure_worker(self):
+        """Inicia o worker sob demanda no loop em execução"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._loop is loop and self.worker_task and not self.worker_task.done():
+            return
+        if self._loop is not None and self._loop is not loop:
+            # bot.run() cria um loop novo a cada reinício; a fila antiga fica presa ao loop anterior
+            if self.queue.qsize():
+                logger.warning(f"⚠️ {self.queue.qsize()} log(s) perdidos no reinício do bot")
+            self.queue = asyncio.Queue(maxsize=self.queue.maxsize)
+        self._loop = loop
+        self.worker_task = loop.create_task(self._worker())
+
+    def _report_saturation(self):
+        now = time.monotonic()
+        if now - self._last_saturation_report < self.SATURATION_REPORT_INTERVAL:
+            return
+        self._last_saturation_report = now
+        logger.warning(
+            f"⚠️ Fila de logs cheia: {self._dropped_since_report} embed(s) descartada(s) "
+            f"({self.queue.qsize()} na fila, {self.stats['dropped']} descartadas no total)"
+        )
+        self._dropped_since_report = 0
+
+    async def _collect_batch(self, batch: list):
+        """Aguarda a primeira embed e junta em batch as que chegarem dentro da janela de envio"""
+        batch.append(await self.queue.get())
+        deadline = time.monotonic() + self.flush_window
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        # Esvazia o que já estiver pronto sem esperar mais
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+
+    def _pack(self, embeds):
+        """Divide as embeds em mensagens respeitando os limites do Discord"""
+        messages = []
+        current = []
+        current_chars = 0
+        for embed in embeds:
+            size = len(embed)
+            if current and (len(current) >= self.MAX_EMBEDS_PER_MESSAGE
+                            or current_chars + size > self.MAX_CHARS_PER_MESSAGE):
+                messages.append(current)
+                current = []
+                current_chars = 0
+            current.append(embed)
+            current_chars += size
+        if current:
+            messages.append(current)
+        return messages
+
+    async def _send(self, channel_id: int, embeds):
+        channel = self.bot.get_channel(channel_id)
+        if not channel:
+            self.stats["failed_embeds"] += len(embeds)
+            return
+
+        for chunk in self._pack(embeds):
+            try:
+                await channel.send(embeds=chunk)
+                self.stats["sent_messages"] += 1
+                self.stats["sent_embeds"] += len(chunk)
+            except Exception as e:
+                self.stats["failed_embeds"] += len(chunk)
+                logger.error(f"Erro ao enviar log: {e}")
+
+    async def _worker(self):
+        while True:
+            # Preenchido durante a coleta: tudo que saiu da fila é marcado como feito no finally,
+            # mesmo com erro ou cancelamento (senão o flush() esperaria até o tempo limite)
+            batch = []
+            try:
+                await self._collect_batch(batch)
+
+                by_channel = {}
+                for channel_id, embed in batch:
+                    by_channel.setdefault(channel_id, []).append(embed)
+
+                for channel_id, embeds in by_channel.items():
+                    await self._send(channel_id, embeds)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"❌ Erro no despachante de logs: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def flush(self, timeout: float = 10.0):
+        """Aguarda o envio das embeds pendentes (ex.: antes de reiniciar)"""
+        if not self.worker_task or self.worker_task.done():
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ {self.queue.qsize()} log(s) não enviados antes do tempo limite")
+
+    def get_status(self):
+        """Retorna os contadores do despachante"""
+        return {
+            **self.stats,
+            "pending": self.queue.qsize(),
+            "max_queue": self.queue.maxsize,
+            "flush_window": self.flush_window,
+            "running": bool(self.worker_task and not self.worker_task.done())
+        }
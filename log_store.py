@@ -0,0 +1,197 @@
+"""
+Armazenamento estruturado de logs para o painel
+Buffer circular com índice por nível, cursor por sequência e segmentos em disco (opcional)
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+LogEntry = namedtuple("LogEntry", ["seq", "ts", "level", "logger", "message"])
+
+
+class LogStore:
+    """Buffer circular de registros de log com consultas sem copiar o buffer inteiro"""
+
+    SPILL_BATCH = 100  # registros despejados acumulados antes de gravar em disco
+
+    def __init__(self, capacity: int = 500, spill_folder: str = None,
+                 spill_segments: int = 0, spill_segment_kb: int = 512):
+        """
+        Args:
+            capacity: quantidade de registros mantidos em memória
+            spill_folder: pasta dos segmentos em disco
+            spill_segments: quantos segmentos manter em disco (0 desativa)
+            spill_segment_kb: tamanho máximo de cada segmento
+        """
+        self.capacity = capacity
+        self.entries = deque()
+        self.level_index = {}
+        self.next_seq = 1
+        self.lock = threading.Lock()
+
+        self.spill_folder = spill_folder
+        self.spill_segments = spill_segments if spill_folder else 0
+        self.spill_segment_bytes = spill_segment_kb * 1024
+        self.spill_pending = []
+        self.spill_lock = threading.Lock()
+
+        if self.spill_segments:
+            os.makedirs(self.spill_folder, exist_ok=True)
+
+    # ==================== ESCRITA ====================
+
+    def append(self, record: logging.LogRecord):
+        """Adiciona um registro de log (chamado pelo handler)"""
+        message = record.getMessage()
+        if record.exc_info and record.exc_info[1] is not None:
+            message = f"{message} | {record.exc_info[0].__name__}: {record.exc_info[1]}"
+
+        to_spill = None
+        with self.lock:
+            entry = LogEntry(self.next_seq, record.created, record.levelname, record.name, message)
+            self.next_seq += 1
+
+            if len(self.entries) >= self.capacity:
+                evicted = self.entries.popleft()
+                self.level_index[evicted.level].popleft()
+                if self.spill_segments:
+                    self.spill_pending.append(evicted)
+                    if len(self.spill_pending) >= self.SPILL_BATCH:
+                        to_spill, self.spill_pending = self.spill_pending, []
+
+            self.entries.append(entry)
+            self.level_index.setdefault(entry.level, deque()).append(entry)
+
+        if to_spill:
+            self._spill(to_spill)
+
+    def _segment_paths(self):
+        """Segmentos em disco, do mais antigo para o mais novo"""
+        if not self.spill_segments or not os.path.exists(self.spill_folder):
+            return []
+        names = sorted(
+            name for name in os.listdir(self.spill_folder)
+            if name.startswith("panel_logs_") and name.endswith(".jsonl")
+        )
+        return [os.path.join(self.spill_folder, name) for name in names]
+
+    def _spill(self, entries):
+        """Grava registros despejados da memória no segmento atual"""
+        with self.spill_lock:
+            self._write_segment(entries)
+
+    def _write_segment(self, entries):
+        try:
+            segments = self._segment_paths()
+            current = segments[-1] if segments else None
+            if current is None or os.path.getsize(current) >= self.spill_segment_bytes:
+                current = os.path.join(self.spill_folder, f"panel_logs_{entries[0].seq:012d}.jsonl")
+                segments.append(current)
+
+            with open(current, "a", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry._asdict(), ensure_ascii=False) + "\n")
+
+            # Retenção: remove os segmentos mais antigos
+            for old in segments[:-self.spill_segments]:
+                os.remove(old)
+        except Exception:
+            # Nunca logar aqui (recursão no handler)
+            pass
+
+    # ==================== CONSULTA ====================
+
+    @staticmethod
+    def _matches(entry: LogEntry, logger_name, contains) -> bool:
+        if logger_name and entry.logger != logger_name and not entry.logger.startswith(logger_name + "."):
+            return False
+        if contains and contains not in entry.message.lower():
+            return False
+        return True
+
+    def query(self, limit: int = 200, since_seq: int = None, before_seq: int = None,
+              level: str = None, logger_name: str = None, contains: str = None):
+        """
+        Retorna (até `limit` registros em ordem cronológica, cursor).
+        O cursor é o seq até onde a consulta foi examinada, lido sob o lock junto com os registros:
+        usado como since_seq na próxima consulta, nenhum registro é pulado (com a página cheia, é o
+        seq do último registro retornado; senão, o último seq gravado).
+        since_seq: apenas registros mais novos que o cursor, os mais antigos primeiro (polling incremental)
+        before_seq: apenas registros mais antigos (rolagem para trás, inclui o disco)
+        """
+        level = level.upper() if level else None
+        contains = contains.lower() if contains else None
+        collected = []
+
+        with self.lock:
+            cursor = self.last_seq
+            source = self.level_index.get(level, ()) if level else self.entries
+            pending = list(self.spill_pending)
+            # Polling com cursor anterior ao registro mais antigo em memória precisa do disco
+            oldest_seq = self.entries[0].seq if self.entries else cursor + 1
+            since_spilled = since_seq is not None and since_seq < oldest_seq - 1
+
+            # Percorre do mais novo para o mais antigo; no polling vai até o cursor (a página
+            # é cortada depois, mantendo os mais antigos)
+            for entry in reversed(source):
+                if before_seq is not None and entry.seq >= before_seq:
+                    continue
+                if since_seq is not None and entry.seq <= since_seq:
+                    break
+                if self._matches(entry, logger_name, contains):
+                    collected.append(entry)
+                    if since_seq is None and len(collected) >= limit:
+                        break
+
+        # Rolagem para trás (ou polling atrasado) continua nos registros que já saíram da memória
+        if (before_seq is not None and len(collected) < limit) or since_spilled:
+            for entry in self._iter_spilled(pending):
+                if since_seq is not None and entry.seq <= since_seq:
+                    break
+                if (before_seq is not None and entry.seq >= before_seq) or (level and entry.level != level):
+                    continue
+                if self._matches(entry, logger_name, contains):
+                    collected.append(entry)
+                    if since_seq is None and len(collected) >= limit:
+                        break
+
+        collected.reverse()
+        if since_seq is not None and len(collected) > limit:
+            collected = collected[:limit]
+            cursor = collected[-1].seq
+        return collected, cursor
+
+    def _iter_spilled(self, pending):
+        """Registros fora da memória, do mais novo para o mais antigo"""
+        yield from reversed(pending)
+        for path in reversed(self._segment_paths()):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    lines = f.readlines()
+            except OSError:
+                continue
+            for line in reversed(lines):
+                try:
+                    yield LogEntry(**json.loads(line))
+                except (ValueError, TypeError):
+                    continue
+
+    @property
+    def last_seq(self) -> int:
+        return self.next_seq - 1
+
+    @staticmethod
+    def to_dict(entry: LogEntry) -> dict:
+        """Formato do /api/logs (mantém 'level' e 'message' formatada do formato antigo)"""
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.ts))
+        return {
+            "seq": entry.seq,
+            "ts": entry.ts,
+            "level": entry.level,
+            "logger": entry.logger,
+            "text": entry.message,
+            "message": f"{timestamp} {entry.level} - {entry.message}"
+        }
@@ -0,0 +1,132 @@
+"""
+Pipeline de logging não bloqueante
+Quem loga só enfileira o registro; formatação, stdout e painel rodam em uma thread separada
+"""
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s - %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_listener = None
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler que não formata no chamador.
+    O QueueHandler padrão formata a mensagem (e o traceback) antes de enfileirar;
+    como a fila é do próprio processo, o registro original pode seguir intacto.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        # Fila cheia descarta o registro em vez de travar quem está logando
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SamplingFilter(logging.Filter):
+    """Mantém 1 a cada N registros INFO/DEBUG dos loggers configurados (WARNING+ sempre passa)"""
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = rates
+        self.counters = {}
+        self.sampled_out = 0
+        self._rate_cache = {}
+
+    def _rate_for(self, name: str) -> int:
+        rate = self._rate_cache.get(name)
+        if rate is None:
+            # O logger mais específico configurado vale para os filhos (ex.: "discord" cobre "discord.gateway")
+            rate = 1
+            candidate = name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition('.')[0]
+            self._rate_cache[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate_for(record.name)
+        if rate <= 1:
+            return True
+        count = self.counters.get(record.name, 0)
+        self.counters[record.name] = count + 1
+        if count % rate == 0:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+def parse_sampling(spec: str) -> dict:
+    """Converte "ibot.stats=20,discord.gateway=5" em {"ibot.stats": 20, "discord.gateway": 5}"""
+    rates = {}
+    for item in (spec or "").split(','):
+        name, _, rate = item.strip().partition('=')
+        if not name or not rate:
+            continue
+        try:
+            rates[name.strip()] = max(1, int(rate))
+        except ValueError:
+            continue
+    return rates
+
+
+def setup_logging(extra_handlers=(), level: str = "INFO", sampling: str = "", max_queue: int = 10000):
+    """
+    Configura o logger raiz com QueueHandler + QueueListener.
+
+    Args:
+        extra_handlers: handlers adicionais executados na thread do listener (ex.: painel)
+        level: nível mínimo do logger raiz
+        sampling: especificação de amostragem por logger (ver parse_sampling)
+        max_queue: tamanho máximo da fila (registros excedentes são descartados)
+    Returns:
+        O QueueListener em execução
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT))
+
+    log_queue = queue.Queue(maxsize=max_queue)
+    queue_handler = DeferredQueueHandler(log_queue)
+    rates = parse_sampling(sampling)
+    if rates:
+        queue_handler.addFilter(SamplingFilter(rates))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+
+    _listener = QueueListener(log_queue, stream_handler, *extra_handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Esvazia a fila e para a thread do listener"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
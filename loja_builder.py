@@ -3,9 +3,37 @@ import asyncio
 import logging
 import json
 import os
+from build_executor import BuildExecutor, build_overwrites
+from channel_resolver import channel_resolver
 
 logger = logging.getLogger(__name__)
 
+# Templates de loja (JSON) com a especificação declarativa de categorias e canais.
+# read_only bloqueia envio de mensagens para @everyone; private esconde a categoria.
+TEMPLATES_FOLDER = "shop_templates"
+DEFAULT_TEMPLATE = "loja_profissional"
+
+
+def list_shop_templates():
+    """Lista os templates de loja disponíveis"""
+    if not os.path.exists(TEMPLATES_FOLDER):
+        return []
+    return sorted(
+        filename[:-5] for filename in os.listdir(TEMPLATES_FOLDER)
+        if filename.endswith('.json')
+    )
+
+
+def load_shop_template(template_name: str = DEFAULT_TEMPLATE):
+    """Carrega um template de loja do disco"""
+    safe_name = os.path.basename(template_name)
+    filepath = os.path.join(TEMPLATES_FOLDER, f"{safe_name}.json")
+    with open(filepath, 'r', encoding='utf-8') as f:
+        template = json.load(f)
+    template.setdefault("preserve_patterns", [])
+    template.setdefault("categories", [])
+    return template
+
 class LojaBuilder:
     """Construtor de loja profissional"""
     
@@ -14,8 +42,14 @@ class LojaBuilder:
         self.created_channels = {}
         self.created_roles = {}
         
-    async def create_professional_shop(self, guild: discord.Guild):
-        """Cria uma loja profissional do zero"""
+    async def create_professional_shop(self, guild: discord.Guild, progress_callback=None, template_name: str = DEFAULT_TEMPLATE):
+        """Cria uma loja profissional do zero
+        
+        Args:
+            guild: Servidor Discord
+            progress_callback: coroutine opcional (concluídos, total, etapa) para acompanhar o progresso
+            template_name: template em shop_templates/ usado na construção
+        """
         
         results = {
             "success": True,
@@ -24,288 +58,289 @@ class LojaBuilder:
                 "categories": 0,
                 "channels": 0,
                 "messages": 0
-            }
+            },
+            "elapsed_seconds": 0.0,
+            "rest_calls": 0,
+            "rate_limited": 0
         }
         
+        self.created_channels = {}
+        executor = BuildExecutor(progress_callback=progress_callback)
+        
         try:
+            template = load_shop_template(template_name)
+            
             # Fase 1: Deletar canais e categorias existentes
             logger.info("🗑️ Fase 1: Limpando servidor...")
-            await self._clean_server(guild, results)
+            await self._clean_server(guild, results, executor)
             
             # Fase 2: Criar estrutura
             logger.info("🏗️ Fase 2: Criando estrutura...")
-            await self._create_structure(guild, results)
+            await self._create_structure(guild, results, executor, template)
             
             # Fase 3: Configurar painéis
             logger.info("📝 Fase 3: Configurando painéis...")
-            await self._setup_panels(guild, results)
-            
-            return results
+            await self._setup_panels(guild, results, executor)
             
         except Exception as e:
             results['success'] = False
             results['errors'].append(f"Erro fatal: {str(e)}")
             logger.error(f"Erro ao criar loja: {e}")
-            return results
+        
+        results['elapsed_seconds'] = executor.elapsed_seconds
+        results['rest_calls'] = executor.rest_calls
+        results['rate_limited'] = executor.rate_limited
+        logger.info(
+            f"⏱️ Loja construída em {results['elapsed_seconds']}s "
+            f"({results['rest_calls']} chamadas REST, {results['rate_limited']} rate limit(s))"
+        )
+        return results
     
-    async def _clean_server(self, guild: discord.Guild, results: dict):
+    async def _clean_server(self, guild: discord.Guild, results: dict, executor: BuildExecutor):
         """Limpa o servidor (mantém apenas cargos)"""
         try:
-            # Deletar todos os canais
-            for channel in guild.channels:
-                if not isinstance(channel, discord.CategoryChannel):
-                    try:
-                        await channel.delete(reason="Criando nova loja profissional")
-                        await asyncio.sleep(0.5)  # Evitar rate limit
-                    except Exception as e:
-                        results['errors'].append(f"Erro ao deletar canal {channel.name}: {str(e)}")
+            reason = "Criando nova loja profissional"
+            
+            # Deletar todos os canais em paralelo (cada canal tem seu próprio bucket)
+            channels = [c for c in guild.channels if not isinstance(c, discord.CategoryChannel)]
+            await executor.delete_channels(channels, reason, results)
             
             # Deletar todas as categorias
-            for category in guild.categories:
-                try:
-                    await category.delete(reason="Criando nova loja profissional")
-                    await asyncio.sleep(0.5)
-                except Exception as e:
-                    results['errors'].append(f"Erro ao deletar categoria {category.name}: {str(e)}")
+            await executor.delete_channels(list(guild.categories), reason, results)
             
             logger.info("✅ Servidor limpo com sucesso")
             
         except Exception as e:
             results['errors'].append(f"Erro na limpeza: {str(e)}")
     
-    async def _create_structure(self, guild: discord.Guild, results: dict):
-        """Cria a estrutura completa da loja"""
-        
-        # Permissões padrão
-        everyone_role = guild.default_role
-        
-        # ==================== CATEGORIA: 📢 INFORMAÇÕES ====================
-        cat_info = await guild.create_category(
-            "📢│INFORMAÇÕES",
-            position=0
-        )
-        results['created']['categories'] += 1
-        
-        # Canal de boas-vindas
-        ch_welcome = await guild.create_text_channel(
-            "👋│boas-vindas",
-            category=cat_info,
-            topic="Seja bem-vindo à nossa loja! Leia as regras e divirta-se! 🎮"
-        )
-        await ch_welcome.set_permissions(everyone_role, send_messages=False)
-        self.created_channels['welcome'] = ch_welcome
-        results['created']['channels'] += 1
-        
-        # Canal de regras
-        ch_rules = await guild.create_text_channel(
-            "📜│regras",
-            category=cat_info,
-            topic="Regras do servidor - Leia com atenção!"
-        )
-        await ch_rules.set_permissions(everyone_role, send_messages=False)
-        self.created_channels['rules'] = ch_rules
-        results['created']['channels'] += 1
-        
-        # Canal de anúncios
-        ch_announcements = await guild.create_text_channel(
-            "📢│anúncios",
-            category=cat_info,
-            topic="Novidades e atualizações importantes"
-        )
-        await ch_announcements.set_permissions(everyone_role, send_messages=False)
-        self.created_channels['announcements'] = ch_announcements
-        results['created']['channels'] += 1
-        
-        # Canal de informações
-        ch_info = await guild.create_text_channel(
-            "ℹ️│informações",
-            category=cat_info,
-            topic="Informações úteis sobre a loja"
-        )
-        await ch_info.set_permissions(everyone_role, send_messages=False)
-        self.created_channels['info'] = ch_info
-        results['created']['channels'] += 1
-        
-        # ==================== CATEGORIA: 🛒 LOJA ====================
-        cat_shop = await guild.create_category(
-            "🛒│LOJA",
-            position=1
-        )
-        results['created']['categories'] += 1
-        
-        # Canal de contas Roblox
-        ch_accounts = await guild.create_text_channel(
-            "🎮│contas-roblox",
-            category=cat_shop,
-            topic="Contas Roblox disponíveis para compra - Clique no botão para comprar!"
-        )
-        await ch_accounts.set_permissions(everyone_role, send_messages=False)
-        self.created_channels['accounts'] = ch_accounts
-        results['created']['channels'] += 1
-        
-        # Canal de robux
-        ch_robux = await guild.create_text_channel(
-            "💎│robux",
-            category=cat_shop,
-            topic="Venda de Robux - Preços especiais!"
-        )
-        await ch_robux.set_permissions(everyone_role, send_messages=False)
-        self.created_channels['robux'] = ch_robux
-        results['created']['channels'] += 1
-        
-        # Canal de passes de jogo
-        ch_passes = await guild.create_text_channel(
-            "🎫│passes-e-itens",
-            category=cat_shop,
-            topic="Game Passes e itens especiais"
-        )
-        await ch_passes.set_permissions(everyone_role, send_messages=False)
-        self.created_channels['passes'] = ch_passes
-        results['created']['channels'] += 1
-        
-        # Canal de promoções
-        ch_promo = await guild.create_text_channel(
-            "🔥│promoções",
-            category=cat_shop,
-            topic="Promoções e ofertas especiais - Não perca!"
-        )
-        await ch_promo.set_permissions(everyone_role, send_messages=False)
-        self.created_channels['promo'] = ch_promo
-        results['created']['channels'] += 1
-        
-        # ==================== CATEGORIA: 💰 ATENDIMENTO ====================
-        cat_support = await guild.create_category(
-            "💰│ATENDIMENTO",
-            position=2
-        )
-        results['created']['categories'] += 1
+    async def _create_structure(self, guild: discord.Guild, results: dict, executor: BuildExecutor, template: dict):
+        """Cria a estrutura completa da loja a partir do template"""
+        created = await executor.build(guild, template['categories'], results)
+        self.created_channels.update(created)
         
-        # Canal para abrir ticket
-        ch_ticket = await guild.create_text_channel(
-            "📧│abrir-ticket",
-            category=cat_support,
-            topic="Clique no botão abaixo para abrir um ticket de atendimento"
-        )
-        self.created_channels['ticket'] = ch_ticket
-        results['created']['channels'] += 1
-        
-        # Canal de proofs/avaliações
-        ch_proofs = await guild.create_text_channel(
-            "⭐│avaliações",
-            category=cat_support,
-            topic="Avaliações de clientes satisfeitos"
-        )
-        await ch_proofs.set_permissions(everyone_role, send_messages=False)
-        self.created_channels['proofs'] = ch_proofs
-        results['created']['channels'] += 1
-        
-        # Canal de FAQ
-        ch_faq = await guild.create_text_channel(
-            "❓│dúvidas-frequentes",
-            category=cat_support,
-            topic="Perguntas frequentes - Veja se sua dúvida está aqui!"
-        )
-        await ch_faq.set_permissions(everyone_role, send_messages=False)
-        self.created_channels['faq'] = ch_faq
-        results['created']['channels'] += 1
-        
-        # ==================== CATEGORIA: 💬 COMUNIDADE ====================
-        cat_community = await guild.create_category(
-            "💬│COMUNIDADE",
-            position=3
-        )
-        results['created']['categories'] += 1
-        
-        # Canal de chat geral
-        ch_chat = await guild.create_text_channel(
-            "💭│chat-geral",
-            category=cat_community,
-            topic="Converse e interaja com outros membros"
-        )
-        self.created_channels['chat'] = ch_chat
-        results['created']['channels'] += 1
-        
-        # Canal de memes
-        ch_memes = await guild.create_text_channel(
-            "😂│memes",
-            category=cat_community,
-            topic="Compartilhe seus memes favoritos"
-        )
-        self.created_channels['memes'] = ch_memes
-        results['created']['channels'] += 1
-        
-        # Canal de mídia
-        ch_media = await guild.create_text_channel(
-            "📸│mídia",
-            category=cat_community,
-            topic="Compartilhe prints, vídeos e arte"
-        )
-        self.created_channels['media'] = ch_media
-        results['created']['channels'] += 1
-        
-        # Canal de parcerias
-        ch_partner = await guild.create_text_channel(
-            "🤝│parcerias",
-            category=cat_community,
-            topic="Interessado em parceria? Entre em contato!"
-        )
-        await ch_partner.set_permissions(everyone_role, send_messages=False)
-        self.created_channels['partner'] = ch_partner
-        results['created']['channels'] += 1
-        
-        # Canal de voz
-        ch_voice = await guild.create_voice_channel(
-            "🎤│Conversa Geral",
-            category=cat_community
-        )
-        results['created']['channels'] += 1
+        logger.info(f"✅ Estrutura criada: {results['created']['categories']} categorias, {results['created']['channels']} canais")
+    
+    # ==================== RECONCILIAÇÃO ====================
+    
+    async def reconcile_shop(self, guild: discord.Guild, template_name: str = DEFAULT_TEMPLATE,
+                             delete_extras: bool = False, progress_callback=None, protected_ids=()):
+        """
+        Compara o template com o servidor e aplica apenas a diferença:
+        cria o que falta, atualiza tópicos/permissões alterados e, opcionalmente, remove extras.
+        Idempotente: sem diferenças, nenhuma chamada REST é feita.
+        protected_ids: canais que nunca são removidos como extras (ex.: onde o comando foi usado);
+        os canais configurados no channel_config também são sempre mantidos.
+        """
+        results = {
+            "success": True,
+            "errors": [],
+            "created": {"categories": 0, "channels": 0, "messages": 0},
+            "updated": {"categories": 0, "channels": 0},
+            "deleted": {"categories": 0, "channels": 0},
+            "unchanged": 0,
+            "elapsed_seconds": 0.0,
+            "rest_calls": 0,
+            "rate_limited": 0
+        }
         
-        ch_voice2 = await guild.create_voice_channel(
-            "🎮│Sala Geral",
-            category=cat_community
-        )
-        results['created']['channels'] += 1
+        self.created_channels = {}
+        executor = BuildExecutor(progress_callback=progress_callback)
         
-        # ==================== CATEGORIA: 🔧 STAFF (PRIVADA) ====================
-        cat_staff = await guild.create_category(
-            "🔧│STAFF",
-            position=4
-        )
-        # Torna categoria privada (apenas staff)
-        await cat_staff.set_permissions(everyone_role, read_messages=False)
-        results['created']['categories'] += 1
-        
-        # Canal de logs
-        ch_logs = await guild.create_text_channel(
-            "📊│logs",
-            category=cat_staff,
-            topic="Logs do servidor e do bot"
-        )
-        self.created_channels['logs'] = ch_logs
-        results['created']['channels'] += 1
-        
-        # Canal de comandos
-        ch_commands = await guild.create_text_channel(
-            "🤖│comandos",
-            category=cat_staff,
-            topic="Use comandos do bot aqui"
-        )
-        self.created_channels['commands'] = ch_commands
-        results['created']['channels'] += 1
-        
-        # Canal de configuração
-        ch_config = await guild.create_text_channel(
-            "⚙️│configuração",
-            category=cat_staff,
-            topic="Configurações do servidor"
+        try:
+            template = load_shop_template(template_name)
+            protected = set(protected_ids) | {channel_id for channel_id in channel_resolver.ids.values() if channel_id}
+            new_keys = await self._reconcile_structure(guild, template, results, executor, delete_extras, protected)
+            
+            # Painéis só são enviados nos canais que acabaram de ser criados
+            if new_keys:
+                await self._setup_panels(guild, results, executor, only_keys=new_keys)
+        except Exception as e:
+            results['success'] = False
+            results['errors'].append(f"Erro fatal: {str(e)}")
+            logger.error(f"Erro ao reconciliar loja: {e}")
+        
+        results['elapsed_seconds'] = executor.elapsed_seconds
+        results['rest_calls'] = executor.rest_calls
+        results['rate_limited'] = executor.rate_limited
+        logger.info(
+            f"🔁 Loja reconciliada em {results['elapsed_seconds']}s: "
+            f"{results['created']['channels']} criado(s), {results['updated']['channels']} atualizado(s), "
+            f"{results['deleted']['channels']} removido(s), {results['unchanged']} sem alteração "
+            f"({results['rest_calls']} chamadas REST)"
         )
-        self.created_channels['config'] = ch_config
-        results['created']['channels'] += 1
-        
-        logger.info(f"✅ Estrutura criada: {results['created']['categories']} categorias, {results['created']['channels']} canais")
+        return results
+    
+    @staticmethod
+    def _is_preserved(name: str, template: dict) -> bool:
+        """Canais dinâmicos (ex.: tickets) nunca são tratados como extras"""
+        lowered = name.lower()
+        return any(pattern.lower() in lowered for pattern in template['preserve_patterns'])
+    
+    @staticmethod
+    def _channel_matches_type(channel, channel_spec: dict) -> bool:
+        if channel_spec.get('type', 'text') == 'voice':
+            return isinstance(channel, discord.VoiceChannel)
+        return isinstance(channel, discord.TextChannel)
     
-    async def _setup_panels(self, guild: discord.Guild, results: dict):
-        """Configura painéis e mensagens nos canais"""
+    @staticmethod
+    def _desired_overwrites(channel, guild: discord.Guild, desired: dict):
+        """Aplica o overwrite do @everyone do template preservando os demais overwrites do canal"""
+        overwrites = dict(channel.overwrites)
+        overwrites.pop(guild.default_role, None)
+        desired_default = desired.get(guild.default_role)
+        if desired_default is not None and not desired_default.is_empty():
+            overwrites[guild.default_role] = desired_default
+        return overwrites
+    
+    async def _reconcile_structure(self, guild: discord.Guild, template: dict, results: dict,
+                                   executor: BuildExecutor, delete_extras: bool, protected: set = frozenset()):
+        """Calcula e aplica o delta entre template e servidor. Retorna as chaves criadas."""
+        guild_bucket = ("guild_channels", guild.id)
+        everyone = guild.default_role
+        spec = template['categories']
+        new_keys = set()
+        
+        categories_by_name = {category.name: category for category in guild.categories}
+        
+        # 1) Categorias que faltam
+        missing_categories = [c for c in spec if c['name'] not in categories_by_name]
+        if missing_categories:
+            operations = []
+            for category_spec in missing_categories:
+                position = spec.index(category_spec)
+                overwrites = build_overwrites(guild, private=category_spec.get('private', False))
+                operations.append((
+                    guild_bucket, f"categoria {category_spec['name']}",
+                    lambda c=category_spec, o=overwrites, p=position: guild.create_category(c['name'], overwrites=o, position=p)
+                ))
+            executor.add_steps(len(operations))
+            outcomes = await executor.run_all(operations)
+            for category_spec, outcome in zip(missing_categories, outcomes):
+                if isinstance(outcome, Exception):
+                    results['errors'].append(f"Erro ao criar categoria {category_spec['name']}: {str(outcome)}")
+                    continue
+                categories_by_name[category_spec['name']] = outcome
+                results['created']['categories'] += 1
+                new_keys.add(category_spec['key'])
+        
+        operations = []
+        pending = []
+        managed_channel_ids = set()
+        
+        for category_spec in spec:
+            category = categories_by_name.get(category_spec['name'])
+            if category is None:
+                continue
+            self.created_channels[category_spec['key']] = category
+            private = category_spec.get('private', False)
+            
+            # 2) Permissões da categoria
+            desired = build_overwrites(guild, private=private)
+            if category_spec['key'] not in new_keys:
+                if category.overwrites_for(everyone) != desired.get(everyone, discord.PermissionOverwrite()):
+                    overwrites = self._desired_overwrites(category, guild, desired)
+                    operations.append((
+                        ("channel", category.id), f"atualizar {category.name}",
+                        lambda c=category, o=overwrites: c.edit(overwrites=o, reason="Reconciliação do template da loja")
+                    ))
+                    pending.append(("update_category", category_spec))
+            
+            existing_by_name = {channel.name: channel for channel in category.channels}
+            
+            for position, channel_spec in enumerate(category_spec.get('channels', [])):
+                channel = existing_by_name.get(channel_spec['name'])
+                desired = build_overwrites(guild, read_only=channel_spec.get('read_only', False), private=private)
+                
+                if channel is None or not self._channel_matches_type(channel, channel_spec):
+                    # 3) Canais que faltam
+                    if channel_spec.get('type', 'text') == 'voice':
+                        factory = lambda c=channel_spec, cat=category, o=desired, p=position: guild.create_voice_channel(
+                            c['name'], category=cat, overwrites=o, position=p
+                        )
+                    else:
+                        factory = lambda c=channel_spec, cat=category, o=desired, p=position: guild.create_text_channel(
+                            c['name'], category=cat, overwrites=o, position=p, topic=c.get('topic')
+                        )
+                    operations.append((guild_bucket, f"canal {channel_spec['name']}", factory))
+                    pending.append(("create_channel", channel_spec))
+                    continue
+                
+                managed_channel_ids.add(channel.id)
+                self.created_channels[channel_spec['key']] = channel
+                
+                # 4) Tópico e permissões alterados viram uma única edição
+                changes = {}
+                if channel_spec.get('type', 'text') == 'text' and (channel.topic or None) != (channel_spec.get('topic') or None):
+                    changes['topic'] = channel_spec.get('topic') or ''
+                if channel.overwrites_for(everyone) != desired.get(everyone, discord.PermissionOverwrite()):
+                    changes['overwrites'] = self._desired_overwrites(channel, guild, desired)
+                
+                if changes:
+                    operations.append((
+                        ("channel", channel.id), f"atualizar {channel.name}",
+                        lambda c=channel, kw=changes: c.edit(reason="Reconciliação do template da loja", **kw)
+                    ))
+                    pending.append(("update_channel", channel_spec))
+                else:
+                    results['unchanged'] += 1
+        
+        # 5) Extras (opcional): canais não descritos nas categorias gerenciadas, canais sem categoria
+        # e categorias fora do template. Canais protegidos (e suas categorias) ficam.
+        if delete_extras:
+            template_names = {c['name'] for c in spec}
+            for category, channels in guild.by_category():
+                managed = category is not None and category.name in template_names
+                kept = False
+                for channel in channels:
+                    if managed and channel.id in managed_channel_ids:
+                        continue
+                    if channel.id in protected or self._is_preserved(channel.name, template):
+                        kept = True
+                        continue
+                    operations.append((
+                        ("channel", channel.id), f"deletar {channel.name}",
+                        lambda c=channel: c.delete(reason="Canal fora do template da loja")
+                    ))
+                    pending.append(("delete_channel", channel))
+                if category is not None and not managed and not kept and category.id not in protected:
+                    operations.append((
+                        ("channel", category.id), f"deletar {category.name}",
+                        lambda c=category: c.delete(reason="Categoria fora do template da loja")
+                    ))
+                    pending.append(("delete_category", category))
+        
+        if not operations:
+            return new_keys
+        
+        executor.add_steps(len(operations))
+        outcomes = await executor.run_all(operations)
+        
+        for (action, item), outcome in zip(pending, outcomes):
+            label = item['name'] if isinstance(item, dict) else item.name
+            if isinstance(outcome, Exception):
+                results['errors'].append(f"Erro ao aplicar '{action}' em {label}: {str(outcome)}")
+                continue
+            if action == "create_channel":
+                self.created_channels[item['key']] = outcome
+                results['created']['channels'] += 1
+                new_keys.add(item['key'])
+            elif action == "update_channel":
+                results['updated']['channels'] += 1
+            elif action == "update_category":
+                results['updated']['categories'] += 1
+            elif action == "delete_channel":
+                results['deleted']['channels'] += 1
+            elif action == "delete_category":
+                results['deleted']['categories'] += 1
+        
+        return new_keys
+    
+    async def _setup_panels(self, guild: discord.Guild, results: dict, executor: BuildExecutor = None, only_keys=None):
+        """Configura painéis e mensagens nos canais
+        
+        Args:
+            only_keys: se informado, envia apenas os painéis desses canais (ex.: recém-criados na reconciliação)
+        """
         
         # Importar TicketCreateView do módulo bot
         import sys
@@ -316,6 +351,12 @@ class LojaBuilder:
         if current_dir not in sys.path:
             sys.path.insert(0, current_dir)
         
+        if executor is None:
+            executor = BuildExecutor()
+        
+        # Cada painel vai para um canal diferente: as mensagens são enviadas em paralelo no final
+        panel_messages = []
+        
         # ==================== PAINEL: BOAS-VINDAS ====================
         if 'welcome' in self.created_channels:
             embed = discord.Embed(
@@ -344,8 +385,7 @@ class LojaBuilder:
             embed.set_thumbnail(url=guild.icon.url if guild.icon else None)
             embed.set_footer(text=f"Servidor: {guild.name}")
             
-            await self.created_channels['welcome'].send(embed=embed)
-            results['created']['messages'] += 1
+            panel_messages.append(('welcome', dict(embed=embed)))
         
         # ==================== PAINEL: REGRAS ====================
         if 'rules' in self.created_channels:
@@ -391,8 +431,7 @@ class LojaBuilder:
             )
             embed.set_footer(text="Ao permanecer no servidor, você concorda com as regras.")
             
-            await self.created_channels['rules'].send(embed=embed)
-            results['created']['messages'] += 1
+            panel_messages.append(('rules', dict(embed=embed)))
         
         # ==================== PAINEL: TICKETS ====================
         if 'ticket' in self.created_channels:
@@ -418,8 +457,7 @@ class LojaBuilder:
             embed.set_footer(text="Atendimento disponível 24/7")
             
             view = TicketCreateView(self.bot)
-            await self.created_channels['ticket'].send(embed=embed, view=view)
-            results['created']['messages'] += 1
+            panel_messages.append(('ticket', dict(embed=embed, view=view)))
         
         # ==================== PAINEL: FAQ ====================
         if 'faq' in self.created_channels:
@@ -459,8 +497,7 @@ class LojaBuilder:
                 inline=False
             )
             
-            await self.created_channels['faq'].send(embed=embed)
-            results['created']['messages'] += 1
+            panel_messages.append(('faq', dict(embed=embed)))
         
         # ==================== PAINEL: INFORMAÇÕES ====================
         if 'info' in self.created_channels:
@@ -490,8 +527,7 @@ class LojaBuilder:
                 inline=False
             )
             
-            await self.created_channels['info'].send(embed=embed)
-            results['created']['messages'] += 1
+            panel_messages.append(('info', dict(embed=embed)))
         
         # ==================== PAINEL: CONTAS ====================
         if 'accounts' in self.created_channels:
@@ -514,8 +550,23 @@ class LojaBuilder:
             )
             embed.set_footer(text="Estoque atualizado diariamente")
             
-            await self.created_channels['accounts'].send(embed=embed)
-            results['created']['messages'] += 1
+            panel_messages.append(('accounts', dict(embed=embed)))
+        
+        if only_keys is not None:
+            panel_messages = [(key, kwargs) for key, kwargs in panel_messages if key in only_keys]
+        
+        executor.add_steps(len(panel_messages))
+        operations = [
+            (("channel", self.created_channels[key].id), f"painel {key}",
+             lambda key=key, kwargs=kwargs: self.created_channels[key].send(**kwargs))
+            for key, kwargs in panel_messages
+        ]
+        outcomes = await executor.run_all(operations)
+        for (key, _), outcome in zip(panel_messages, outcomes):
+            if isinstance(outcome, Exception):
+                results['errors'].append(f"Erro ao enviar painel '{key}': {str(outcome)}")
+            else:
+                results['created']['messages'] += 1
         
         logger.info(f"✅ Painéis configurados: {results['created']['messages']} mensagens enviadas")
         
@@ -525,36 +576,22 @@ class LojaBuilder:
     async def _save_channel_config(self, guild: discord.Guild):
         """Salva os IDs dos canais criados para auto-detecção"""
         try:
-            # Buscar categoria de atendimento
-            support_category = None
-            for category in guild.categories:
-                if 'atendimento' in category.name.lower():
-                    support_category = category
-                    break
-            
-            # Buscar canal de logs (staff)
-            log_channel = None
-            for channel in guild.text_channels:
-                if 'logs' in channel.name.lower():
-                    log_channel = channel
-                    break
+            # Categoria de atendimento e canal de logs pelo índice de nomes (recém-criados: índice refeito)
+            channel_resolver.invalidate_guild(guild.id)
+            detected = channel_resolver.detect(guild)
             
             config = {
                 "ticket_channel_id": self.created_channels.get('ticket').id if 'ticket' in self.created_channels else 0,
-                "ticket_category_id": support_category.id if support_category else 0,
-                "log_channel_id": log_channel.id if log_channel else 0,
+                "ticket_category_id": detected["ticket_category_id"],
+                "log_channel_id": detected["log_channel_id"],
                 "announcements_channel_id": self.created_channels.get('announcements').id if 'announcements' in self.created_channels else 0,
                 "accounts_channel_id": self.created_channels.get('accounts').id if 'accounts' in self.created_channels else 0,
                 "welcome_channel_id": self.created_channels.get('welcome').id if 'welcome' in self.created_channels else 0
             }
             
-            with open('channel_config.json', 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+            channel_resolver.update(config)
             
             logger.info(f"✅ Configuração de canais salva: {config}")
             
         except Exception as e:
             logger.error(f"❌ Erro ao salvar configuração de canais: {e}")
-        
-        # Salvar IDs dos canais importantes para auto-detecção
-        await self._save_channel_config(guild)
@@ -0,0 +1,194 @@
+"""
+Watchdog do event loop
+Uma tarefa marca batimentos no loop; uma thread verifica os batimentos e, quando o loop
+fica travado além do limite, captura a pilha do código que está bloqueando
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from metrics import EVENT_LOOP_LAG, EVENT_LOOP_LAG_HISTOGRAM
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class LoopWatchdog:
+    """Detecta travamentos do event loop e atribui o bloqueio ao código responsável"""
+
+    MAX_RECENT_STALLS = 50
+    MAX_OFFENDERS = 100
+
+    def __init__(self, threshold_seconds: float = 0.25, heartbeat_interval: float = 0.1,
+                 sample_interval: float = 0.05):
+        self.threshold = threshold_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.sample_interval = sample_interval
+
+        self.heartbeat_task = None
+        self.sampler_thread = None
+        self._loop = None
+        self._loop_thread_id = None
+        self._last_beat = time.monotonic()
+        self._lock = threading.Lock()
+
+        self._current_stall = None
+        self.offenders = {}
+        self.recent_stalls = deque(maxlen=self.MAX_RECENT_STALLS)
+        self.max_lag = 0.0
+        self.total_stalls = 0
+
+    # ==================== CICLO DE VIDA ====================
+
+    def start(self):
+        """Inicia o watchdog no loop atual (idempotente; reinicia em um loop novo)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self.heartbeat_task and not self.heartbeat_task.done():
+            return
+
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self.heartbeat_task = loop.create_task(self._heartbeat())
+
+        if self.sampler_thread is None or not self.sampler_thread.is_alive():
+            self.sampler_thread = threading.Thread(target=self._sampler, name="loop-watchdog", daemon=True)
+            self.sampler_thread.start()
+
+        logger.info(f"🐶 Watchdog do event loop ativo (limite {int(self.threshold * 1000)}ms)")
+
+    async def _heartbeat(self):
+        """Roda no loop: mede o atraso de cada sleep e registra o batimento"""
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.heartbeat_interval)
+            now = time.monotonic()
+            lag = max(0.0, now - start - self.heartbeat_interval)
+            self._last_beat = now
+            EVENT_LOOP_LAG.set(lag)
+            EVENT_LOOP_LAG_HISTOGRAM.observe(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
+
+    # ==================== AMOSTRAGEM ====================
+
+    def _sampler(self):
+        """Roda em thread própria: enquanto o loop não bate, captura a pilha da thread do loop"""
+        while True:
+            time.sleep(self.sample_interval)
+            try:
+                if not self._loop_alive():
+                    # Loop parado ou fechado (reinício do main() ou desligamento): não é travamento
+                    self._current_stall = None
+                    continue
+                stalled_for = time.monotonic() - self._last_beat - self.heartbeat_interval
+                if stalled_for >= self.threshold:
+                    self._sample(stalled_for)
+                elif self._current_stall is not None:
+                    self._finish_stall()
+            except Exception as e:
+                logger.debug(f"Erro no watchdog do loop: {e}")
+
+    def _loop_alive(self) -> bool:
+        """True enquanto o loop monitorado roda com a tarefa de batimentos ativa"""
+        loop, task = self._loop, self.heartbeat_task
+        return loop is not None and loop.is_running() and task is not None and not task.done()
+
+    def _sample(self, stalled_for: float):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        stack = traceback.extract_stack(frame)
+        del frame
+
+        if self._current_stall is None:
+            self._current_stall = {
+                "started_at": time.time() - stalled_for,
+                "duration": stalled_for,
+                "samples": {}
+            }
+        stall = self._current_stall
+        stall["duration"] = stalled_for
+
+        # Conta em qual trecho do nosso código o loop estava a cada amostra
+        location = self._attribute(stack)
+        entry = stall["samples"].setdefault(location, {"count": 0, "stack": None})
+        entry["count"] += 1
+        entry["stack"] = stack
+
+    @staticmethod
+    def _attribute(stack) -> str:
+        """Frame mais interno que pertence ao projeto (ou o mais interno de todos)"""
+        for frame in reversed(stack):
+            filename = os.path.abspath(frame.filename)
+            if filename.startswith(PROJECT_DIR) and filename != os.path.abspath(__file__):
+                return f"{os.path.relpath(filename, PROJECT_DIR)}:{frame.lineno} em {frame.name}"
+        frame = stack[-1]
+        return f"{os.path.basename(frame.filename)}:{frame.lineno} em {frame.name}"
+
+    @staticmethod
+    def _callback_frames(stack, limit: int = 12):
+        """Descarta os frames do próprio asyncio: a pilha começa no callback que bloqueou"""
+        start = 0
+        for index, frame in enumerate(stack):
+            if frame.filename.endswith(os.path.join("asyncio", "events.py")):
+                start = index + 1
+        return stack[start:][-limit:]
+
+    def _finish_stall(self):
+        stall, self._current_stall = self._current_stall, None
+        location, sample = max(stall["samples"].items(), key=lambda item: item[1]["count"])
+        formatted_stack = "".join(traceback.format_list(self._callback_frames(sample["stack"])))
+        duration = round(stall["duration"], 3)
+
+        with self._lock:
+            self.total_stalls += 1
+            offender = self.offenders.get(location)
+            if offender is None:
+                if len(self.offenders) >= self.MAX_OFFENDERS:
+                    least = min(self.offenders, key=lambda key: self.offenders[key]["total_seconds"])
+                    del self.offenders[least]
+                offender = self.offenders[location] = {
+                    "location": location,
+                    "count": 0,
+                    "total_seconds": 0.0,
+                    "max_seconds": 0.0,
+                    "last_seen": None,
+                    "last_stack": ""
+                }
+            offender["count"] += 1
+            offender["total_seconds"] += duration
+            offender["max_seconds"] = max(offender["max_seconds"], duration)
+            offender["last_seen"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+            offender["last_stack"] = formatted_stack
+
+            self.recent_stalls.append({
+                "location": location,
+                "duration_seconds": duration,
+                "started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(stall["started_at"]))
+            })
+
+        logger.warning(f"🐢 Event loop travado por {duration * 1000:.0f}ms em {location}\n{formatted_stack}")
+
+    # ==================== RELATÓRIO ====================
+
+    def get_report(self, top: int = 10):
+        """Principais responsáveis pelos travamentos e os travamentos recentes"""
+        with self._lock:
+            offenders = sorted(self.offenders.values(), key=lambda o: o["total_seconds"], reverse=True)[:top]
+            offenders = [{**o, "total_seconds": round(o["total_seconds"], 3)} for o in offenders]
+            recent = list(self.recent_stalls)[-top:]
+        return {
+            "running": bool(self.heartbeat_task and not self.heartbeat_task.done()),
+            "threshold_ms": int(self.threshold * 1000),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "total_stalls": self.total_stalls,
+            "top_offenders": offenders,
+            "recent_stalls": recent
+        }
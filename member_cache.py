@@ -0,0 +1,95 @@
+"""
+Resolução de membros sem chamadas REST desnecessárias
+Ordem: cache do gateway (get_member) -> cache local com TTL -> fetch_member (uma chamada por ID por vez)
+"""
+import asyncio
+import time
+from collections import OrderedDict
+
+import discord
+
+from metrics import registry
+
+MEMBER_LOOKUPS = registry.counter(
+    "ibot_member_lookups_total", "Buscas de membros por origem da resposta", ("source",)
+)
+
+SOURCES = ("gateway", "cache", "inflight", "rest", "not_found", "error")
+
+
+class MemberResolver:
+    """Busca membros priorizando caches e deduplicando chamadas REST simultâneas"""
+
+    def __init__(self, ttl_seconds: float = 300, max_size: int = 1000):
+        self.ttl = ttl_seconds
+        self.max_size = max_size
+        self.cache = OrderedDict()   # (guild_id, user_id) -> (membro, expira_em)
+        self.inflight = {}           # (guild_id, user_id) -> task do fetch_member
+        self.counts = dict.fromkeys(SOURCES, 0)
+
+    def _record(self, source: str):
+        self.counts[source] += 1
+        MEMBER_LOOKUPS.inc(source=source)
+
+    async def resolve(self, guild, user_id: int):
+        """Mesmo contrato de guild.fetch_member: levanta discord.NotFound se o membro não existir"""
+        user_id = int(user_id)
+        member = guild.get_member(user_id)
+        if member is not None:
+            self._record("gateway")
+            return member
+
+        key = (guild.id, user_id)
+        cached = self.cache.get(key)
+        if cached is not None:
+            if cached[1] > time.monotonic():
+                self.cache.move_to_end(key)
+                self._record("cache")
+                return cached[0]
+            del self.cache[key]
+
+        task = self.inflight.get(key)
+        if task is not None:
+            self._record("inflight")
+            return await asyncio.shield(task)
+
+        task = asyncio.get_running_loop().create_task(self._fetch(guild, key))
+        self.inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _fetch(self, guild, key):
+        try:
+            member = await guild.fetch_member(key[1])
+        except discord.NotFound:
+            self._record("not_found")
+            raise
+        except Exception:
+            self._record("error")
+            raise
+        finally:
+            self.inflight.pop(key, None)
+
+        self._record("rest")
+        self.cache[key] = (member, time.monotonic() + self.ttl)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+        return member
+
+    def invalidate(self, guild_id: int, user_id: int):
+        """Remove o membro do cache (ex.: depois de ban/kick)"""
+        self.cache.pop((guild_id, int(user_id)), None)
+
+    def get_status(self):
+        lookups = sum(self.counts.values())
+        avoided = self.counts["gateway"] + self.counts["cache"] + self.counts["inflight"]
+        return {
+            "cached": len(self.cache),
+            "inflight": len(self.inflight),
+            "lookups": lookups,
+            "by_source": dict(self.counts),
+            "rest_avoided_ratio": round(avoided / lookups, 3) if lookups else None
+        }
+
+
+member_resolver = MemberResolver()
@@ -0,0 +1,314 @@
+"""
+Métricas no formato de texto do Prometheus
+Contadores, gauges e histogramas em memória, baratos o suficiente para ficar sempre ligados
+"""
+import functools
+import logging
+import math
+import re
+import threading
+import time
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    TYPE = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict):
+        if not self.labelnames:
+            return ()
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self):
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Valor que só cresce (ex.: chamadas REST)"""
+    TYPE = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """Valor instantâneo; pode ser lido de uma função apenas na hora da coleta"""
+    TYPE = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self._function = function
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function):
+        """function() -> número (sem labels) ou {tupla_de_labels: número}"""
+        self._function = function
+
+    def _samples(self):
+        if self._function is not None:
+            try:
+                result = self._function()
+            except Exception as e:
+                logger.debug(f"Erro ao coletar gauge {self.name}: {e}")
+                return []
+            items = result.items() if isinstance(result, dict) else [((), result)]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items if value is not None
+        ]
+
+
+class Histogram(_Metric):
+    """Distribuição de durações em buckets fixos"""
+    TYPE = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels):
+        """Context manager que observa o tempo do bloco"""
+        return _Timer(self, labels)
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items()]
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Conjunto de métricas exportadas em /metrics"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), function=None):
+        return self._register(Gauge(name, documentation, labelnames, function))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# ==================== MÉTRICAS COMPARTILHADAS ====================
+
+HANDLER_LATENCY = registry.histogram(
+    "ibot_handler_duration_seconds", "Duração de comandos e interações", ("kind", "handler")
+)
+HANDLER_ERRORS = registry.counter(
+    "ibot_handler_errors_total", "Exceções não tratadas em comandos e interações", ("kind", "handler")
+)
+STORAGE_SAVE_SECONDS = registry.histogram(
+    "ibot_storage_save_duration_seconds", "Duração das gravações em disco por armazenamento", ("store",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+REST_REQUESTS = registry.counter(
+    "ibot_discord_rest_requests_total", "Chamadas REST ao Discord por rota", ("method", "route")
+)
+REST_ERRORS = registry.counter(
+    "ibot_discord_rest_errors_total", "Chamadas REST ao Discord que falharam", ("method", "route", "status")
+)
+REST_RATE_LIMITED = registry.counter(
+    "ibot_discord_rest_rate_limited_total", "Respostas 429 recebidas do Discord", ("method", "route")
+)
+EVENT_LOOP_LAG = registry.gauge(
+    "ibot_event_loop_lag_seconds", "Atraso do event loop na última medição"
+)
+EVENT_LOOP_LAG_HISTOGRAM = registry.histogram(
+    "ibot_event_loop_lag_distribution_seconds", "Distribuição do atraso do event loop",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "ibot_http_request_duration_seconds", "Duração das requisições do painel/API por rota", ("method", "route", "status")
+)
+
+
+# ==================== INSTRUMENTAÇÃO ====================
+
+def observe_handler(name: str, kind: str = "interaction"):
+    """Decorator para corrotinas: mede duração e conta exceções do handler"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                HANDLER_ERRORS.inc(kind=kind, handler=name)
+                raise
+            finally:
+                HANDLER_LATENCY.observe(time.perf_counter() - start, kind=kind, handler=name)
+        return wrapper
+    return decorator
+
+
+def timed_save(store: str):
+    """Decorator para funções de gravação síncronas"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                STORAGE_SAVE_SECONDS.observe(time.perf_counter() - start, store=store)
+        return wrapper
+    return decorator
+
+
+_SNOWFLAKE_REGEX = re.compile(r'/\d{15,22}')
+
+
+def _normalize_url(url: str) -> str:
+    """Troca IDs por {id} para não criar uma série por canal/mensagem"""
+    path = url.split('/api/v', 1)[-1]
+    path = path.split('/', 1)[-1] if '/' in path else path
+    return _SNOWFLAKE_REGEX.sub('/{id}', '/' + path.split('?', 1)[0])
+
+
+class _RateLimitLogFilter(logging.Filter):
+    """Conta os 429 que o discord.py trata internamente (ele só registra um aviso)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if isinstance(record.msg, str) and record.msg.startswith('We are being rate limited') and record.args:
+            method, url = record.args[0], record.args[1]
+            REST_RATE_LIMITED.inc(method=method, route=_normalize_url(str(url)))
+        return True
+
+
+def instrument_discord_http(bot):
+    """Envolve bot.http.request para contar chamadas REST por rota (uma vez por processo)"""
+    http = bot.http
+    if getattr(http, "_ibot_instrumented", False):
+        return
+
+    original_request = http.request
+
+    async def request(route, **kwargs):
+        REST_REQUESTS.inc(method=route.method, route=route.path)
+        try:
+            return await original_request(route, **kwargs)
+        except Exception as e:
+            status = getattr(e, 'status', None)
+            if status is not None:
+                REST_ERRORS.inc(method=route.method, route=route.path, status=status)
+                if status == 429:
+                    REST_RATE_LIMITED.inc(method=route.method, route=route.path)
+            raise
+
+    http.request = request
+    http._ibot_instrumented = True
+
+    http_logger = logging.getLogger('discord.http')
+    if not any(isinstance(f, _RateLimitLogFilter) for f in http_logger.filters):
+        http_logger.addFilter(_RateLimitLogFilter())
+
@@ -3,58 +3,240 @@ from discord.ui import View, Button, Select, Modal, TextInput
 from discord import SelectOption
 import json
 import os
-from datetime import datetime, timedelta
+import re
+import sys
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Optional
 import asyncio
+import threading
+from collections import Counter
+from metrics import observe_handler, timed_save
+from member_cache import member_resolver
+from job_tracker import job_tracker
+from purge_engine import PurgeFilter, purge_channel
+
+class Punishment(NamedTuple):
+    """Uma linha do histórico (tupla: bem menor que um dict por registro)"""
+    timestamp: float
+    guild_id: int
+    user_id: int
+    type: str
+    reason: str
+    moderator_id: int
+    duration: Optional[str]
+    
+    def to_dict(self, seq: int = None) -> dict:
+        data = {
+            "type": self.type,
+            "reason": self.reason,
+            "moderator_id": self.moderator_id,
+            "timestamp": datetime.fromtimestamp(self.timestamp, timezone.utc).isoformat(),
+            "duration": self.duration
+        }
+        if seq is not None:
+            data["seq"] = seq
+        return data
+
 
 class PunishmentManager:
     """Gerenciador de punições do servidor"""
     
     def __init__(self):
-        self.punishments_file = "punishments.json"
-        self.punishments = self.load_punishments()
+        self.punishments_file = "punishments.json"  # formato antigo, migrado na primeira carga
+        self.log_file = "punishments.log.jsonl"
+        # Registros em ordem de tempo; a posição na lista é o cursor da paginação
+        self.records = []
+        # (guild_id, user_id) -> posições dos registros do usuário em self.records
+        self.user_index = {}
+        # Estatísticas mantidas a cada punição (uma passada só na carga)
+        self.stats = {}
+        # A trava protege a leitura pela API, que roda na thread do Flask
+        self._lock = threading.Lock()
+        # O histórico só é lido no primeiro uso (ou no warm_up durante a conexão do bot)
+        self._loaded = False
+        self._load_lock = threading.Lock()
+    
+    def warm_up(self):
+        """Carrega o histórico se ainda não foi carregado (idempotente; pode rodar em outra thread)"""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self.load_punishments()
+                self._loaded = True
     
     def load_punishments(self):
-        """Carrega histórico de punições"""
-        if os.path.exists(self.punishments_file):
-            with open(self.punishments_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
-    
-    def save_punishments(self):
-        """Salva histórico de punições"""
-        with open(self.punishments_file, 'w', encoding='utf-8') as f:
-            json.dump(self.punishments, f, indent=2, ensure_ascii=False)
+        """Carrega o log de punições (migrando o punishments.json antigo, se existir)"""
+        if not os.path.exists(self.log_file) and os.path.exists(self.punishments_file):
+            self._migrate_legacy_file()
+        
+        if not os.path.exists(self.log_file):
+            return
+        with open(self.log_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    # Última linha incompleta (queda durante a escrita)
+                    continue
+                self._index(Punishment(*row))
+    
+    def _migrate_legacy_file(self):
+        """Converte guild -> usuário -> lista em linhas ordenadas por tempo"""
+        with open(self.punishments_file, 'r', encoding='utf-8') as f:
+            legacy = json.load(f)
+        
+        rows = []
+        for guild_key, users in legacy.items():
+            for user_key, user_punishments in users.items():
+                for p in user_punishments:
+                    # O arquivo antigo gravava datetime.now() (hora local, sem fuso)
+                    timestamp = datetime.fromisoformat(p["timestamp"]).astimezone().timestamp()
+                    rows.append([timestamp, int(guild_key), int(user_key), p["type"], p["reason"],
+                                 p["moderator_id"], p.get("duration")])
+        rows.sort(key=lambda row: row[0])
+        
+        with open(self.log_file, 'w', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        os.replace(self.punishments_file, self.punishments_file + ".migrated")
+    
+    def _index(self, record: Punishment):
+        """Adiciona o registro à lista, ao índice por usuário e às estatísticas"""
+        # Poucos tipos distintos: a mesma string é compartilhada por todos os registros
+        record = record._replace(type=sys.intern(record.type))
+        with self._lock:
+            seq = len(self.records)
+            self.records.append(record)
+            positions = self.user_index.get((record.guild_id, record.user_id))
+            if positions is None:
+                positions = self.user_index[(record.guild_id, record.user_id)] = array('L')
+            positions.append(seq)
+            self._count(record)
+        return seq
+    
+    @timed_save("punishments")
+    def _append_rows(self, records):
+        """Grava os registros no fim do log (sem regravar o histórico)"""
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.write("".join(json.dumps(list(record), ensure_ascii=False) + "\n" for record in records))
     
     def add_punishment(self, guild_id: int, user_id: int, punishment_type: str, reason: str, moderator_id: int, duration: str = None):
         """Adiciona uma punição ao histórico"""
-        guild_key = str(guild_id)
-        user_key = str(user_id)
+        self.warm_up()
+        record = Punishment(
+            datetime.now(timezone.utc).timestamp(), int(guild_id), int(user_id),
+            punishment_type, reason, moderator_id, duration
+        )
+        self._append_rows([record])
+        self._index(record)
+    
+    def add_punishments(self, entries):
+        """
+        Adiciona várias punições com uma única gravação.
+        entries: (guild_id, user_id, tipo, motivo, moderator_id, duração)
+        """
+        self.warm_up()
+        now = datetime.now(timezone.utc).timestamp()
+        records = [
+            Punishment(now, int(guild_id), int(user_id), punishment_type, reason, moderator_id, duration)
+            for guild_id, user_id, punishment_type, reason, moderator_id, duration in entries
+        ]
+        if not records:
+            return
+        self._append_rows(records)
+        for record in records:
+            self._index(record)
+    
+    def _count(self, record: Punishment):
+        """Atualiza contadores por tipo, por moderador e por dia"""
+        stats = self.stats.get(record.guild_id)
+        if stats is None:
+            stats = self.stats[record.guild_id] = {
+                "by_type": Counter(), "by_moderator": Counter(), "daily": {}, "daily_moderators": {}
+            }
+        stats["by_type"][record.type] += 1
+        stats["by_moderator"][str(record.moderator_id)] += 1
+        day = datetime.fromtimestamp(record.timestamp, timezone.utc).date().isoformat()
+        daily = stats["daily"].get(day)
+        if daily is None:
+            daily = stats["daily"][day] = Counter()
+        daily[record.type] += 1
+        daily_moderators = stats["daily_moderators"].get(day)
+        if daily_moderators is None:
+            daily_moderators = stats["daily_moderators"][day] = Counter()
+        daily_moderators[str(record.moderator_id)] += 1
+    
+    def get_stats(self, guild_id: int, days: int = None, top_moderators: int = 10):
+        """
+        Totais por tipo e moderadores mais ativos.
+        Com days, os totais por tipo, os moderadores e a série diária cobrem só os últimos N dias (UTC).
+        """
+        self.warm_up()
+        with self._lock:
+            return self._summarize(self.stats.get(int(guild_id)), days, top_moderators)
+    
+    @staticmethod
+    def _summarize(stats, days, top_moderators):
+        if stats is None:
+            return {"by_type": {}, "by_moderator": [], "daily": []}
         
-        if guild_key not in self.punishments:
-            self.punishments[guild_key] = {}
+        def top(counter):
+            return [
+                {"moderator_id": moderator_id, "count": count}
+                for moderator_id, count in counter.most_common(top_moderators)
+            ]
         
-        if user_key not in self.punishments[guild_key]:
-            self.punishments[guild_key][user_key] = []
+        if days is None:
+            return {"by_type": dict(stats["by_type"]), "by_moderator": top(stats["by_moderator"]), "daily": []}
         
-        punishment = {
-            "type": punishment_type,
-            "reason": reason,
-            "moderator_id": moderator_id,
-            "timestamp": datetime.utcnow().isoformat(),
-            "duration": duration
-        }
-        
-        self.punishments[guild_key][user_key].append(punishment)
-        self.save_punishments()
+        # Percorre só os dias pedidos, não o histórico
+        today = datetime.now(timezone.utc).date()
+        by_type = Counter()
+        by_moderator = Counter()
+        series = []
+        for offset in range(days - 1, -1, -1):
+            day = (today - timedelta(days=offset)).isoformat()
+            counts = stats["daily"].get(day, {})
+            by_type.update(counts)
+            by_moderator.update(stats["daily_moderators"].get(day, {}))
+            series.append({"date": day, **counts})
+        return {"by_type": dict(by_type), "by_moderator": top(by_moderator), "daily": series}
+    
+    def count_user_punishments(self, guild_id: int, user_id: int) -> int:
+        """Quantidade de punições do usuário (sem montar a lista)"""
+        self.warm_up()
+        return len(self.user_index.get((int(guild_id), int(user_id)), ()))
+    
+    def get_user_history(self, guild_id: int, user_id: int, limit: int = 20, before: int = None):
+        """
+        Página do histórico do usuário, mais recentes primeiro.
+        before: seq do último registro da página anterior (cursor); None começa do mais recente.
+        Retorna (registros, próximo cursor ou None se não houver mais).
+        """
+        self.warm_up()
+        with self._lock:
+            positions = self.user_index.get((int(guild_id), int(user_id)))
+            if not positions:
+                return [], None
+            end = bisect_left(positions, before) if before is not None else len(positions)
+            start = max(0, end - limit)
+            page = [(seq, self.records[seq]) for seq in reversed(positions[start:end])]
+        next_cursor = page[-1][0] if page and start > 0 else None
+        return [record.to_dict(seq) for seq, record in page], next_cursor
     
     def get_user_punishments(self, guild_id: int, user_id: int):
-        """Obtém o histórico de punições de um usuário"""
-        guild_key = str(guild_id)
-        user_key = str(user_id)
-        
-        if guild_key in self.punishments and user_key in self.punishments[guild_key]:
-            return self.punishments[guild_key][user_key]
-        return []
+        """Obtém o histórico completo de punições de um usuário (mais antigas primeiro)"""
+        self.warm_up()
+        with self._lock:
+            positions = self.user_index.get((int(guild_id), int(user_id)), ())
+            records = [self.records[seq] for seq in positions]
+        return [record.to_dict() for record in records]
 
 # Instância global
 punishment_manager = PunishmentManager()
@@ -85,6 +267,7 @@ class BanModal(Modal, title="🔨 Banir Usuário"):
         max_length=1
     )
     
+    @observe_handler("mod_ban")
     async def on_submit(self, interaction: discord.Interaction):
         try:
             user_id = int(self.user_id.value)
@@ -93,8 +276,9 @@ class BanModal(Modal, title="🔨 Banir Usuário"):
             if delete_days_int < 0 or delete_days_int > 7:
                 delete_days_int = 0
             
-            user = await interaction.guild.fetch_member(user_id)
+            user = await member_resolver.resolve(interaction.guild, user_id)
             await interaction.guild.ban(user, reason=self.reason.value, delete_message_days=delete_days_int)
+            member_resolver.invalidate(interaction.guild.id, user_id)
             
             # Registrar punição
             punishment_manager.add_punishment(
@@ -132,11 +316,13 @@ class KickModal(Modal, title="👢 Expulsar Usuário"):
         max_length=500
     )
     
+    @observe_handler("mod_kick")
     async def on_submit(self, interaction: discord.Interaction):
         try:
             user_id = int(self.user_id.value)
-            user = await interaction.guild.fetch_member(user_id)
+            user = await member_resolver.resolve(interaction.guild, user_id)
             await interaction.guild.kick(user, reason=self.reason.value)
+            member_resolver.invalidate(interaction.guild.id, user_id)
             
             punishment_manager.add_punishment(
                 interaction.guild.id, user_id, "kick",
@@ -173,10 +359,11 @@ class WarnModal(Modal, title="⚠️ Avisar Usuário"):
         max_length=500
     )
     
+    @observe_handler("mod_warn")
     async def on_submit(self, interaction: discord.Interaction):
         try:
             user_id = int(self.user_id.value)
-            user = await interaction.guild.fetch_member(user_id)
+            user = await member_resolver.resolve(interaction.guild, user_id)
             
             punishment_manager.add_punishment(
                 interaction.guild.id, user_id, "warn",
@@ -208,28 +395,88 @@ class WarnModal(Modal, title="⚠️ Avisar Usuário"):
 
 class ClearModal(Modal, title="🗑️ Limpar Mensagens"):
     amount = TextInput(
-        label="Quantidade (1-100)",
-        placeholder="Digite a quantidade de mensagens...",
+        label="Quantidade (1-1000)",
+        placeholder="Máximo de mensagens a apagar...",
         required=True,
-        max_length=3
+        max_length=4
+    )
+    
+    author_ids = TextInput(
+        label="Autores (IDs, opcional)",
+        placeholder="IDs separados por vírgula",
+        required=False,
+        max_length=200
+    )
+    
+    pattern = TextInput(
+        label="Conteúdo (regex, opcional)",
+        placeholder="Ex.: free nitro|discord\\.gift",
+        required=False,
+        max_length=200
     )
     
+    only = TextInput(
+        label="Somente (links / anexos, opcional)",
+        placeholder="links ou anexos",
+        required=False,
+        max_length=10
+    )
+    
+    hours = TextInput(
+        label="Últimas horas (opcional)",
+        placeholder="Ex.: 2 para apagar só as últimas 2 horas",
+        required=False,
+        max_length=4
+    )
+    
+    @observe_handler("mod_clear")
     async def on_submit(self, interaction: discord.Interaction):
         try:
             amount = int(self.amount.value)
-            if amount < 1 or amount > 100:
-                await interaction.response.send_message("❌ Quantidade deve ser entre 1 e 100!", ephemeral=True)
+            if amount < 1 or amount > 1000:
+                await interaction.response.send_message("❌ Quantidade deve ser entre 1 e 1000!", ephemeral=True)
                 return
             
-            await interaction.response.defer(ephemeral=True)
-            deleted = await interaction.channel.purge(limit=amount)
-            
-            await interaction.followup.send(f"✅ {len(deleted)} mensagens deletadas!", ephemeral=True)
-            
+            only = (self.only.value or "").strip().lower()
+            hours = float(self.hours.value) if self.hours.value else None
+            purge_filter = PurgeFilter(
+                author_ids=[a for a in (self.author_ids.value or "").replace(" ", "").split(",") if a],
+                pattern=self.pattern.value or None,
+                links_only=only.startswith("link"),
+                attachments_only=only.startswith("anexo"),
+                after=discord.utils.utcnow() - timedelta(hours=hours) if hours else None
+            )
         except ValueError:
-            await interaction.response.send_message("❌ Número inválido!", ephemeral=True)
-        except discord.Forbidden:
-            await interaction.response.send_message("❌ Sem permissão para deletar mensagens!", ephemeral=True)
+            await interaction.response.send_message("❌ Número ou ID inválido!", ephemeral=True)
+            return
+        except re.error:
+            await interaction.response.send_message("❌ Regex inválida!", ephemeral=True)
+            return
+        
+        channel = interaction.channel
+        
+        async def run_purge(job):
+            try:
+                # Sem filtros, examina só a quantidade pedida; com filtros, vasculha mais para trás
+                filtered = not purge_filter.is_empty
+                result = await purge_channel(
+                    channel, purge_filter,
+                    scan_limit=amount * 10 if filtered else amount, max_delete=amount,
+                    job=job, reason=f"Limpeza por {interaction.user}"
+                )
+                await interaction.followup.send(
+                    f"✅ {result['deleted']} mensagens deletadas ({result['scanned']} examinadas"
+                    f"{', ' + str(result['failed']) + ' falharam' if result['failed'] else ''})",
+                    ephemeral=True
+                )
+                return result
+            except discord.Forbidden:
+                await interaction.followup.send("❌ Sem permissão para deletar mensagens!", ephemeral=True)
+        
+        # Responde antes de agendar: o follow-up da tarefa precisa da interação já confirmada
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        if job_tracker.spawn("purge", run_purge, key=("purge", channel.id)) is None:
+            await interaction.followup.send("⏳ Já existe uma limpeza em andamento neste canal!", ephemeral=True)
 
 class UserInfoModal(Modal, title="ℹ️ Informações do Usuário"):
     user_id = TextInput(
@@ -239,14 +486,14 @@ class UserInfoModal(Modal, title="ℹ️ Informações do Usuário"):
         max_length=20
     )
     
+    @observe_handler("mod_userinfo")
     async def on_submit(self, interaction: discord.Interaction):
         try:
             user_id = int(self.user_id.value)
-            user = await interaction.guild.fetch_member(user_id)
+            user = await member_resolver.resolve(interaction.guild, user_id)
             
             # Obter punições
-            punishments = punishment_manager.get_user_punishments(interaction.guild.id, user_id)
-            punishment_count = len(punishments)
+            punishment_count = punishment_manager.count_user_punishments(interaction.guild.id, user_id)
             
             embed = discord.Embed(
                 title=f"ℹ️ Informações de {user.name}",
@@ -275,25 +522,25 @@ class ModPanelView(View):
     def __init__(self):
         super().__init__(timeout=None)
     
-    @discord.ui.button(label="Punições", style=discord.ButtonStyle.danger, emoji="🔨", row=0)
+    @discord.ui.button(label="Punições", style=discord.ButtonStyle.danger, emoji="🔨", row=0, custom_id="ibot:mod:punishments")
     async def punishments_button(self, interaction: discord.Interaction, button: Button):
         """Abre menu de punições"""
         view = PunishmentsView()
         await interaction.response.send_message("🔨 Selecione o tipo de punição:", view=view, ephemeral=True)
     
-    @discord.ui.button(label="Ferramentas", style=discord.ButtonStyle.primary, emoji="🔧", row=0)
+    @discord.ui.button(label="Ferramentas", style=discord.ButtonStyle.primary, emoji="🔧", row=0, custom_id="ibot:mod:tools")
     async def tools_button(self, interaction: discord.Interaction, button: Button):
         """Abre menu de ferramentas"""
         view = ToolsView()
         await interaction.response.send_message("🔧 Selecione a ferramenta:", view=view, ephemeral=True)
     
-    @discord.ui.button(label="Admin", style=discord.ButtonStyle.secondary, emoji="⚙️", row=0)
+    @discord.ui.button(label="Admin", style=discord.ButtonStyle.secondary, emoji="⚙️", row=0, custom_id="ibot:mod:admin")
     async def admin_button(self, interaction: discord.Interaction, button: Button):
         """Abre menu admin"""
         view = AdminView()
         await interaction.response.send_message("⚙️ Painel Administrativo:", view=view, ephemeral=True)
     
-    @discord.ui.button(label="AutoMod", style=discord.ButtonStyle.success, emoji="🤖", row=1)
+    @discord.ui.button(label="AutoMod", style=discord.ButtonStyle.success, emoji="🤖", row=1, custom_id="ibot:mod:automod")
     async def automod_button(self, interaction: discord.Interaction, button: Button):
         """Configurações de AutoMod"""
         embed = discord.Embed(
@@ -303,7 +550,7 @@ class ModPanelView(View):
         )
         await interaction.response.send_message(embed=embed, ephemeral=True)
     
-    @discord.ui.button(label="Estatísticas", style=discord.ButtonStyle.secondary, emoji="📊", row=1)
+    @discord.ui.button(label="Estatísticas", style=discord.ButtonStyle.secondary, emoji="📊", row=1, custom_id="ibot:mod:stats")
     async def stats_button(self, interaction: discord.Interaction, button: Button):
         """Mostra estatísticas"""
         guild = interaction.guild
@@ -321,7 +568,7 @@ class ModPanelView(View):
         
         await interaction.response.send_message(embed=embed, ephemeral=True)
     
-    @discord.ui.button(label="Ajuda", style=discord.ButtonStyle.secondary, emoji="❓", row=1)
+    @discord.ui.button(label="Ajuda", style=discord.ButtonStyle.secondary, emoji="❓", row=1, custom_id="ibot:mod:help")
     async def help_button(self, interaction: discord.Interaction, button: Button):
         """Mostra ajuda"""
         embed = discord.Embed(
@@ -401,22 +648,26 @@ class HistoryModal(Modal, title="📜 Ver Histórico"):
         max_length=20
     )
     
+    @observe_handler("mod_history")
     async def on_submit(self, interaction: discord.Interaction):
         try:
             user_id = int(self.user_id.value)
-            punishments = punishment_manager.get_user_punishments(interaction.guild.id, user_id)
+            total = punishment_manager.count_user_punishments(interaction.guild.id, user_id)
             
-            if not punishments:
+            if not total:
                 await interaction.response.send_message("✅ Usuário sem punições registradas!", ephemeral=True)
                 return
             
+            # Últimos 5, do mais recente para o mais antigo
+            punishments, _ = punishment_manager.get_user_history(interaction.guild.id, user_id, limit=5)
+            
             embed = discord.Embed(
                 title=f"📜 Histórico de Punições",
-                description=f"**Total:** {len(punishments)} registros",
+                description=f"**Total:** {total} registros",
                 color=0xe74c3c
             )
             
-            for i, p in enumerate(punishments[-5:], 1):  # Últimos 5
+            for i, p in enumerate(punishments, 1):
                 moderator = f"<@{p['moderator_id']}>"
                 timestamp = datetime.fromisoformat(p['timestamp'])
                 embed.add_field(
@@ -1,15 +1,104 @@
 """
 APIs de Moderação para o Painel Web
 """
-from flask import jsonify, request
+from flask import jsonify, request, Response
 import discord
 import asyncio
+import json
+import queue
+import re
+import time
 from datetime import datetime, timedelta
 import logging
 from api_auth import require_api_token
+from member_cache import member_resolver
+from job_tracker import job_tracker
+from purge_engine import PurgeFilter, purge_channel
 
 logger = logging.getLogger(__name__)
 
+BULK_ACTIONS = ("ban", "kick", "warn", "timeout")
+BULK_MAX_ITEMS = 200
+BULK_DEFAULT_CONCURRENCY = 5
+BULK_MAX_CONCURRENCY = 10
+BULK_MAX_RETRIES = 3
+
+
+async def _apply_bulk_item(guild, item):
+    """Executa uma ação do lote; retorna (mensagem, punição para o histórico)"""
+    action = item['action']
+    user_id = item['user_id']
+    reason = item['reason']
+    
+    if action == "ban":
+        # Banir por ID funciona mesmo para quem já saiu do servidor (comum em raids)
+        delete_days = max(0, min(int(item.get('delete_days', 0)), 7))
+        await guild.ban(discord.Object(id=user_id), reason=reason, delete_message_seconds=delete_days * 86400)
+        member_resolver.invalidate(guild.id, user_id)
+        return f"{user_id} banido", (guild.id, user_id, "ban", reason, guild.me.id, None)
+    
+    user = await member_resolver.resolve(guild, user_id)
+    if action == "kick":
+        await guild.kick(user, reason=reason)
+        member_resolver.invalidate(guild.id, user_id)
+        return f"{user.name} expulso", (guild.id, user_id, "kick", reason, guild.me.id, None)
+    
+    if action == "timeout":
+        duration = int(item.get('duration') or 10)
+        await user.timeout(discord.utils.utcnow() + timedelta(minutes=duration), reason=reason)
+        return (f"Timeout aplicado em {user.name} por {duration} minutos",
+                (guild.id, user_id, "timeout", reason, guild.me.id, f"{duration} minutos"))
+    
+    # warn
+    try:
+        await user.send(embed=discord.Embed(
+            title="⚠️ Você recebeu um aviso",
+            description=f"**Servidor:** {guild.name}\n**Motivo:** {reason}",
+            color=0xf39c12
+        ))
+    except discord.HTTPException:
+        pass
+    return f"Aviso registrado para {user.name}", (guild.id, user_id, "warn", reason, guild.me.id, None)
+
+
+async def _run_bulk(guild, items, concurrency, emit):
+    """Executa o lote com no máximo `concurrency` ações simultâneas e grava as punições de uma vez"""
+    semaphore = asyncio.Semaphore(concurrency)
+    punishments = []
+    start = time.perf_counter()
+    
+    async def run_item(index, item):
+        async with semaphore:
+            for attempt in range(BULK_MAX_RETRIES):
+                try:
+                    message, punishment = await _apply_bulk_item(guild, item)
+                    punishments.append(punishment)
+                    return {'index': index, 'action': item['action'], 'user_id': str(item['user_id']),
+                            'success': True, 'message': message}
+                except discord.HTTPException as e:
+                    # O discord.py já espera os 429 comuns; um 429 que escapa indica limite global
+                    if e.status == 429 and attempt + 1 < BULK_MAX_RETRIES:
+                        await asyncio.sleep(getattr(e, 'retry_after', None) or 2 ** attempt)
+                        continue
+                    error = str(e)
+                except Exception as e:
+                    error = str(e)
+                return {'index': index, 'action': item['action'], 'user_id': str(item['user_id']),
+                        'success': False, 'error': error}
+    
+    tasks = [asyncio.ensure_future(run_item(index, item)) for index, item in items]
+    succeeded = 0
+    for next_result in asyncio.as_completed(tasks):
+        result = await next_result
+        succeeded += result['success']
+        emit(result)
+    
+    if punishments:
+        from mod_panel import punishment_manager
+        punishment_manager.add_punishments(punishments)
+    
+    return succeeded, time.perf_counter() - start
+
 def register_moderation_routes(app, bot_instance_getter):
     """Registra todas as rotas de moderação no Flask app"""
     
@@ -34,8 +123,9 @@ def register_moderation_routes(app, bot_instance_getter):
                     if not guild:
                         return False, "Servidor não encontrado"
                     
-                    user = await guild.fetch_member(user_id)
+                    user = await member_resolver.resolve(guild, user_id)
                     await guild.ban(user, reason=reason, delete_message_days=delete_days)
+                    member_resolver.invalidate(guild.id, user_id)
                     
                     # Registrar punição
                     from mod_panel import punishment_manager
@@ -79,8 +169,9 @@ def register_moderation_routes(app, bot_instance_getter):
                     if not guild:
                         return False, "Servidor não encontrado"
                     
-                    user = await guild.fetch_member(user_id)
+                    user = await member_resolver.resolve(guild, user_id)
                     await guild.kick(user, reason=reason)
+                    member_resolver.invalidate(guild.id, user_id)
                     
                     from mod_panel import punishment_manager
                     punishment_manager.add_punishment(
@@ -103,6 +194,78 @@ def register_moderation_routes(app, bot_instance_getter):
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)})
     
+    @app.route('/api/moderation/bulk', methods=['POST'])
+    @require_api_token
+    def api_bulk():
+        """
+        API para ações em lote: {"items": [{"action", "user_id", "reason", "duration"?, "delete_days"?}],
+        "concurrency"?}. Responde em NDJSON, uma linha por item conforme terminam e um resumo no fim.
+        """
+        try:
+            bot = bot_instance_getter()
+            if not bot:
+                return jsonify({'success': False, 'error': 'Bot não conectado'}), 503
+            
+            data = request.get_json() or {}
+            raw_items = data.get('items') or []
+            if not raw_items:
+                return jsonify({'success': False, 'error': 'Nenhum item enviado'}), 400
+            if len(raw_items) > BULK_MAX_ITEMS:
+                return jsonify({'success': False, 'error': f'Máximo de {BULK_MAX_ITEMS} itens por lote'}), 400
+            concurrency = max(1, min(int(data.get('concurrency', BULK_DEFAULT_CONCURRENCY)), BULK_MAX_CONCURRENCY))
+            
+            # Itens inválidos são respondidos na hora, sem ir ao Discord
+            items, invalid = [], []
+            for index, raw in enumerate(raw_items):
+                action = str(raw.get('action', '')).lower()
+                try:
+                    user_id = int(raw.get('user_id'))
+                except (TypeError, ValueError):
+                    user_id = None
+                if action not in BULK_ACTIONS or user_id is None:
+                    invalid.append({'index': index, 'action': action, 'user_id': str(raw.get('user_id')),
+                                    'success': False, 'error': 'Ação ou ID inválido'})
+                    continue
+                items.append((index, {**raw, 'action': action, 'user_id': user_id,
+                                      'reason': raw.get('reason') or 'Ação em lote via painel'}))
+            
+            from config import GUILD_ID
+            results = queue.Queue()
+            
+            async def do_bulk():
+                try:
+                    guild = bot.get_guild(GUILD_ID)
+                    if not guild:
+                        results.put({'done': True, 'success': False, 'error': 'Servidor não encontrado'})
+                        return
+                    succeeded, elapsed = await _run_bulk(guild, items, concurrency, results.put)
+                    logger.info(f"🔨 Lote de moderação: {succeeded}/{len(raw_items)} ações em {elapsed:.2f}s")
+                    results.put({'done': True, 'success': True, 'total': len(raw_items),
+                                 'succeeded': succeeded, 'failed': len(raw_items) - succeeded,
+                                 'seconds': round(elapsed, 3)})
+                except Exception as e:
+                    results.put({'done': True, 'success': False, 'error': str(e)})
+            
+            asyncio.run_coroutine_threadsafe(do_bulk(), bot.loop)
+            
+            def stream():
+                for result in invalid:
+                    yield json.dumps(result, ensure_ascii=False) + "\n"
+                while True:
+                    try:
+                        result = results.get(timeout=120)
+                    except queue.Empty:
+                        yield json.dumps({'done': True, 'success': False, 'error': 'Tempo esgotado'}) + "\n"
+                        return
+                    yield json.dumps(result, ensure_ascii=False) + "\n"
+                    if result.get('done'):
+                        return
+            
+            return Response(stream(), mimetype='application/x-ndjson')
+        
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)})
+    
     @app.route('/api/moderation/warn', methods=['POST'])
     @require_api_token
     def api_warn():
@@ -123,7 +286,7 @@ def register_moderation_routes(app, bot_instance_getter):
                     if not guild:
                         return False, "Servidor não encontrado"
                     
-                    user = await guild.fetch_member(user_id)
+                    user = await member_resolver.resolve(guild, user_id)
                     
                     from mod_panel import punishment_manager
                     punishment_manager.add_punishment(
@@ -178,7 +341,7 @@ def register_moderation_routes(app, bot_instance_getter):
                     if not guild:
                         return False, "Servidor não encontrado"
                     
-                    user = await guild.fetch_member(user_id)
+                    user = await member_resolver.resolve(guild, user_id)
                     timeout_until = discord.utils.utcnow() + timedelta(minutes=duration)
                     await user.timeout(timeout_until, reason=reason)
                     
@@ -206,35 +369,54 @@ def register_moderation_routes(app, bot_instance_getter):
     @app.route('/api/moderation/clear', methods=['POST'])
     @require_api_token
     def api_clear():
-        """API para limpar mensagens"""
+        """
+        API para limpar mensagens com filtros opcionais: author_ids, pattern (regex),
+        only ("links"/"attachments") e hours. Roda como tarefa em segundo plano.
+        """
         try:
             bot = bot_instance_getter()
             if not bot:
                 return jsonify({'success': False, 'error': 'Bot não conectado'}), 503
             
-            data = request.get_json()
+            data = request.get_json() or {}
             channel_id = int(data.get('channel_id'))
-            amount = int(data.get('amount', 10))
-            
-            async def do_clear():
-                try:
-                    channel = bot.get_channel(channel_id)
-                    if not channel:
-                        return False, "Canal não encontrado", 0
-                    
-                    deleted = await channel.purge(limit=amount)
-                    return True, f"{len(deleted)} mensagens deletadas", len(deleted)
-                except Exception as e:
-                    return False, str(e), 0
-            
-            loop = bot.loop
-            future = asyncio.run_coroutine_threadsafe(do_clear(), loop)
-            success, message, deleted = future.result(timeout=10)
-            
-            if success:
-                return jsonify({'success': True, 'message': message, 'deleted': deleted})
-            else:
-                return jsonify({'success': False, 'error': message})
+            amount = max(1, min(int(data.get('amount', 10)), 5000))
+            only = str(data.get('only') or '').lower()
+            hours = data.get('hours')
+            
+            try:
+                purge_filter = PurgeFilter(
+                    author_ids=data.get('author_ids'),
+                    pattern=data.get('pattern'),
+                    links_only=only == 'links',
+                    attachments_only=only == 'attachments',
+                    after=discord.utils.utcnow() - timedelta(hours=float(hours)) if hours else None
+                )
+            except re.error as e:
+                return jsonify({'success': False, 'error': f'Regex inválida: {e}'}), 400
+            scan_limit = int(data.get('scan_limit') or amount * (1 if purge_filter.is_empty else 10))
+            
+            async def start_clear():
+                channel = bot.get_channel(channel_id)
+                if not channel:
+                    return None, "Canal não encontrado"
+                job = job_tracker.spawn(
+                    "purge",
+                    lambda job: purge_channel(channel, purge_filter, scan_limit=scan_limit, max_delete=amount,
+                                              job=job, reason="Limpeza via painel"),
+                    key=("purge", channel.id)
+                )
+                if job is None:
+                    return None, "Já existe uma limpeza em andamento neste canal"
+                return job.job_id, None
+            
+            # Só agenda a tarefa: o resultado final fica em /api/jobs/<job_id>
+            future = asyncio.run_coroutine_threadsafe(start_clear(), bot.loop)
+            job_id, error = future.result(timeout=10)
+            
+            if job_id is None:
+                return jsonify({'success': False, 'error': error})
+            return jsonify({'success': True, 'job_id': job_id, 'message': f'Limpeza iniciada (tarefa #{job_id})'}), 202
                 
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)})
@@ -257,10 +439,10 @@ def register_moderation_routes(app, bot_instance_getter):
                     if not guild:
                         return False, "Servidor não encontrado"
                     
-                    user = await guild.fetch_member(user_id)
+                    user = await member_resolver.resolve(guild, user_id)
                     
                     from mod_panel import punishment_manager
-                    punishments = punishment_manager.get_user_punishments(guild.id, user_id)
+                    punishment_count = punishment_manager.count_user_punishments(guild.id, user_id)
                     
                     user_data = {
                         'name': user.name,
@@ -268,7 +450,7 @@ def register_moderation_routes(app, bot_instance_getter):
                         'joined_at': user.joined_at.strftime("%d/%m/%Y %H:%M"),
                         'created_at': user.created_at.strftime("%d/%m/%Y %H:%M"),
                         'roles': len(user.roles) - 1,
-                        'punishments': len(punishments)
+                        'punishments': punishment_count
                     }
                     
                     return True, user_data
@@ -371,7 +553,7 @@ def register_moderation_routes(app, bot_instance_getter):
     @app.route('/api/moderation/history', methods=['GET'])
     @require_api_token
     def api_user_history():
-        """API para obter histórico de punições"""
+        """API para obter histórico de punições (?limit=50&before=<seq> para paginar)"""
         try:
             bot = bot_instance_getter()
             if not bot:
@@ -382,45 +564,62 @@ def register_moderation_routes(app, bot_instance_getter):
             from config import GUILD_ID
             from mod_panel import punishment_manager
             
-            punishments = punishment_manager.get_user_punishments(GUILD_ID, user_id)
+            limit = max(1, min(int(request.args.get('limit', '50')), 200))
+            before = request.args.get('before')
+            before = int(before) if before else None
             
-            # Formatar punições
+            punishments, next_cursor = punishment_manager.get_user_history(GUILD_ID, user_id, limit=limit, before=before)
+            
+            # Formatar punições (mais recentes primeiro)
             formatted = []
             for p in punishments:
                 formatted.append({
+                    'seq': p['seq'],
                     'type': p['type'],
                     'reason': p['reason'],
                     'timestamp': datetime.fromisoformat(p['timestamp']).strftime("%d/%m/%Y %H:%M"),
                     'moderator': f"Moderador ID: {p['moderator_id']}"
                 })
             
-            return jsonify({'success': True, 'punishments': formatted})
+            return jsonify({
+                'success': True,
+                'punishments': formatted,
+                'total': punishment_manager.count_user_punishments(GUILD_ID, user_id),
+                'next_before': next_cursor
+            })
                 
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)})
     
+    @app.route('/api/moderation/member-cache', methods=['GET'])
+    @require_api_token
+    def api_member_cache():
+        """API para acompanhar acertos do cache de membros (chamadas REST evitadas)"""
+        return jsonify({'success': True, 'member_cache': member_resolver.get_status()})
+    
     @app.route('/api/moderation/stats', methods=['GET'])
     @require_api_token
     def api_mod_stats():
-        """API para estatísticas de moderação"""
+        """API para estatísticas de moderação (?days=7 limita aos últimos dias)"""
         try:
             from config import GUILD_ID
             from mod_panel import punishment_manager
             
-            guild_key = str(GUILD_ID)
-            stats = {'bans': 0, 'kicks': 0, 'warns': 0, 'timeouts': 0}
-            
-            if guild_key in punishment_manager.punishments:
-                for user_punishments in punishment_manager.punishments[guild_key].values():
-                    for p in user_punishments:
-                        if p['type'] == 'ban':
-                            stats['bans'] += 1
-                        elif p['type'] == 'kick':
-                            stats['kicks'] += 1
-                        elif p['type'] == 'warn':
-                            stats['warns'] += 1
-                        elif p['type'] == 'timeout':
-                            stats['timeouts'] += 1
+            days = request.args.get('days')
+            days = max(1, min(int(days), 366)) if days else None
+            
+            summary = punishment_manager.get_stats(GUILD_ID, days=days)
+            by_type = summary['by_type']
+            stats = {
+                'bans': by_type.get('ban', 0),
+                'kicks': by_type.get('kick', 0),
+                'warns': by_type.get('warn', 0),
+                'timeouts': by_type.get('timeout', 0),
+                'days': days,
+                'by_type': by_type,
+                'by_moderator': summary['by_moderator'],
+                'daily': summary['daily']
+            }
             
             return jsonify({'success': True, 'stats': stats})
                 
@@ -0,0 +1,104 @@
+"""
+Agendador de expiração de pagamentos PIX
+Expira pendentes sem pagamento, libera as contas reservadas e arquiva pagamentos encerrados
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+class PaymentScheduler:
+    """Rotina periódica de manutenção dos pagamentos"""
+
+    def __init__(self, pix_manager, ttl_minutes: int, archive_after_days: int, interval_minutes: int = 5,
+                 release_reservations=None, report=None):
+        """
+        Args:
+            pix_manager: gerenciador de pagamentos
+            ttl_minutes: prazo de um pagamento pendente (0 desativa a expiração)
+            archive_after_days: dias após o encerramento para mover ao arquivo (0 desativa)
+            interval_minutes: intervalo entre execuções
+            release_reservations: função que libera contas de pagamentos encerrados; retorna quantas liberou
+            report: corrotina que recebe o resumo da execução (chamada só quando algo mudou)
+        """
+        self.pix_manager = pix_manager
+        self.ttl = timedelta(minutes=ttl_minutes)
+        self.archive_after = timedelta(days=archive_after_days)
+        self.interval_seconds = max(1, interval_minutes) * 60
+        self.release_reservations = release_reservations
+        self.report = report
+        self.task = None
+        self._loop = None
+        self.stats = {
+            "runs": 0,
+            "expired": 0,
+            "released": 0,
+            "archived": 0,
+            "last_run_at": None,
+            "last_error": None
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > timedelta(0) or self.archive_after > timedelta(0)
+
+    def start(self):
+        """Inicia a rotina no loop atual (idempotente)"""
+        if not self.enabled:
+            logger.info("💳 Expiração de pagamentos desativada")
+            return
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self.task and not self.task.done():
+            return
+        self._loop = loop
+        self.task = loop.create_task(self._loop_forever())
+        logger.info(f"💳 Expiração de pagamentos agendada a cada {self.interval_seconds // 60} minuto(s)")
+
+    async def _loop_forever(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["last_error"] = str(e)
+                logger.error(f"❌ Erro na expiração de pagamentos: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def run_once(self) -> dict:
+        """Expira, libera reservas e arquiva; envia um único resumo se algo mudou"""
+        now = datetime.now()
+        expired = self.pix_manager.expire_pending(self.ttl, now) if self.ttl > timedelta(0) else []
+        released = self.release_reservations() if self.release_reservations else 0
+        archived = self.pix_manager.archive_closed(self.archive_after, now) if self.archive_after > timedelta(0) else 0
+
+        summary = {"expired": expired, "released": released, "archived": archived}
+        self.stats["runs"] += 1
+        self.stats["expired"] += len(expired)
+        self.stats["released"] += released
+        self.stats["archived"] += archived
+        self.stats["last_run_at"] = now.isoformat()
+        self.stats["last_error"] = None
+
+        if expired or released or archived:
+            logger.info(
+                f"💳 Manutenção de pagamentos: {len(expired)} expirado(s), "
+                f"{released} conta(s) liberada(s), {archived} arquivado(s)"
+            )
+            if self.report:
+                await self.report(summary)
+        return summary
+
+    def get_status(self):
+        return {
+            "enabled": self.enabled,
+            "running": bool(self.task and not self.task.done()),
+            "ttl_minutes": int(self.ttl.total_seconds() // 60),
+            "archive_after_days": self.archive_after.days,
+            "interval_minutes": self.interval_seconds // 60,
+            "pending": len(self.pix_manager.get_pending_payments()),
+            "active_payments": len(self.pix_manager.get_all_payments()),
+            **self.stats
+        }
@@ -0,0 +1,117 @@
+"""
+BR Code PIX (padrão EMV MPM do Banco Central)
+Gera o "copia e cola" com valor e identificador do pagamento e, opcionalmente, o QR Code em PNG
+"""
+import functools
+import importlib.util
+import io
+import logging
+import re
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+PIX_GUI = "br.gov.bcb.pix"
+MAX_NAME_LENGTH = 25
+MAX_CITY_LENGTH = 15
+MAX_TXID_LENGTH = 25
+
+
+def _build_crc16_table():
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return tuple(table)
+
+
+_CRC16_TABLE = _build_crc16_table()
+
+
+def crc16(data: bytes) -> str:
+    """CRC16-CCITT (polinômio 0x1021, valor inicial 0xFFFF) em 4 dígitos hexadecimais"""
+    crc = 0xFFFF
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ _CRC16_TABLE[((crc >> 8) ^ byte) & 0xFF]
+    return f"{crc:04X}"
+
+
+def _field(field_id: str, value: str) -> str:
+    return f"{field_id}{len(value):02d}{value}"
+
+
+def _ascii(value: str) -> str:
+    # Os tamanhos dos campos contam bytes: acentos viram a letra sem acento
+    return unicodedata.normalize("NFKD", value or "").encode("ascii", "ignore").decode("ascii")
+
+
+def _normalize_text(value: str, max_length: int) -> str:
+    """Remove acentos e caracteres fora do padrão (nome e cidade do recebedor)"""
+    value = _ascii(value)
+    value = re.sub(r"[^A-Za-z0-9 .-]", "", value).strip().upper()
+    return value[:max_length]
+
+
+def normalize_txid(txid: str) -> str:
+    """O identificador da transação aceita só letras e números (até 25)"""
+    txid = re.sub(r"[^A-Za-z0-9]", "", txid or "")[:MAX_TXID_LENGTH]
+    return txid or "***"
+
+
+def build_payload(pix_key: str, name: str, city: str, amount: float = None,
+                  txid: str = None, description: str = None) -> str:
+    """
+    Monta o BR Code estático (copia e cola).
+
+    Args:
+        pix_key: chave PIX do recebedor
+        name: nome do recebedor
+        city: cidade do recebedor
+        amount: valor (None deixa o pagador digitar)
+        txid: identificador do pagamento, conferido na confirmação
+        description: texto livre exibido no app do pagador
+    """
+    account = _field("00", PIX_GUI) + _field("01", pix_key.strip())
+    if description:
+        # O campo 26 inteiro tem no máximo 99 caracteres
+        room = 99 - len(account) - 4
+        if room > 0:
+            account += _field("02", _ascii(description)[:room])
+
+    payload = (
+        _field("00", "01")
+        + _field("26", account)
+        + _field("52", "0000")
+        + _field("53", "986")
+        + (_field("54", f"{amount:.2f}") if amount else "")
+        + _field("58", "BR")
+        + _field("59", _normalize_text(name, MAX_NAME_LENGTH) or "RECEBEDOR")
+        + _field("60", _normalize_text(city, MAX_CITY_LENGTH) or "SAO PAULO")
+        + _field("62", _field("05", normalize_txid(txid)))
+        + "6304"
+    )
+    return payload + crc16(payload.encode("utf-8"))
+
+
+@functools.lru_cache(maxsize=256)
+def render_qr_png(pix_key: str, amount: float, txid: str, payload: str):
+    """
+    PNG do QR Code (None se a biblioteca qrcode não estiver instalada).
+    Cache por (chave, valor, txid): reenviar o mesmo pagamento não renderiza de novo.
+    """
+    # Importação adiada: a qrcode (e a Pillow) só carregam no primeiro QR gerado, não na inicialização
+    if not qr_available():
+        return None
+    import qrcode
+    image = qrcode.make(payload, box_size=8, border=2)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@functools.lru_cache(maxsize=1)
+def qr_available() -> bool:
+    """QR Code é opcional: sem a biblioteca só o copia e cola é enviado"""
+    return importlib.util.find_spec("qrcode") is not None
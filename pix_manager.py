@@ -2,20 +2,40 @@
 Sistema de Pagamento PIX
 Gerencia pagamentos via PIX com código copia e cola
 """
+import gzip
 import json
 import os
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
 import uuid
+from metrics import timed_save
+from pix_brcode import build_payload
 
 class PixManager:
     """Gerencia pagamentos PIX"""
     
+    # Alterações acumuladas no journal antes de regravar o snapshot
+    JOURNAL_COMPACT_THRESHOLD = 500
+    
     def __init__(self):
         self.payments_file = "payments.json"
+        self.journal_file = "payments.journal.jsonl"
+        self.archive_file = "payments_archive.jsonl.gz"
         self.config_file = "pix_config.json"
-        self.load_payments()
+        # Pagamentos carregam sob demanda (warm_up em segundo plano no setup_hook ou no primeiro acesso)
+        self._loaded = False
+        self._load_lock = threading.Lock()
         self.load_config()
     
+    def warm_up(self):
+        """Carrega os pagamentos se ainda não foram carregados (idempotente; pode rodar em outra thread)"""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self.load_payments()
+                self._loaded = True
+    
     def load_config(self):
         """Carrega configuração do PIX"""
         if os.path.exists(self.config_file):
@@ -48,43 +68,122 @@ class PixManager:
         return True
     
     def load_payments(self):
-        """Carrega pagamentos do arquivo JSON"""
+        """Carrega o snapshot de pagamentos e reaplica o journal"""
         if os.path.exists(self.payments_file):
             with open(self.payments_file, 'r', encoding='utf-8') as f:
                 self.payments = json.load(f)
         else:
             self.payments = {}
+        
+        # Alterações gravadas depois do último snapshot
+        self.journal_entries = 0
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        payment = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Última linha incompleta (queda durante a escrita)
+                        continue
+                    self.payments[payment["payment_id"]] = payment
+                    self.journal_entries += 1
+        
+        self._rebuild_indexes()
+        self._load_archived_statuses()
+        if self.journal_entries:
+            self.save_payments()
+    
+    def _load_archived_statuses(self):
+        """ID -> status final dos pagamentos já arquivados (IDs não podem ser reutilizados)"""
+        self.archived_statuses = {}
+        if not os.path.exists(self.archive_file):
+            return
+        with gzip.open(self.archive_file, 'rt', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    payment = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self.archived_statuses[payment["payment_id"]] = payment["status"]
+    
+    def _rebuild_indexes(self):
+        """Índices user_id -> pagamentos e status -> pagamentos (na ordem de criação)"""
+        self.by_user = {}
+        self.by_status = {}
+        for payment_id, payment in self.payments.items():
+            self.by_user.setdefault(payment["user_id"], {})[payment_id] = payment
+            self.by_status.setdefault(payment["status"], {})[payment_id] = payment
     
+    def _set_status(self, payment: dict, status: str):
+        """Altera o status mantendo o índice por status"""
+        self.by_status.get(payment["status"], {}).pop(payment["payment_id"], None)
+        payment["status"] = status
+        self.by_status.setdefault(status, {})[payment["payment_id"]] = payment
+    
+    @timed_save("payments")
     def save_payments(self):
-        """Salva pagamentos no arquivo JSON"""
-        with open(self.payments_file, 'w', encoding='utf-8') as f:
+        """Grava o snapshot completo e zera o journal (compactação)"""
+        temp_file = self.payments_file + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
             json.dump(self.payments, f, indent=4, ensure_ascii=False)
+        os.replace(temp_file, self.payments_file)
+        
+        # O snapshot já contém tudo que estava no journal
+        with open(self.journal_file, 'w', encoding='utf-8'):
+            pass
+        self.journal_entries = 0
+    
+    @timed_save("payments_journal")
+    def _append_journal(self, payment: dict):
+        """Grava só o pagamento alterado no fim do journal"""
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(payment, ensure_ascii=False) + "\n")
+        self.journal_entries += 1
+        if self.journal_entries >= self.JOURNAL_COMPACT_THRESHOLD:
+            self.save_payments()
     
-    def generate_pix_code(self, amount: float, description: str = "Compra de conta"):
+    def _new_payment_id(self) -> str:
+        """ID curto (8 caracteres) sem colisão com pagamentos existentes ou arquivados"""
+        while True:
+            payment_id = uuid.uuid4().hex[:8]
+            if payment_id not in self.payments and payment_id not in self.archived_statuses:
+                return payment_id
+    
+    def generate_pix_code(self, amount: float, description: str = "Compra de conta", txid: str = None):
         """
-        Gera código PIX copia e cola (simplificado)
-        Nota: Para produção, use uma API de pagamento real como Mercado Pago, PagSeguro, etc.
+        Gera o código PIX copia e cola (BR Code com valor e identificador do pagamento).
+        A confirmação continua manual: a equipe confere o txid no extrato antes de confirmar.
         """
         if not self.config.get("enabled") or not self.config.get("pix_key"):
             return None, "PIX não configurado. Configure a chave PIX primeiro."
         
-        # Por enquanto, retorna instruções de pagamento manual
-        # Em produção, você deve integrar com uma API de pagamento
         pix_info = {
             "pix_key": self.config["pix_key"],
             "amount": amount,
             "name": self.config["pix_name"],
             "city": self.config["pix_city"],
-            "description": description
+            "description": description,
+            "txid": txid,
+            "payload": build_payload(
+                self.config["pix_key"], self.config["pix_name"], self.config["pix_city"],
+                amount=amount, txid=txid, description=description
+            )
         }
         
         return pix_info, "PIX gerado com sucesso"
     
     def create_payment(self, user_id: str, account_id: str, amount: float, account_title: str):
         """Cria um novo pagamento pendente"""
-        payment_id = str(uuid.uuid4())[:8]  # ID único curto
+        self.warm_up()
+        payment_id = self._new_payment_id()
         
-        pix_info, message = self.generate_pix_code(amount, f"Compra: {account_title}")
+        pix_info, message = self.generate_pix_code(amount, f"Compra: {account_title}", txid=payment_id)
         
         if not pix_info:
             return None, message
@@ -96,6 +195,7 @@ class PixManager:
             "account_title": account_title,
             "amount": amount,
             "pix_key": pix_info["pix_key"],
+            "brcode": pix_info["payload"],
             "status": "pending",  # pending, confirmed, cancelled
             "created_at": datetime.now().isoformat(),
             "confirmed_at": None,
@@ -103,52 +203,128 @@ class PixManager:
         }
         
         self.payments[payment_id] = payment_data
-        self.save_payments()
+        self.by_user.setdefault(user_id, {})[payment_id] = payment_data
+        self.by_status.setdefault("pending", {})[payment_id] = payment_data
+        self._append_journal(payment_data)
         
         return payment_data, "Pagamento criado com sucesso"
     
     def confirm_payment(self, payment_id: str, staff_id: str):
         """Confirma um pagamento"""
+        self.warm_up()
         if payment_id not in self.payments:
             return False, "Pagamento não encontrado"
         
-        if self.payments[payment_id]["status"] == "confirmed":
+        status = self.payments[payment_id]["status"]
+        if status == "confirmed":
             return False, "Pagamento já foi confirmado anteriormente"
         
-        self.payments[payment_id]["status"] = "confirmed"
-        self.payments[payment_id]["confirmed_at"] = datetime.now().isoformat()
-        self.payments[payment_id]["confirmed_by"] = staff_id
-        self.save_payments()
+        # Expirado/cancelado: a reserva da conta já foi liberada e ela pode ter sido vendida a outro comprador
+        if status == "expired":
+            return False, "Pagamento expirado: a reserva da conta foi liberada. Verifique a conta e trate o pagamento manualmente"
+        if status == "cancelled":
+            return False, "Pagamento cancelado: a reserva da conta foi liberada. Verifique a conta e trate o pagamento manualmente"
+        
+        payment = self.payments[payment_id]
+        self._set_status(payment, "confirmed")
+        payment["confirmed_at"] = datetime.now().isoformat()
+        payment["confirmed_by"] = staff_id
+        self._append_journal(payment)
         
         return True, "Pagamento confirmado com sucesso"
     
     def cancel_payment(self, payment_id: str):
         """Cancela um pagamento"""
+        self.warm_up()
         if payment_id not in self.payments:
             return False, "Pagamento não encontrado"
         
         if self.payments[payment_id]["status"] == "confirmed":
             return False, "Não é possível cancelar um pagamento já confirmado"
         
-        self.payments[payment_id]["status"] = "cancelled"
-        self.save_payments()
+        payment = self.payments[payment_id]
+        self._set_status(payment, "cancelled")
+        payment["cancelled_at"] = datetime.now().isoformat()
+        self._append_journal(payment)
         
         return True, "Pagamento cancelado"
     
+    def expire_pending(self, ttl: timedelta, now: datetime = None):
+        """Marca como expirados os pendentes criados há mais de ttl; retorna os expirados"""
+        self.warm_up()
+        now = now or datetime.now()
+        limit = now - ttl
+        expired = []
+        for payment in list(self.by_status.get("pending", {}).values()):
+            if datetime.fromisoformat(payment["created_at"]) > limit:
+                continue
+            self._set_status(payment, "expired")
+            payment["expired_at"] = now.isoformat()
+            self._append_journal(payment)
+            expired.append(payment)
+        return expired
+    
+    @staticmethod
+    def _closed_at(payment: dict) -> str:
+        return (payment.get("confirmed_at") or payment.get("cancelled_at")
+                or payment.get("expired_at") or payment["created_at"])
+    
+    def archive_closed(self, older_than: timedelta, now: datetime = None):
+        """
+        Move pagamentos encerrados (confirmados, cancelados ou expirados) há mais de older_than
+        para o arquivo compactado, mantendo em memória só o conjunto ativo. Retorna quantos moveu.
+        """
+        self.warm_up()
+        limit = ((now or datetime.now()) - older_than).isoformat()
+        archived = [
+            payment
+            for status in ("confirmed", "cancelled", "expired")
+            for payment in self.by_status.get(status, {}).values()
+            if self._closed_at(payment) <= limit
+        ]
+        if not archived:
+            return 0
+        
+        # Cada gravação adiciona um membro gzip ao arquivo (leitura contínua com gzip.open)
+        with gzip.open(self.archive_file, 'at', encoding='utf-8') as f:
+            for payment in archived:
+                f.write(json.dumps(payment, ensure_ascii=False) + "\n")
+        
+        for payment in archived:
+            payment_id = payment["payment_id"]
+            self.archived_statuses[payment_id] = payment["status"]
+            del self.payments[payment_id]
+            self.by_status[payment["status"]].pop(payment_id, None)
+            user_payments = self.by_user.get(payment["user_id"], {})
+            user_payments.pop(payment_id, None)
+            if not user_payments:
+                self.by_user.pop(payment["user_id"], None)
+        self.save_payments()
+        return len(archived)
+    
     def get_payment(self, payment_id: str):
         """Obtém informações de um pagamento"""
+        self.warm_up()
         return self.payments.get(payment_id)
     
+    def get_archived_status(self, payment_id: str):
+        """Status final de um pagamento arquivado (None se não estiver no arquivo)"""
+        self.warm_up()
+        return self.archived_statuses.get(payment_id)
+    
     def get_user_payments(self, user_id: str):
         """Obtém todos os pagamentos de um usuário"""
-        return [p for p in self.payments.values() if p["user_id"] == user_id]
+        self.warm_up()
+        return list(self.by_user.get(user_id, {}).values())
     
     def get_pending_payments(self):
         """Obtém todos os pagamentos pendentes"""
-        return [p for p in self.payments.values() if p["status"] == "pending"]
+        self.warm_up()
+        return list(self.by_status.get("pending", {}).values())
     
     def get_all_payments(self):
         """Retorna todos os pagamentos"""
+        self.warm_up()
         return list(self.payments.values())
     
     def is_configured(self):
@@ -0,0 +1,143 @@
+"""
+Limpeza seletiva de mensagens
+Uma única passada no histórico coleta os IDs que casam com os filtros; mensagens com menos de
+14 dias saem em lotes de 100 (bulk delete) e as mais antigas uma a uma
+"""
+import logging
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# O Discord só aceita bulk delete de mensagens com menos de 14 dias (margem de 1 hora)
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(hours=1)
+BULK_DELETE_CHUNK = 100
+
+_LINK_REGEX = re.compile(r'https?://|discord\.gg/', re.IGNORECASE)
+
+
+class PurgeFilter:
+    """Critérios de seleção das mensagens (todos opcionais e combinados com E)"""
+
+    __slots__ = ("author_ids", "pattern", "links_only", "attachments_only", "after", "before")
+
+    def __init__(self, author_ids=None, pattern: str = None, links_only: bool = False,
+                 attachments_only: bool = False, after: datetime = None, before: datetime = None):
+        self.author_ids = {int(author_id) for author_id in author_ids} if author_ids else None
+        self.pattern = re.compile(pattern, re.IGNORECASE) if pattern else None
+        self.links_only = links_only
+        self.attachments_only = attachments_only
+        self.after = after
+        self.before = before
+
+    def matches(self, message) -> bool:
+        if self.author_ids is not None and message.author.id not in self.author_ids:
+            return False
+        if self.attachments_only and not message.attachments:
+            return False
+        if self.links_only and not _LINK_REGEX.search(message.content):
+            return False
+        if self.pattern is not None and not self.pattern.search(message.content):
+            return False
+        return True
+
+    @property
+    def is_empty(self) -> bool:
+        """True sem nenhum critério (todas as mensagens são candidatas)"""
+        return not (self.author_ids or self.pattern is not None or self.links_only
+                    or self.attachments_only or self.after or self.before)
+
+    def describe(self) -> str:
+        parts = []
+        if self.author_ids:
+            parts.append(f"autores={','.join(str(a) for a in self.author_ids)}")
+        if self.pattern is not None:
+            parts.append(f"regex={self.pattern.pattern!r}")
+        if self.links_only:
+            parts.append("só links")
+        if self.attachments_only:
+            parts.append("só anexos")
+        if self.after:
+            parts.append(f"após {self.after:%d/%m %H:%M}")
+        if self.before:
+            parts.append(f"antes de {self.before:%d/%m %H:%M}")
+        return ", ".join(parts) or "sem filtros"
+
+
+async def purge_channel(channel, purge_filter: PurgeFilter, scan_limit: int = 1000, max_delete: int = None,
+                        job=None, reason: str = None) -> dict:
+    """
+    Apaga as mensagens do canal que casam com o filtro.
+
+    Args:
+        channel: canal de texto
+        purge_filter: critérios de seleção
+        scan_limit: quantas mensagens do histórico examinar (da mais recente para trás)
+        max_delete: para de coletar ao atingir essa quantidade
+        job: Job do job_tracker para reportar progresso
+        reason: motivo registrado no audit log
+    Retorna o resumo com as contagens.
+    """
+    start = time.perf_counter()
+    bulk_limit = datetime.now(timezone.utc) - BULK_DELETE_MAX_AGE
+    recent_ids, old_ids = [], []
+    scanned = 0
+
+    # Fase 1: uma passada no histórico, guardando só IDs
+    async for message in channel.history(limit=scan_limit, before=purge_filter.before, after=purge_filter.after,
+                                         oldest_first=False):
+        scanned += 1
+        if purge_filter.matches(message):
+            (recent_ids if message.created_at > bulk_limit else old_ids).append(message.id)
+            if max_delete and len(recent_ids) + len(old_ids) >= max_delete:
+                break
+        if job is not None and scanned % 100 == 0:
+            job.update_progress(phase="scan", scanned=scanned, matched=len(recent_ids) + len(old_ids))
+
+    matched = len(recent_ids) + len(old_ids)
+    result = {"scanned": scanned, "matched": matched, "bulk_deleted": 0, "single_deleted": 0, "failed": 0}
+
+    def report():
+        if job is not None:
+            job.update_progress(phase="delete", total=matched, **result)
+
+    report()
+
+    # Fase 2: lotes de até 100 IDs (uma requisição por lote)
+    for index in range(0, len(recent_ids), BULK_DELETE_CHUNK):
+        chunk = recent_ids[index:index + BULK_DELETE_CHUNK]
+        try:
+            await channel.delete_messages([discord.Object(id=message_id) for message_id in chunk], reason=reason)
+            result["bulk_deleted"] += len(chunk)
+        except discord.NotFound:
+            # Alguma já tinha sido apagada: o lote inteiro falha, então tenta uma a uma
+            old_ids.extend(chunk)
+        except discord.HTTPException as e:
+            logger.error(f"❌ Erro no bulk delete em #{channel}: {e}")
+            result["failed"] += len(chunk)
+        report()
+
+    # Fase 3: mensagens antigas, uma requisição por mensagem (o discord.py respeita o limite da rota)
+    for message_id in old_ids:
+        try:
+            await channel.get_partial_message(message_id).delete()
+            result["single_deleted"] += 1
+        except discord.NotFound:
+            pass
+        except discord.HTTPException as e:
+            logger.debug(f"Erro ao apagar mensagem {message_id}: {e}")
+            result["failed"] += 1
+        if (result["single_deleted"] + result["failed"]) % 10 == 0:
+            report()
+
+    result["deleted"] = result["bulk_deleted"] + result["single_deleted"]
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    report()
+    logger.info(
+        f"🗑️ Limpeza em #{channel}: {result['deleted']}/{matched} apagadas "
+        f"({scanned} examinadas, {purge_filter.describe()}) em {result['seconds']}s"
+    )
+    return result
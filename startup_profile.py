@@ -0,0 +1,122 @@
+"""
+Perfil de inicialização do bot
+Mede o tempo de cada importação (no estilo do python -X importtime), as fases da inicialização
+e o tempo até o on_ready, comparando com a meta configurada
+"""
+import builtins
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+_BUILTIN_IMPORT = builtins.__import__
+
+
+class StartupProfile:
+    """Linha do tempo da inicialização (segundos desde a importação deste módulo)"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.marks = {}            # fase -> segundos desde o início
+        self.phases = {}           # fase -> duração (s)
+        self.imports = {}          # módulo -> [acumulado, próprio]
+        self.ready_seconds = None
+        self._import_stack = []
+        self._original_import = None
+        self._lock = threading.Lock()
+
+    # ==================== IMPORTAÇÕES ====================
+
+    def install_import_timer(self):
+        """Passa a cronometrar cada módulo importado pela primeira vez"""
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._timed_import
+
+    def finish_imports(self):
+        """Restaura o __import__ original e marca o fim das importações"""
+        if self._original_import is not None and builtins.__import__ == self._timed_import:
+            builtins.__import__ = self._original_import
+        self._original_import = None
+        self.mark("imports")
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Após finish_imports, referências antigas ao timer caem direto no __import__ padrão
+        original = self._original_import or _BUILTIN_IMPORT
+        # Relativas e já carregadas custam praticamente nada: não entram no perfil
+        if level or name in sys.modules or threading.current_thread() is not threading.main_thread():
+            return original(name, globals, locals, fromlist, level)
+
+        start = time.perf_counter()
+        self._import_stack.append(0.0)
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            children = self._import_stack.pop()
+            elapsed = time.perf_counter() - start
+            if self._import_stack:
+                self._import_stack[-1] += elapsed
+            record = self.imports.setdefault(name, [0.0, 0.0])
+            record[0] += elapsed
+            record[1] += elapsed - children
+
+    # ==================== FASES ====================
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def mark(self, name: str):
+        """Registra o instante (desde o início) em que uma etapa terminou"""
+        with self._lock:
+            self.marks.setdefault(name, self.elapsed())
+
+    @contextmanager
+    def phase(self, name: str):
+        """Mede a duração de uma etapa (pode rodar em outra thread)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases[name] = time.perf_counter() - start
+
+    def ready(self, target_seconds: float):
+        """Marca o bot como pronto (só a primeira vez) e registra o relatório"""
+        if self.ready_seconds is not None:
+            return
+        self.ready_seconds = self.elapsed()
+        self.mark("ready")
+
+        report = self.get_report(target_seconds, top=5)
+        marks = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in report["marks"].items())
+        slowest = ", ".join(f"{item['module']} {item['cumulative_ms']:.0f}ms" for item in report["slowest_imports"])
+        message = (f"⏱️ Pronto em {self.ready_seconds:.2f}s (meta {target_seconds:g}s) | "
+                   f"etapas: {marks} | importações mais lentas: {slowest}")
+        if self.ready_seconds > target_seconds:
+            logger.warning(message)
+        else:
+            logger.info(message)
+
+    def get_report(self, target_seconds: float = None, top: int = 15):
+        with self._lock:
+            marks = {name: round(seconds, 3) for name, seconds in sorted(self.marks.items(), key=lambda item: item[1])}
+            phases = {name: round(seconds, 3) for name, seconds in self.phases.items()}
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        return {
+            "ready_seconds": round(self.ready_seconds, 3) if self.ready_seconds is not None else None,
+            "target_seconds": target_seconds,
+            "within_target": (self.ready_seconds <= target_seconds)
+            if self.ready_seconds is not None and target_seconds else None,
+            "marks": marks,
+            "phases": phases,
+            "slowest_imports": [
+                {"module": name, "cumulative_ms": round(total * 1000, 1), "self_ms": round(own * 1000, 1)}
+                for name, (total, own) in slowest
+            ]
+        }
+
+
+startup_profile = StartupProfile()
@@ -2,6 +2,7 @@ import discord
 from discord.ext import commands
 import json
 import os
+from metrics import timed_save
 
 class TicketManager:
     """Gerencia o sistema de tickets"""
@@ -19,6 +20,7 @@ class TicketManager:
         else:
             self.tickets = {}
     
+    @timed_save("tickets")
     def save_tickets(self):
         """Salva tickets no arquivo JSON"""
         with open(self.tickets_file, 'w', encoding='utf-8') as f:
@@ -53,6 +55,12 @@ class TicketManager:
             self.tickets[ticket_id]["channel_id"] = channel_id
             self.save_tickets()
     
+    def set_ticket_voice_channel(self, ticket_id: str, channel_id: int):
+        """Define o canal de voz do ticket"""
+        if ticket_id in self.tickets:
+            self.tickets[ticket_id]["voice_channel_id"] = channel_id
+            self.save_tickets()
+    
     def get_all_tickets(self):
         """Retorna todos os tickets"""
         return list(self.tickets.values())
@@ -0,0 +1,224 @@
+"""
+Pool de canais de ticket pré-criados
+Mantém canais ocultos na categoria de tickets; abrir um ticket vira uma única edição
+(nome, tópico e permissões) em vez de uma criação de canal
+"""
+import asyncio
+import logging
+import math
+import secrets
+import statistics
+import time
+from collections import deque
+
+import discord
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+TIME_TO_CHANNEL = registry.histogram(
+    "ibot_ticket_time_to_channel_seconds", "Tempo até o canal do ticket existir", ("source",),
+    buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+)
+POOL_SIZE = registry.gauge("ibot_ticket_pool_available", "Canais de ticket prontos no pool")
+
+
+class TicketChannelPool:
+    """Pool adaptativo de canais de ticket ocultos"""
+
+    NAME_PREFIX = "reserva-"
+    RATE_WINDOW_SECONDS = 15 * 60   # janela usada para medir a taxa de abertura
+    LEAD_SECONDS = 5 * 60           # o pool tenta cobrir os tickets esperados nesse intervalo
+    REFILL_CHECK_SECONDS = 60
+    SAMPLE_SIZE = 200
+
+    def __init__(self, bot, guild_id: int, category_id_getter, min_size: int = 1, max_size: int = 0):
+        """
+        Args:
+            bot: instância do bot
+            guild_id: servidor dos tickets
+            category_id_getter: função que retorna o ID atual da categoria de tickets
+            min_size: tamanho mínimo do pool
+            max_size: tamanho máximo do pool (0 desativa o pool)
+        """
+        self.bot = bot
+        self.guild_id = guild_id
+        self.category_id_getter = category_id_getter
+        self.max_size = max_size
+        self.min_size = min(min_size, max_size)
+
+        self.available = deque()
+        self.claims = deque()
+        self.samples = {"pool": deque(maxlen=self.SAMPLE_SIZE), "create": deque(maxlen=self.SAMPLE_SIZE)}
+        self.refill_task = None
+        self._cleanup_tasks = set()
+        self._refill_event = None
+        self._loop = None
+        self.created_total = 0
+        self.claimed_total = 0
+        self.misses = 0
+
+        POOL_SIZE.set_function(lambda: len(self.available))
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def _category(self):
+        guild = self.bot.get_guild(self.guild_id)
+        if not guild:
+            return None, None
+        category = guild.get_channel(self.category_id_getter())
+        if not isinstance(category, discord.CategoryChannel):
+            return guild, None
+        return guild, category
+
+    # ==================== CICLO DE VIDA ====================
+
+    def start(self):
+        """Recupera canais de reserva existentes e inicia o reabastecimento (idempotente)"""
+        if not self.enabled:
+            return
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self.refill_task and not self.refill_task.done():
+            return
+
+        self._loop = loop
+        self._refill_event = asyncio.Event()
+
+        # Canais de reserva criados antes de um reinício continuam válidos
+        guild, category = self._category()
+        if category:
+            known = {channel.id for channel in self.available}
+            for channel in category.text_channels:
+                if channel.name.startswith(self.NAME_PREFIX) and channel.id not in known:
+                    self.available.append(channel)
+
+        self.refill_task = loop.create_task(self._refill_loop())
+        logger.info(f"🎟️ Pool de tickets ativo ({len(self.available)} canal(is) de reserva)")
+
+    def target_size(self) -> int:
+        """Tamanho alvo conforme a taxa recente de abertura de tickets"""
+        now = time.monotonic()
+        while self.claims and now - self.claims[0] > self.RATE_WINDOW_SECONDS:
+            self.claims.popleft()
+        expected = len(self.claims) / self.RATE_WINDOW_SECONDS * self.LEAD_SECONDS
+        return max(self.min_size, min(self.max_size, math.ceil(expected)))
+
+    async def _refill_loop(self):
+        while True:
+            try:
+                await self._refill()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Erro ao reabastecer pool de tickets: {e}")
+
+            self._refill_event.clear()
+            try:
+                await asyncio.wait_for(self._refill_event.wait(), timeout=self.REFILL_CHECK_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _refill(self):
+        guild, category = self._category()
+        if not category:
+            return
+
+        target = self.target_size()
+        while len(self.available) < target:
+            overwrites = {
+                guild.default_role: discord.PermissionOverwrite(view_channel=False),
+                guild.me: discord.PermissionOverwrite(view_channel=True, manage_channels=True, manage_permissions=True)
+            }
+            channel = await guild.create_text_channel(
+                name=f"{self.NAME_PREFIX}{secrets.token_hex(3)}",
+                category=category,
+                overwrites=overwrites,
+                reason="Pool de tickets"
+            )
+            self.available.append(channel)
+            self.created_total += 1
+
+        # Excesso (a taxa caiu): remove o que passou do máximo atual
+        while len(self.available) > max(target, self.min_size) + 1:
+            channel = self.available.pop()
+            try:
+                await channel.delete(reason="Pool de tickets reduzido")
+            except discord.NotFound:
+                pass
+
+    # ==================== USO ====================
+
+    async def claim(self, name: str, topic: str, overwrites: dict):
+        """
+        Transforma um canal de reserva no canal do ticket com uma única edição.
+        Retorna None se o pool estiver vazio/desativado (quem chama cria o canal normalmente).
+        """
+        if not self.enabled:
+            return None
+
+        self.claims.append(time.monotonic())
+        # Categoria atual: reservas criadas sob uma categoria antiga são movidas na mesma edição
+        _, category = self._category()
+        extra = {"category": category} if category else {}
+        try:
+            while self.available:
+                channel = self.available.popleft()
+                try:
+                    await channel.edit(name=name, topic=topic, overwrites=overwrites, reason="Ticket aberto", **extra)
+                    self.claimed_total += 1
+                    return channel
+                except discord.NotFound:
+                    # Canal de reserva apagado manualmente
+                    continue
+                except discord.HTTPException as e:
+                    # Sem permissão, erro do Discord ou limite de taxa: descarta a reserva e
+                    # deixa quem chama criar o canal normalmente
+                    logger.error(f"❌ Erro ao usar canal de reserva #{channel}: {e}")
+                    self._discard(channel)
+                    self.misses += 1
+                    return None
+            self.misses += 1
+            return None
+        finally:
+            if self._refill_event is not None:
+                self._refill_event.set()
+
+    def _discard(self, channel):
+        """Apaga em segundo plano uma reserva em estado desconhecido (o reabastecimento repõe)"""
+        async def _delete():
+            try:
+                await channel.delete(reason="Pool de tickets: reserva descartada")
+            except discord.HTTPException as e:
+                logger.warning(f"⚠️ Não foi possível apagar a reserva #{channel}: {e}")
+
+        task = asyncio.get_running_loop().create_task(_delete())
+        self._cleanup_tasks.add(task)
+        task.add_done_callback(self._cleanup_tasks.discard)
+
+    def record_time_to_channel(self, seconds: float, pooled: bool):
+        source = "pool" if pooled else "create"
+        self.samples[source].append(seconds)
+        TIME_TO_CHANNEL.observe(seconds, source=source)
+
+    def get_status(self):
+        def median_ms(values):
+            return round(statistics.median(values) * 1000, 1) if values else None
+
+        return {
+            "enabled": self.enabled,
+            "available": len(self.available),
+            "target_size": self.target_size() if self.enabled else 0,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "claimed_total": self.claimed_total,
+            "created_total": self.created_total,
+            "misses": self.misses,
+            "median_time_to_channel_ms": {
+                "pool": median_ms(self.samples["pool"]),
+                "create": median_ms(self.samples["create"])
+            },
+            "samples": {source: len(values) for source, values in self.samples.items()}
+        }
@@ -0,0 +1,117 @@
+"""
+Rastreamento leve de interações
+Cada fluxo (ex.: compra) vira um trace com spans por fase, guardados em um buffer circular
+"""
+import contextvars
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Tipos de span: onde o tempo foi gasto
+SPAN_KINDS = ("disk", "discord", "code")
+
+_current_trace = contextvars.ContextVar("ibot_current_trace", default=None)
+
+
+class Trace:
+    """Um fluxo rastreado e suas fases"""
+
+    __slots__ = ("trace_id", "name", "attrs", "started_at", "_start", "duration", "spans", "error")
+
+    def __init__(self, trace_id: int, name: str, attrs: dict):
+        self.trace_id = trace_id
+        self.name = name
+        self.attrs = attrs
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self.error = None
+
+    def to_dict(self) -> dict:
+        by_kind = {kind: 0.0 for kind in SPAN_KINDS}
+        for span in self.spans:
+            by_kind[span["kind"]] = by_kind.get(span["kind"], 0.0) + span["duration_ms"]
+        # O que não está em nenhum span é tempo do nosso próprio código
+        untracked = max(0.0, (self.duration or 0) * 1000 - sum(by_kind.values()))
+        by_kind["code"] += untracked
+
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "attrs": self.attrs,
+            "started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started_at)),
+            "duration_ms": round((self.duration or 0) * 1000, 2),
+            "error": self.error,
+            "by_kind_ms": {kind: round(value, 2) for kind, value in by_kind.items()},
+            "spans": self.spans
+        }
+
+
+class Tracer:
+    """Coleta traces concluídos em um buffer circular"""
+
+    def __init__(self, capacity: int = 200):
+        self.traces = deque(maxlen=capacity)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def trace(self, name: str, **attrs):
+        """Inicia um trace; spans abertos dentro do bloco (na mesma tarefa) pertencem a ele"""
+        current = Trace(next(self._ids), name, attrs)
+        token = _current_trace.set(current)
+        try:
+            yield current
+        except Exception as e:
+            current.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_trace.reset(token)
+            current.duration = time.perf_counter() - current._start
+            with self._lock:
+                self.traces.append(current)
+
+    @contextmanager
+    def span(self, name: str, kind: str = "code"):
+        """Mede uma fase do trace atual (sem trace ativo, não faz nada)"""
+        current = _current_trace.get()
+        if current is None:
+            yield
+            return
+
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            end = time.perf_counter()
+            current.spans.append({
+                "name": name,
+                "kind": kind,
+                "offset_ms": round((start - current._start) * 1000, 2),
+                "duration_ms": round((end - start) * 1000, 2),
+                "error": error
+            })
+
+    @staticmethod
+    def annotate(**attrs):
+        """Adiciona atributos ao trace atual (ex.: número do ticket)"""
+        current = _current_trace.get()
+        if current is not None:
+            current.attrs.update(attrs)
+
+    def slowest(self, name: str = None, limit: int = 10):
+        """Traces mais lentos entre os recentes"""
+        with self._lock:
+            candidates = [t for t in self.traces if name is None or t.name == name]
+        candidates.sort(key=lambda t: t.duration or 0, reverse=True)
+        return [t.to_dict() for t in candidates[:limit]]
+
+
+tracer = Tracer()
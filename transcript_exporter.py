@@ -0,0 +1,149 @@
+"""
+Exportação de transcrições de tickets
+Percorre o histórico do canal página a página e grava direto em JSONL compactado (gzip),
+sem manter a conversa inteira em memória
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+import time
+from collections import deque
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_MESSAGES = registry.counter(
+    "ibot_transcript_messages_total", "Mensagens gravadas em transcrições de tickets"
+)
+TRANSCRIPT_SECONDS = registry.histogram(
+    "ibot_transcript_export_duration_seconds", "Duração da exportação de transcrições",
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+)
+
+_SAFE_NAME_REGEX = re.compile(r'[^a-zA-Z0-9_-]+')
+
+
+class TranscriptExporter:
+    """Grava o histórico de canais de ticket em arquivos .jsonl.gz"""
+
+    PAGE_SIZE = 100          # mensagens por página da API (máximo do Discord)
+    RECENT_EXPORTS = 20
+
+    def __init__(self, folder: str = "transcripts"):
+        self.folder = folder
+        os.makedirs(self.folder, exist_ok=True)
+        self.recent = deque(maxlen=self.RECENT_EXPORTS)
+        self.totals = {"exports": 0, "messages": 0, "seconds": 0.0, "failed": 0}
+
+    @staticmethod
+    def _serialize(message) -> dict:
+        return {
+            "id": str(message.id),
+            "created_at": message.created_at.isoformat(),
+            "edited_at": message.edited_at.isoformat() if message.edited_at else None,
+            "author": {
+                "id": str(message.author.id),
+                "name": str(message.author),
+                "bot": message.author.bot
+            },
+            "content": message.content,
+            # Anexos ficam só como referência: o arquivo continua no CDN do Discord
+            "attachments": [
+                {"filename": a.filename, "url": a.url, "size": a.size, "content_type": a.content_type}
+                for a in message.attachments
+            ],
+            "embeds": [embed.to_dict() for embed in message.embeds]
+        }
+
+    def get_path(self, filename: str):
+        """Caminho de uma transcrição existente (None se o nome for inválido ou não existir)"""
+        if os.path.basename(filename) != filename or not filename.endswith(".jsonl.gz"):
+            return None
+        path = os.path.join(self.folder, filename)
+        return path if os.path.isfile(path) else None
+
+    async def export(self, channel, ticket_id: str, job=None) -> dict:
+        """
+        Exporta o histórico do canal (mais antigas primeiro).
+        Cada página é gravada assim que chega; a escrita roda fora do event loop.
+        Retorna o resumo da exportação (arquivo, mensagens, duração e mensagens/s).
+        """
+        safe_id = _SAFE_NAME_REGEX.sub("_", str(ticket_id))
+        filename = f"{safe_id}_{time.strftime('%Y%m%d_%H%M%S')}.jsonl.gz"
+        path = os.path.join(self.folder, filename)
+        temp_path = path + ".tmp"
+
+        start = time.perf_counter()
+        count = 0
+        handle = await asyncio.to_thread(gzip.open, temp_path, "wt", encoding="utf-8")
+        try:
+            header = {
+                "type": "ticket",
+                "ticket_id": str(ticket_id),
+                "channel_id": str(channel.id),
+                "channel_name": channel.name,
+                "exported_at": time.strftime("%Y-%m-%d %H:%M:%S")
+            }
+            page = [json.dumps(header, ensure_ascii=False)]
+
+            async for message in channel.history(limit=None, oldest_first=True):
+                page.append(json.dumps(self._serialize(message), ensure_ascii=False))
+                count += 1
+                if len(page) >= self.PAGE_SIZE:
+                    await asyncio.to_thread(handle.write, "\n".join(page) + "\n")
+                    page.clear()
+                    if job is not None:
+                        job.update_progress(messages=count)
+
+            if page:
+                await asyncio.to_thread(handle.write, "\n".join(page) + "\n")
+            await asyncio.to_thread(handle.close)
+            os.replace(temp_path, path)
+        except BaseException:
+            self.totals["failed"] += 1
+            await asyncio.to_thread(handle.close)
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+        elapsed = time.perf_counter() - start
+        result = {
+            "ticket_id": str(ticket_id),
+            "filename": filename,
+            "messages": count,
+            "bytes": os.path.getsize(path),
+            "seconds": round(elapsed, 3),
+            "messages_per_second": round(count / elapsed, 1) if elapsed > 0 else None
+        }
+        if job is not None:
+            job.update_progress(messages=count, filename=filename)
+
+        self.recent.append(result)
+        self.totals["exports"] += 1
+        self.totals["messages"] += count
+        self.totals["seconds"] += elapsed
+        TRANSCRIPT_MESSAGES.inc(count)
+        TRANSCRIPT_SECONDS.observe(elapsed)
+
+        logger.info(
+            f"📜 Transcrição do ticket {ticket_id}: {count} mensagens em {elapsed:.2f}s "
+            f"({result['messages_per_second']} msg/s) -> {filename}"
+        )
+        return result
+
+    def get_status(self):
+        seconds = self.totals["seconds"]
+        return {
+            "folder": self.folder,
+            "exports": self.totals["exports"],
+            "failed": self.totals["failed"],
+            "messages": self.totals["messages"],
+            "messages_per_second": round(self.totals["messages"] / seconds, 1) if seconds > 0 else None,
+            "recent": list(reversed(self.recent))
+        }